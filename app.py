@@ -1,10 +1,17 @@
+import os
+import threading
+from concurrent.futures import wait
 import dash
-from dash import dcc, html
+from dash import dcc, html, ctx
 from dash.dependencies import Input, Output
 import pandas as pd
 from datapipeline import DataPipeline
-import plotly.figure_factory as ff
-import plotly.graph_objs as go
+from weatherstore import WeatherStore
+from tableloader import TableLoader
+from tablefilter import page_of_records, requested_page
+from lazyimport import LazyModule
+
+ff = LazyModule('plotly.figure_factory')
 
 # Connect to the PostgreSQL database
 dp = DataPipeline()
@@ -20,26 +27,79 @@ dp = DataPipeline()
 # my_query = "SELECT * FROM constants"
 # constants = pd.read_sql_query(my_query, con=engine)
 
-hourly_data = pd.read_csv('hourlydata.csv')
-daily_data = pd.read_csv('dailydata.csv')
-constants = pd.read_csv('constants.csv')
+# Under gunicorn (see gunicorn.conf.py) the master publishes the tables as Arrow files once
+# and every worker memory-maps the same copy
+shared_dir = os.getenv('DATAPIPELINE_SHARED_DIR')
+
+def load_store(name):
+    # Index the data by city and date once so callbacks slice instead of scanning
+    if shared_dir:
+        return WeatherStore(dp.attach_shared_table(name, shared_dir), presorted=True)
+    # Load the Parquet datasets written by the pipeline, falling back to the CSV files
+    return WeatherStore(dp.load_table(name))
+
+def load_constants():
+    if shared_dir:
+        return dp.attach_shared_table('constants', shared_dir)
+    return dp.load_table('constants')
+
+# Tables are loaded on first use, so the server starts without waiting for them
+# Reloading a table drops the figures cached from it
+tables = TableLoader({
+    'dailydata': lambda: load_store('dailydata'),
+    'hourlydata': lambda: load_store('hourlydata'),
+    'constants': load_constants
+}, on_reload=dp.figure_cache.forget_data)
+
+# Precomputed aggregates written by the pipeline next to the CSVs, if present
+dp.load_rollups()
+
+def warm_up_analysis():
+    # Compute the Overall Analysis figures of every city once the daily table is loaded
+    daily_store = tables['dailydata']
+    wait(dp.warm_up_analysis(daily_store, tables['constants'], cities=daily_store.cities()))
+
+# Load the tables and warm the analysis figures in the background so the server starts at once
+tables.preload(['dailydata', 'hourlydata'])
+warm_up = threading.Thread(target=warm_up_analysis, name='analysis-warm-up', daemon=True)
+warm_up.start()
+
+# Optionally keep the current weather of every city warm. Off by default to save API quota:
+# set DATAPIPELINE_WEATHER_REFRESH to the refresh interval in seconds (e.g. 3600) to enable it.
+# Under gunicorn the workers share one refresher through the shared table directory.
+weather_refresh_interval = float(os.getenv('DATAPIPELINE_WEATHER_REFRESH', 0))
+if dp.weatherstackkey and weather_refresh_interval > 0:
+    dp.start_current_weather_refresher(
+        interval=weather_refresh_interval,
+        shared_path=os.path.join(shared_dir, 'current_weather.parquet') if shared_dir else None
+    )
 
-# Dropdown options for cities and variables
-city_options = [{'label': city, 'value': city} for city in constants['name'].unique()]
+# Dropdown options for cities and variables; the daily columns come from the table's schema
+daily_column_types = dp.table_column_types('dailydata', shared_dir=shared_dir)
+daily_columns = list(daily_column_types)
+city_options = [{'label': city, 'value': city} for city in tables['constants']['name'].unique()]
 variable_options = [
     {'label': 'Temperature', 'value': 'temperature'},
     {'label': 'Windspeed', 'value': 'windspeed'},
     {'label': 'Precipitation', 'value': 'precipitation'}
-] + [{'label': col.capitalize(), 'value': col} for col in daily_data.columns if col not in [
+] + [{'label': col.capitalize(), 'value': col} for col in daily_columns if col not in [
     'name', 'date', 'preciptype', 'severerisk', 'sunrise', 'sunset', 'conditions', 'description', 'source',
     'tempmax', 'tempmin', 'temp', 'feelslikemax', 'feelslikemin', 'feelslike',  # Part of 'Temperature'
     'windspeed', 'windspeedmax', 'windspeedmin', 'windspeedmean',  # Part of 'Windspeed'
     'precip', 'precipprob'  # Part of 'Precipitation'
 ]]
 
+# Columns of the basic weather table; rows are served one page at a time.
+# The column types make the table's filter compare numbers and dates as such.
+basic_weather_columns = [{'name': col, 'id': col, 'type': col_type}
+                         for col, col_type in daily_column_types.items() if col != 'name']
+
 # Define the app
 app = dash.Dash(__name__, external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'])
 
+# WSGI entry point: gunicorn -c gunicorn.conf.py app:server
+server = app.server
+
 # App layout
 app.layout = html.Div([
     html.H1("What's the weather like?", style={'text-align': 'center'}),
@@ -95,7 +155,33 @@ app.layout = html.Div([
                 html.Div([
                     dcc.Dropdown(id='variable-dropdown', options=variable_options, value=variable_options[0]['value'])
                 ], style={'width': '50%', 'margin-bottom': '20px'}),
-                html.Div(id='basic-weather-table', style={'padding': '20px'}),
+                html.Div([
+                    # Paged, sorted and filtered on the server; only the visible page is sent
+                    dash.dash_table.DataTable(
+                        id='basic-weather-datatable',
+                        columns=basic_weather_columns,
+                        page_action='custom',
+                        page_current=0,
+                        page_size=10,  # Display 10 rows per page
+                        sort_action='custom',
+                        sort_mode='multi',
+                        sort_by=[],
+                        filter_action='custom',
+                        filter_query='',
+                        style_table={'overflowX': 'auto'},  # Enable horizontal scrolling
+                        style_cell={
+                            'textAlign': 'center',  # Center align all text
+                            'minWidth': '100px', 'width': '100px', 'maxWidth': '100px',  # Equal column widths
+                            'whiteSpace': 'normal',  # Prevent text from being cut off
+                        },
+                        style_header={
+                            'backgroundColor': 'darkblue',  # Blue background for headers
+                            'color': 'white',  # White text for headers
+                            'fontWeight': 'bold',  # Bold text for headers
+                            'textAlign': 'center',  # Center align header text
+                        }
+                    )
+                ], id='basic-weather-table', style={'padding': '20px'}),
                 dcc.Graph(id='basic-weather-graph')
             ]),
 
@@ -107,7 +193,14 @@ app.layout = html.Div([
 
             # Tab 4: Overall Analysis
             dcc.Tab(label='Overall Analysis', children=[
-                html.Div(id='overall-analysis', style={'padding': '20px'})
+                # Each figure has its own callback so one slow figure does not hold up the others
+                html.Div([
+                    html.Div([dcc.Loading(dcc.Graph(id='humidity-temperature-graph'))], style={'width': '48%', 'display': 'inline-block'}),
+                    html.Div([dcc.Loading(dcc.Graph(id='cloud-solar-graph'))], style={'width': '48%', 'display': 'inline-block'}),
+                    html.Div([dcc.Loading(dcc.Graph(id='seasonal-analysis-graph'))], style={'width': '48%', 'display': 'inline-block'}),
+                    html.Div([dcc.Loading(dcc.Graph(id='extreme-weather-graph'))], style={'width': '48%', 'display': 'inline-block'}),
+                    html.Div([dcc.Loading(dcc.Graph(id='geographical-insights-graph'))], style={'width': '100%', 'display': 'inline-block'})
+                ], id='overall-analysis', style={'padding': '20px'})
             ]),
 
             # Tab 5: City Comparison
@@ -132,8 +225,8 @@ app.layout = html.Div([
 )
 def fetch_current_weather(n_clicks, selected_city):
     if n_clicks > 0:
-        # Fetch current weather data
-        current_weather_df = dp.get_current_weather(selected_city)
+        # Read current weather from the refresher's snapshot while it is fresh, otherwise fetch it
+        current_weather_df = dp.get_latest_weather(selected_city)
 
         if current_weather_df is not None and not current_weather_df.empty:
             # Extract weather icon URL
@@ -174,6 +267,7 @@ def fetch_current_weather(n_clicks, selected_city):
 )
 def update_city_info(selected_city):
     # Filter the constants table for the selected city
+    constants = tables['constants']
     city_info = constants[constants['name'] == selected_city].drop(columns=['address'], errors='ignore')
 
     # Rename columns for clarity
@@ -215,47 +309,38 @@ def update_city_info(selected_city):
     ])
 
 @app.callback(
-    [Output('basic-weather-table', 'children'),
-     Output('basic-weather-graph', 'figure')],
+    [Output('basic-weather-datatable', 'data'),
+     Output('basic-weather-datatable', 'page_count'),
+     Output('basic-weather-datatable', 'page_current')],
+    [Input('city-dropdown', 'value'),
+     Input('start-date', 'date'),
+     Input('end-date', 'date'),
+     Input('basic-weather-datatable', 'page_current'),
+     Input('basic-weather-datatable', 'page_size'),
+     Input('basic-weather-datatable', 'sort_by'),
+     Input('basic-weather-datatable', 'filter_query')]
+)
+def update_basic_weather_table(selected_city, start_date, end_date, page_current, page_size, sort_by, filter_query):
+    # Go back to the first page unless only the page changed
+    page_current = requested_page(ctx.triggered_prop_ids, 'basic-weather-datatable', page_current)
+
+    # Slice daily_data for the selected city and date range from the index
+    filtered_data = tables['dailydata'].select(selected_city, start_date, end_date).drop(columns=['name'], errors='ignore')
+
+    return page_of_records(filtered_data, page_current, page_size, sort_by, filter_query)
+
+@app.callback(
+    Output('basic-weather-graph', 'figure'),
     [Input('city-dropdown', 'value'),
      Input('start-date', 'date'),
      Input('end-date', 'date'),
      Input('variable-dropdown', 'value')]
 )
 def update_basic_weather(selected_city, start_date, end_date, selected_variable):
-    # Filter daily_data for the selected city and date range
-    filtered_data = daily_data[
-        (daily_data['name'] == selected_city) &
-        (daily_data['date'] >= start_date) &
-        (daily_data['date'] <= end_date)
-    ].drop(columns=['name'], errors='ignore')
-
-    # Format the 'date' column to remove time
-    filtered_data['date'] = pd.to_datetime(filtered_data['date']).dt.date
-
-    # Create a styled scrollable DataTable
-    table = dash.dash_table.DataTable(
-        data=filtered_data.to_dict('records'),
-        columns=[{'name': col, 'id': col} for col in filtered_data.columns],
-        style_table={'overflowX': 'auto'},  # Enable horizontal scrolling
-        style_cell={
-            'textAlign': 'center',  # Center align all text
-            'minWidth': '100px', 'width': '100px', 'maxWidth': '100px',  # Equal column widths
-            'whiteSpace': 'normal',  # Prevent text from being cut off
-        },
-        style_header={
-            'backgroundColor': 'darkblue',  # Blue background for headers
-            'color': 'white',  # White text for headers
-            'fontWeight': 'bold',  # Bold text for headers
-            'textAlign': 'center',  # Center align header text
-        },
-        page_size=10  # Display 10 rows per page
-    )
-
     # Generate the graph using the Datapipeline class
-    graph_figure = dp.plot_basic_weather(daily_data, selected_city, start_date, end_date, selected_variable)
+    graph_figure = dp.plot_basic_weather(tables['dailydata'], selected_city, start_date, end_date, selected_variable)
 
-    return table, graph_figure 
+    return graph_figure
 
 @app.callback(
     [Output('temp-pressure-graph', 'figure'),
@@ -266,28 +351,45 @@ def update_basic_weather(selected_city, start_date, end_date, selected_variable)
 )
 def update_hourly_weather(selected_city, start_date, end_date):
     # Generate plots using the Datapipeline class
-    hourly_temp = dp.plot_hourly_temperature(hourly_data, selected_city, start_date, end_date)
-    wind_heatmap = dp.plot_wind_heatmap(hourly_data, selected_city, start_date, end_date)
+    hourly_temp = dp.plot_hourly_temperature(tables['hourlydata'], selected_city, start_date, end_date)
+    wind_heatmap = dp.plot_wind_heatmap(tables['hourlydata'], selected_city, start_date, end_date)
 
     return hourly_temp, wind_heatmap
 @app.callback(
-    Output('overall-analysis', 'children'),
+    Output('humidity-temperature-graph', 'figure'),
     Input('city-dropdown', 'value')
 )
-def update_overall_analysis(selected_city):
-    fig1 = dp.impact_of_humidity_on_temperature(daily_data, selected_city)
-    fig2 = dp.cloud_cover_vs_solar_radiation(daily_data, selected_city)
-    fig3 = dp.seasonal_analysis(daily_data, selected_city)
-    fig4 = dp.extreme_weather_analysis(daily_data, selected_city)
-    fig5 = dp.geographical_insights(constants, daily_data)
+def update_humidity_temperature(selected_city):
+    return dp.impact_of_humidity_on_temperature(tables['dailydata'], selected_city)
 
-    return html.Div([
-        html.Div([dcc.Graph(figure=fig1)], style={'width': '48%', 'display': 'inline-block'}),
-        html.Div([dcc.Graph(figure=fig2)], style={'width': '48%', 'display': 'inline-block'}),
-        html.Div([dcc.Graph(figure=fig3)], style={'width': '48%', 'display': 'inline-block'}),
-        html.Div([dcc.Graph(figure=fig4)], style={'width': '48%', 'display': 'inline-block'}),
-        html.Div([dcc.Graph(figure=fig5)], style={'width': '100%', 'display': 'inline-block'})
-    ])
+@app.callback(
+    Output('cloud-solar-graph', 'figure'),
+    Input('city-dropdown', 'value')
+)
+def update_cloud_solar(selected_city):
+    return dp.cloud_cover_vs_solar_radiation(tables['dailydata'], selected_city)
+
+@app.callback(
+    Output('seasonal-analysis-graph', 'figure'),
+    Input('city-dropdown', 'value')
+)
+def update_seasonal_analysis(selected_city):
+    return dp.seasonal_analysis(tables['dailydata'], selected_city)
+
+@app.callback(
+    Output('extreme-weather-graph', 'figure'),
+    Input('city-dropdown', 'value')
+)
+def update_extreme_weather(selected_city):
+    return dp.extreme_weather_analysis(tables['dailydata'], selected_city)
+
+# Covers every city, so it is sent once when the page loads rather than on every city change
+@app.callback(
+    Output('geographical-insights-graph', 'figure'),
+    Input('geographical-insights-graph', 'id')
+)
+def update_geographical_insights(_):
+    return dp.geographical_insights(tables['constants'], tables['dailydata'])
 
 @app.callback(
     [Output('comparison-table', 'children'),
@@ -299,8 +401,8 @@ def update_overall_analysis(selected_city):
 )
 def update_city_comparison(city1, city2, start_date, end_date):
     # Build comparison table and graph using Datapipeline methods
-    comparison_table = dp.build_comparison_table(daily_data, city1, city2, start_date, end_date)
-    comparison_graph = dp.build_comparison_graph(daily_data, city1, city2, start_date, end_date)
+    comparison_table = dp.build_comparison_table(tables['dailydata'], city1, city2, start_date, end_date)
+    comparison_graph = dp.build_comparison_graph(tables['dailydata'], city1, city2, start_date, end_date)
 
     # Convert the comparison table to a Dash-friendly format
     table_fig = ff.create_table(comparison_table)
@@ -0,0 +1,50 @@
+"""
+Times serial GRIB decoding against the process-pool decoding of get_grib_data for several process counts.
+
+Run from the repository root on downloaded GRIB files:
+    python -m benchmarks.bench_grib_decode --files data/202410.grib data/single.grib --processes 1 2 4
+    python -m benchmarks.bench_grib_decode --points-only --split-variables
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from datapipeline import DataPipeline
+
+
+def decode(dp, files, points_only, **kwargs):
+    start = time.perf_counter()
+    if points_only:
+        data = dp.get_grib_city_data(files, **kwargs)
+    else:
+        data = dp.get_grib_data(files, **kwargs)
+    return time.perf_counter() - start, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="+", help="GRIB files to decode; defaults to DataPipeline.grib_file_paths")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--slice-size", type=int, help="time steps per task; defaults to about two tasks per process")
+    parser.add_argument("--split-variables", action="store_true", help="also split every time slice by variable")
+    parser.add_argument("--points-only", action="store_true", help="decode only the target cities (get_grib_city_data)")
+    args = parser.parse_args()
+
+    dp = DataPipeline()
+    files = args.files or dp.grib_file_paths
+    print(f"CPUs: {os.cpu_count()}  files: {', '.join(files)}")
+
+    serial_seconds, expected = decode(dp, files, args.points_only)
+    print(f"\n{'serial':<14} {serial_seconds:8.2f} s  {len(expected):,} rows")
+
+    for processes in sorted(set(args.processes)):
+        seconds, data = decode(dp, files, args.points_only, processes=processes,
+                               slice_size=args.slice_size, split_variables=args.split_variables)
+        pd.testing.assert_frame_equal(expected, data)
+        print(f"{f'{processes} processes':<14} {seconds:8.2f} s  {serial_seconds / seconds:5.2f}x serial")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares the string-splitting hourly_data used before with the datetime64 version in DataPipeline.
+
+Run from the repository root:
+    python -m benchmarks.bench_hourly_data --cities 20 --years 3
+"""
+import argparse
+import timeit
+
+from datapipeline import DataPipeline
+from benchmarks.synthetic import make_zip_data
+
+
+def legacy_hourly_data(zip_data):
+    """The previous hourly_data: cast 'time' to str and split it into 'date' and 'time'."""
+    processed_data = zip_data.drop(columns=["number", "step", "valid_time", "z", "lsm"], errors="ignore")
+    processed_data = processed_data.sort_values(by=["name", "time"]).reset_index(drop=True)
+    processed_data["time"] = processed_data["time"].astype(str)
+    processed_data["date"] = processed_data["time"].str.split(" ").str[0]
+    processed_data["time"] = processed_data["time"].str.split(" ").str[1]
+    processed_data["t2m"] = processed_data["t2m"] - 273.15
+    processed_data["skt"] = processed_data["skt"] - 273.15
+    return processed_data
+
+
+def legacy_filter(hourly_data, city, start_date, end_date):
+    """String comparison on 'date' followed by a groupby on the 'time' string."""
+    filtered_data = hourly_data[
+        (hourly_data['name'] == city) &
+        (hourly_data['date'] >= start_date) &
+        (hourly_data['date'] <= end_date)
+    ]
+    return filtered_data.groupby('time')['t2m'].mean()
+
+
+def typed_filter(hourly_data, city, start_date, end_date):
+    """Datetime comparison on 'date' followed by a groupby on the integer 'hour'."""
+    filtered_data = hourly_data[
+        (hourly_data['name'] == city) &
+        (hourly_data['date'] >= start_date) &
+        (hourly_data['date'] <= end_date)
+    ]
+    return filtered_data.groupby('hour', observed=True)['t2m'].mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dp = DataPipeline()
+    zip_data = make_zip_data(n_cities=args.cities, years=args.years)
+    print(f"Synthetic hourly frame: {len(zip_data):,} rows ({args.cities} cities x {args.years} years)")
+
+    legacy = legacy_hourly_data(zip_data)
+    typed = dp.hourly_data(zip_data)
+    compact = dp.hourly_data(zip_data, compact=True)
+    city = zip_data["name"].iloc[0]
+
+    timings = {
+        "hourly_data (str split)": lambda: legacy_hourly_data(zip_data),
+        "hourly_data (datetime64)": lambda: dp.hourly_data(zip_data),
+        "hourly_data (compact)": lambda: dp.hourly_data(zip_data, compact=True),
+        "filter+groupby (str)": lambda: legacy_filter(legacy, city, "2020-03-01", "2021-03-01"),
+        "filter+groupby (datetime64)": lambda: typed_filter(typed, city, "2020-03-01", "2021-03-01"),
+        "filter+groupby (compact)": lambda: typed_filter(compact, city, "2020-03-01", "2021-03-01"),
+    }
+    for label, func in timings.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{label:<30} {best * 1000:10.1f} ms")
+
+    for label, frame in [("str split", legacy), ("datetime64", typed), ("compact", compact)]:
+        print(f"memory ({label}): {frame.memory_usage(deep=True).sum() / 1e6:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the cold-start import cost of datapipeline and app with python -X importtime.
+
+Run from the repository root (app.py reads constants.csv and the dailydata header from the working directory):
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --module app --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module, cwd=None):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module (str): Module to import.
+        cwd (str): Working directory of the interpreter.
+
+    Returns:
+        tuple: (wall seconds of the whole interpreter run, list of (cumulative microseconds, module name, depth))
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv('PYTHONPATH')])))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=cwd or REPO_DIR, env=env)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative), name.strip(), depth))
+    return wall, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', action='append', help='module to import (repeatable); defaults to datapipeline and app')
+    parser.add_argument('--top', type=int, default=10, help='number of direct imports to list')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for module in args.module or ['datapipeline', 'app']:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        wall, rows = min(runs, key=lambda run: run[0])
+        total = next(cumulative for cumulative, name, depth in rows if name == module)
+        print(f"\nimport {module}: {total / 1000:8.1f} ms in imports, {wall * 1000:8.1f} ms interpreter wall time")
+
+        # Direct imports of the module are one level below it in the importtime tree
+        direct = [(cumulative, name) for cumulative, name, depth in rows if depth == 1]
+        for cumulative, name in sorted(direct, reverse=True)[:args.top]:
+            print(f"    {name:<40} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
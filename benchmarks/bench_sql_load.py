@@ -0,0 +1,52 @@
+"""
+Compares to_sql(chunksize=1000, if_exists='replace') with DataPipeline.bulk_load for the hourly table.
+
+Uses a SQLite file as a stand-in by default; pass --url to load into a local MySQL instead:
+    python -m benchmarks.bench_sql_load --cities 9 --years 3
+    python -m benchmarks.bench_sql_load --url mysql+pymysql://root:pw@127.0.0.1:3306/datapipeline --method infile
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from datapipeline import DataPipeline
+from benchmarks.synthetic import make_zip_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=9)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--url", default=None, help="SQLAlchemy URL; defaults to a temporary SQLite file")
+    parser.add_argument("--method", default="executemany", choices=["executemany", "infile"])
+    args = parser.parse_args()
+
+    dp = DataPipeline()
+    hourly_data = dp.hourly_data(make_zip_data(n_cities=args.cities, years=args.years))
+    print(f"Synthetic hourly table: {len(hourly_data):,} rows ({args.cities} cities x {args.years} years)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        connect_args = {'local_infile': True} if args.method == 'infile' else {}
+        engine = create_engine(url, connect_args=connect_args)
+
+        start = time.perf_counter()
+        hourly_data.to_sql('hourlydata', con=engine, index=False, chunksize=1000, if_exists='replace')
+        print(f"{'to_sql chunksize=1000':<30} {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        dp.bulk_load(hourly_data, 'hourlydata', engine, primary_key=['name', 'datetime'],
+                     indexes=[['date'], ['name', 'date']], method=args.method)
+        print(f"{'bulk_load ' + args.method:<30} {time.perf_counter() - start:8.2f} s")
+
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT COUNT(*) FROM hourlydata")).scalar()
+        print(f"rows loaded: {rows:,}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
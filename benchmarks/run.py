@@ -0,0 +1,199 @@
+"""
+Benchmark suite for the pipeline and dashboard hot paths on synthetic data.
+
+Run from the repository root:
+    python -m benchmarks.run --cities 9 --years 2
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+Each run is saved to benchmarks/results/<timestamp>.json. With --compare, cases that got
+slower than --threshold times the earlier run are reported and the exit code is 1.
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+import numpy as np
+
+from datapipeline import DataPipeline
+from figurecache import FigureCache
+from benchmarks.bench_import_time import import_times
+from benchmarks.synthetic import make_city_data, make_grib_dataset, make_target_coords, make_zip_data
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+class OfflinePipeline(DataPipeline):
+    """DataPipeline whose city data is the synthetic city data instead of the bulk download."""
+
+    def __init__(self, city_data):
+        super().__init__()
+        self.city_data = city_data
+
+    def get_city_data(self, *args, **kwargs):
+        # get_city_info and the pipeline graph then work unchanged, with the same signatures
+        return self.city_data.copy()
+
+
+def build_cases(args, workdir):
+    """
+    Generates the synthetic data and returns the benchmark cases.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments.
+        workdir (str): Temporary directory for the files read by app.py.
+
+    Returns:
+        dict: Case name to zero-argument callable.
+    """
+    target_coords = make_target_coords(args.cities)
+    city_data = make_city_data(args.cities, args.years)
+    zip_data = make_zip_data(args.cities, args.years)
+    grib = make_grib_dataset(target_coords, n_times=args.grib_times)
+    grib_frame = grib.to_dataframe().reset_index()
+
+    dp = OfflinePipeline(city_data)
+    dp.target_coords = target_coords
+    dp.figure_cache = FigureCache(maxsize=0)  # measure the computation, not the cache
+
+    daily = dp.daily_data(city_data.copy())
+    hourly = dp.hourly_data(zip_data)
+    constants = dp.make_constants_tabel(dp.get_zip_data(grib_frame))
+    constants.columns = constants.columns.str.lower()
+
+    city, other = target_coords[0]['name'], target_coords[1]['name']
+    start, end = '2020-03-01', '2020-09-01'
+
+    cases = {
+        'pipeline.daily_data': lambda: dp.daily_data(city_data.copy()),
+        'pipeline.hourly_data': lambda: dp.hourly_data(zip_data),
+        'pipeline.get_zip_data': lambda: dp.get_zip_data(grib_frame),
+        'pipeline.select_target_points': lambda: dp.select_target_points(grib).to_dataframe(),
+        'pipeline.make_constants_tabel': lambda: dp.make_constants_tabel(dp.get_zip_data(grib_frame)),
+        'plot.plot_basic_weather': lambda: dp.plot_basic_weather(daily, city, start, end, 'temperature'),
+        'plot.plot_wind_heatmap': lambda: dp.plot_wind_heatmap(hourly, city, start, end),
+        'plot.wind_rose_bins': lambda: dp.wind_rose_bins(hourly, city, start, end),
+        'plot.plot_hourly_temperature': lambda: dp.plot_hourly_temperature(hourly, city, start, end),
+        'plot.impact_of_humidity_on_temperature': lambda: dp.impact_of_humidity_on_temperature(daily, city),
+        'plot.cloud_cover_vs_solar_radiation': lambda: dp.cloud_cover_vs_solar_radiation(daily, city),
+        'plot.seasonal_analysis': lambda: dp.seasonal_analysis(daily, city),
+        'stats.regression_fits': lambda: dp.regression_fits(daily, 'humidity', 'temp'),
+        'stats.seasonal_statistics': lambda: dp.seasonal_statistics(daily),
+        'plot.extreme_weather_analysis': lambda: dp.extreme_weather_analysis(daily, city),
+        'plot.geographical_insights': lambda: dp.geographical_insights(constants, daily),
+        'plot.build_comparison_table': lambda: dp.build_comparison_table(daily, city, other, start, end),
+        'plot.build_comparison_graph': lambda: dp.build_comparison_graph(daily, city, other, start, end),
+    }
+
+    # app.py loads its tables from the working directory at import time
+    daily.to_csv(os.path.join(workdir, 'dailydata.csv'), index=False)
+    hourly.to_csv(os.path.join(workdir, 'hourlydata.csv'), index=False)
+    constants.to_csv(os.path.join(workdir, 'constants.csv'), index=False)
+    os.chdir(workdir)
+    app = importlib.import_module('app')
+    app.warm_up.join()
+    app.dp.figure_cache = FigureCache(maxsize=0)
+
+    cases.update({
+        # Cold starts in a fresh interpreter
+        'startup.import_datapipeline': lambda: import_times('datapipeline', cwd=workdir),
+        'startup.import_app': lambda: import_times('app', cwd=workdir),
+        'app.update_city_info': lambda: app.update_city_info(city),
+        'app.update_basic_weather': lambda: app.update_basic_weather(city, start, end, 'temperature'),
+        'app.page_of_records': lambda: app.page_of_records(app.tables['dailydata'].select(city, start, end), 3, 10,
+                                                           [{'column_id': 'temp', 'direction': 'desc'}], '{temp} > 0'),
+        'app.update_hourly_weather': lambda: app.update_hourly_weather(city, start, end),
+        'app.update_humidity_temperature': lambda: app.update_humidity_temperature(city),
+        'app.update_cloud_solar': lambda: app.update_cloud_solar(city),
+        'app.update_seasonal_analysis': lambda: app.update_seasonal_analysis(city),
+        'app.update_extreme_weather': lambda: app.update_extreme_weather(city),
+        'app.update_geographical_insights': lambda: app.update_geographical_insights(None),
+        'app.update_city_comparison': lambda: app.update_city_comparison(city, other, start, end),
+    })
+    return cases
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints the speed ratio of each case against an earlier run.
+
+    Returns:
+        list: Names of the cases slower than threshold times the earlier run.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print(f"\nComparison with {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['min_ms'] / baseline[name]['min_ms']
+        flag = ''
+        if ratio > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<45} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=9)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--grib-times', type=int, default=48, help='time steps in the synthetic GRIB grid')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this text')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        try:
+            cases = build_cases(args, workdir)
+            results = {}
+            for name, func in cases.items():
+                if args.filter not in name:
+                    continue
+                times = np.array(timeit.repeat(func, number=1, repeat=args.repeat)) * 1000
+                results[name] = {'min_ms': round(float(times.min()), 3), 'median_ms': round(float(np.median(times)), 3)}
+                print(f"{name:<45} min {times.min():9.2f} ms   median {np.median(times):9.2f} ms")
+        finally:
+            os.chdir(cwd)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'scale': {'cities': args.cities, 'years': args.years, 'grib_times': args.grib_times},
+        'results': results,
+    }
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(path, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nResults saved to {path}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
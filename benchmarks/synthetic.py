@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+
+def city_names(n_cities):
+    """
+    Returns n_cities synthetic city names.
+
+    Args:
+        n_cities (int): Number of cities.
+
+    Returns:
+        list: City names such as 'city000', 'city001', ...
+    """
+    return [f"city{i:03d}" for i in range(n_cities)]
+
+
+def make_zip_data(n_cities=9, years=1, freq="h", seed=0):
+    """
+    Builds a synthetic frame shaped like the output of DataPipeline.get_zip_data.
+
+    Args:
+        n_cities (int): Number of cities.
+        years (int): Number of years of data per city.
+        freq (str): Time step between records.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Hourly GRIB-like data with one row per city and time step.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01")
+    times = pd.date_range(start, start + pd.DateOffset(years=years), freq=freq, inclusive="left")
+    names = city_names(n_cities)
+    n_rows = len(times) * n_cities
+
+    return pd.DataFrame({
+        "time": np.tile(times.values, n_cities),
+        "number": 0,
+        "step": pd.Timedelta(0),
+        "surface": 0.0,
+        "valid_time": np.tile(times.values, n_cities),
+        "u10": rng.normal(0, 3, n_rows),
+        "v10": rng.normal(0, 3, n_rows),
+        "t2m": rng.normal(288, 10, n_rows),
+        "sp": rng.normal(100000, 1000, n_rows),
+        "skt": rng.normal(288, 12, n_rows),
+        "name": np.repeat(names, len(times)),
+    })
+
+
+def make_target_coords(n_cities=9, resolution=0.25, seed=0):
+    """
+    Builds target coordinates on a regular grid, in the format of DataPipeline.target_coords.
+
+    Args:
+        n_cities (int): Number of cities.
+        resolution (float): Grid spacing in degrees; coordinates fall on grid points.
+        seed (int): Random seed.
+
+    Returns:
+        list: Dictionaries with 'name', 'latitude' and 'longitude'.
+    """
+    rng = np.random.default_rng(seed)
+    latitudes = np.round(rng.uniform(25, 48, n_cities) / resolution) * resolution
+    longitudes = np.round(rng.uniform(-123, -70, n_cities) / resolution) * resolution
+    return [
+        {"name": name, "latitude": float(lat), "longitude": float(lon)}
+        for name, lat, lon in zip(city_names(n_cities), latitudes, longitudes)
+    ]
+
+
+def make_city_data(n_cities=9, years=1, seed=0):
+    """
+    Builds a synthetic frame shaped like the Visual Crossing bulk CSVs read by DataPipeline.get_city_data.
+
+    Args:
+        n_cities (int): Number of cities.
+        years (int): Number of years of data per city.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: One row per city and day, with 'datetime' as a string.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01")
+    days = pd.date_range(start, start + pd.DateOffset(years=years), freq="D", inclusive="left")
+    coords = pd.DataFrame(make_target_coords(n_cities, seed=seed))
+    n_rows = len(days) * n_cities
+
+    def measure(mean, std):
+        return np.round(rng.normal(mean, std, n_rows), 1)
+
+    temp = measure(15, 10)
+    data = pd.DataFrame({
+        "name": np.repeat(coords["name"].values, len(days)),
+        "address": np.repeat(coords["name"].values, len(days)),
+        "resolvedAddress": np.repeat(coords["name"].values + ", United States", len(days)),
+        "latitude": np.repeat(coords["latitude"].values, len(days)),
+        "longitude": np.repeat(coords["longitude"].values, len(days)),
+        "datetime": np.tile(days.strftime("%Y-%m-%d"), n_cities),
+        "tempmax": temp + 5,
+        "tempmin": temp - 5,
+        "temp": temp,
+        "feelslikemax": temp + 4,
+        "feelslikemin": temp - 6,
+        "feelslike": temp - 1,
+        "dew": measure(5, 5),
+        "humidity": np.clip(measure(60, 15), 0, 100),
+        "precip": np.abs(measure(2, 10)),
+        "precipprob": rng.integers(0, 101, n_rows),
+        "precipcover": np.clip(measure(10, 10), 0, 100),
+        "preciptype": None,
+        "snow": 0.0,
+        "snowdepth": 0.0,
+        "windgust": np.abs(measure(30, 10)),
+        "windspeed": np.abs(measure(20, 8)),
+        "windspeedmax": np.abs(measure(20, 8)),
+        "windspeedmean": np.abs(measure(12, 5)),
+        "windspeedmin": np.abs(measure(5, 3)),
+        "winddir": rng.uniform(0, 360, n_rows).round(1),
+        "sealevelpressure": measure(1015, 8),
+        "cloudcover": np.clip(measure(50, 25), 0, 100),
+        "visibility": np.clip(measure(15, 3), 0, 30),
+        "solarradiation": np.abs(measure(150, 80)),
+        "solarenergy": np.abs(measure(13, 7)),
+        "uvindex": rng.integers(0, 11, n_rows),
+        "severerisk": 10,
+        "sunrise": "07:00:00",
+        "sunset": "17:30:00",
+        "moonphase": rng.uniform(0, 1, n_rows).round(2),
+        "conditions": "Partially cloudy",
+        "description": "Partly cloudy throughout the day.",
+        "icon": "partly-cloudy-day",
+    })
+    return data
+
+
+def make_grib_dataset(target_coords, n_times=48, resolution=0.25, padding=1.0, seed=0):
+    """
+    Builds a small xarray Dataset shaped like an ERA5 GRIB file opened with cfgrib, covering all target_coords.
+
+    Args:
+        target_coords (list): Dictionaries with 'latitude' and 'longitude', e.g. from make_target_coords.
+        n_times (int): Number of hourly time steps.
+        resolution (float): Grid spacing in degrees.
+        padding (float): Degrees added around the bounding box of the cities.
+        seed (int): Random seed.
+
+    Returns:
+        xr.Dataset: Dataset with (time, latitude, longitude) variables u10, v10, t2m, sp, skt, z and lsm.
+    """
+    import xarray as xr
+
+    rng = np.random.default_rng(seed)
+    coords = pd.DataFrame(target_coords)
+    latitudes = np.arange(coords["latitude"].max() + padding, coords["latitude"].min() - padding - resolution / 2, -resolution)
+    longitudes = np.arange(coords["longitude"].min() - padding, coords["longitude"].max() + padding + resolution / 2, resolution)
+    times = pd.date_range("2020-01-01", periods=n_times, freq="h")
+    shape = (len(times), len(latitudes), len(longitudes))
+
+    def field(mean, std):
+        return (["time", "latitude", "longitude"], rng.normal(mean, std, shape).astype("float32"))
+
+    return xr.Dataset(
+        {
+            "u10": field(0, 3),
+            "v10": field(0, 3),
+            "t2m": field(288, 10),
+            "sp": field(100000, 1000),
+            "skt": field(288, 12),
+            "z": field(5000, 2000),
+            "lsm": field(0.8, 0.1),
+        },
+        coords={
+            "time": times,
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "number": 0,
+            "step": pd.Timedelta(0),
+            "surface": 0.0,
+            "valid_time": ("time", times),
+        },
+    )
@@ -1,35 +1,35 @@
-import cdsapi
+"""
+Downloads ERA5-Land GRIB files from the Copernicus Climate Data Store.
 
-dataset = "reanalysis-era5-land"
-request = {
-    "variable": [
-        "2m_temperature",
-        "skin_temperature",
-        "10m_u_component_of_wind",
-        "10m_v_component_of_wind",
-        "surface_pressure",
-        "total_precipitation"
-    ],
-    "year": "2024",
-    "month": "10",
-    "day": [
-        "01", "02", "03",
-        "04", "05", "06",
-        "07", "08", "09",
-        "10", "11", "12",
-        "13", "14", "15",
-        "16", "17", "18",
-        "19", "20", "21",
-        "22", "23", "24",
-        "25", "26", "27",
-        "28", "29", "30",
-        "31"
-    ],
-    "time": ["00:00", "12:00"],
-    "data_format": "grib",
-    "download_format": "unarchived",
-    "area": [39, -79, 38, -78]
-}
+Without options this makes the original single request: October 2024 over Charlottesville.
+With --start/--end, it downloads one file per month and target city, resuming from data/era5_manifest.json:
+    python data/getdata.py --start 2023-01 --end 2024-10 --workers 4
+"""
+import argparse
+import os
+import sys
 
-client = cdsapi.Client()
-client.retrieve(dataset, request).download()
+# The download manager lives next to datapipeline.py in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from era5download import DownloadManager, month_jobs  # noqa: E402
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--start", help="first month, e.g. 2023-01")
+parser.add_argument("--end", help="last month, inclusive; defaults to --start")
+parser.add_argument("--times", nargs="+", default=["00:00", "12:00"])
+parser.add_argument("--workers", type=int, default=4, help="requests running at once")
+parser.add_argument("--directory", default=os.path.dirname(os.path.abspath(__file__)))
+args = parser.parse_args()
+
+if args.start is None:
+    jobs = month_jobs("2024-10", "2024-10", {"charlottesville": [39, -79, 38, -78]}, times=args.times)
+    paths = DownloadManager(args.directory, max_workers=1).run(jobs)
+else:
+    from datapipeline import DataPipeline  # noqa: E402
+
+    dp = DataPipeline()
+    paths = dp.download_era5(args.start, args.end or args.start, directory=args.directory,
+                             times=tuple(args.times), max_workers=args.workers)
+
+print("\n".join(paths))
@@ -2,14 +2,36 @@ import numpy as np
 import pandas as pd
 import os
 import dotenv
-import requests
+import hashlib
 import json
+import io
+import time
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 # import psycopg
-from sqlalchemy import create_engine
-import plotly.express as px
-import xarray as xr
-import plotly.graph_objs as go
-import pymysql
+import shutil
+import tempfile
+from lazyimport import LazyModule
+from weatherstore import WeatherStore
+from figurecache import FigureCache, cached_figure
+from instrumentation import PipelineProfiler, profiled_stage
+from downsample import downsample, bucket_dates
+from weatherstats import linear_fits, seasonal_stats
+from pipelinegraph import PipelineGraph, atomic_write, file_digest, path_state
+from gribdecode import decode_parallel, slice_size_for
+from era5download import DownloadManager, city_regions, month_jobs
+from gribindex import GribIndexCache
+from retries import retry_with_backoff
+
+# Heavy dependencies, imported on first use so that importing the pipeline stays cheap
+requests = LazyModule('requests')
+sqlalchemy = LazyModule('sqlalchemy')
+pymysql = LazyModule('pymysql')
+xr = LazyModule('xarray')  # reads GRIB files through the cfgrib engine
+pa = LazyModule('pyarrow')
+px = LazyModule('plotly.express')
+go = LazyModule('plotly.graph_objs')
 
 dotenv.load_dotenv()
 
@@ -32,12 +54,99 @@ class DataPipeline:
             {"name": "charlottesville", "latitude": 38.00, "longitude": -78.50},
             {"name": "boston", "latitude": 42.50, "longitude": -71.00}
         ]
+        self.city_data_urls = [
+            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=f0995135769f9d08b3f696817b0c41e2&zip=false',  # URL 4
+            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=0f28c2478c80e2039b41b261d888984a&zip=false',  # URL 3
+            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=59258debcdd5b0403d2b24bdc5eb37cf&zip=false',  # URL 2
+            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=e2280b4cde99ad754f6ffab62180e01a&zip=false'   # URL 1
+        ]
+        # Paths to the locally downloaded GRIB files
+        self.grib_file_paths = [
+            "data/6d689956151f055eb4faef10a270a18f.grib",
+            "data/522c7966bf7121a0ef80a12ec223d5af.grib"
+        ]
+        # cfgrib indexes and catalogues of the GRIB files, keyed by file contents
+        self.grib_index = GribIndexCache('.grib_index')
+        # LRU cache shared by the plot and analysis methods
+        self.figure_cache = FigureCache(maxsize=128)
+        # Precomputed aggregate tables read by the analysis methods when they match the analysed table
+        self.rollups = {}
+        self.rollup_sources = {}  # source table name -> signature of the data the rollups were built from
+        self.rollup_source_checks = {}  # (source table, data token) -> whether the data matches; see rollup
+        # Source table of each rollup, and the columns of a source table that its rollups are computed from
+        self.rollup_tables = {
+            'seasonalrollup': 'dailydata',
+            'cityrollup': 'dailydata',
+            'extremerollup': 'dailydata',
+            'hourlyrollup': 'hourlydata'
+        }
+        self.rollup_source_columns = {
+            'dailydata': ['name', 'date', 'temp', 'precip', 'humidity', 'windspeedmean', 'tempmax', 'tempmin'],
+            'hourlydata': ['name', 'date', 'hour', 't2m']
+        }
+        # Pooled HTTP session and caches for the current-weather requests
+        self.weatherstack_url = "https://api.weatherstack.com/current"
+        self.useragent_url = 'https://httpbin.org/user-agent'
+        self._session = None  # created on first use; see session
+        self.useragent = None
+        self.current_weather_ttl = 600  # seconds
+        self.current_weather_cache = {}
+        # Latest batch of current weather for all target cities, kept warm by the refresher
+        self.current_weather_snapshot = None
+        self.current_weather_snapshot_time = None  # time.time() of the snapshot's fetch
+        self.current_weather_snapshot_max_age = 2 * 3600  # seconds; older snapshots are not served
+        self.current_weather_shared_path = None  # snapshot file shared by several processes
+        self.refresher_stop = None
+        # Stage-level timing; disabled until enable_profiling is called
+        self.profiler = PipelineProfiler(enabled=False)
+        # Point budgets for the long-range figures; see set_plot_options
+        self.max_points = 2000  # points per line trace
+        self.downsample_method = 'lttb'
+        self.max_heatmap_rows = 400  # date rows of the wind heatmap
+        self.use_webgl = False
         
+    def enable_profiling(self, track_memory=True, profile_stages=(), profile_dir='profiles'):
+        """
+        Starts recording wall time, CPU time, rows and peak memory for each pipeline stage.
+
+        Args:
+            track_memory (bool): Whether to measure peak memory with tracemalloc.
+            profile_stages (list): Stage names to run under cProfile, or ['*'] for every stage.
+            profile_dir (str): Directory for the cProfile .prof files.
+
+        Returns:
+            PipelineProfiler: The profiler collecting this run's records.
+        """
+        self.profiler = PipelineProfiler(track_memory=track_memory, profile_stages=profile_stages,
+                                         profile_dir=profile_dir)
+        return self.profiler
+
+    @property
+    def session(self):
+        """
+        Pooled HTTP session for the current-weather requests, created on first use.
+        """
+        if self._session is None:
+            session = requests.Session()
+            session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            self._session = session
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
     def get_useragent(self):
-        url = 'https://httpbin.org/user-agent'
-        r = requests.get(url)
-        useragent = json.loads(r.text)['user-agent']
-        return useragent
+        # Resolve the user agent once and reuse it for every later request
+        if self.useragent is None:
+            try:
+                r = self.session.get(self.useragent_url, timeout=10)
+                self.useragent = json.loads(r.text)['user-agent']
+            except Exception as e:
+                print(f"Error looking up user agent: {e}")
+                self.useragent = requests.utils.default_user_agent()
+        return self.useragent
     
     def make_headers(self,  
                      email='fvq3xv@virginia.edu'):
@@ -48,17 +157,28 @@ class DataPipeline:
             }
             return headers
 
-    def get_current_weather(self, city_name):
+    def get_current_weather(self, city_name, max_age=None, timeout=10):
         """
         Fetches current weather data for a given city name and returns selected columns.
+        Results are cached per city and reused until they are older than max_age seconds.
 
         Args:
             city_name (str): Name of the city for which to fetch the current weather.
+            max_age (float): Maximum age of a cached result in seconds. Defaults to self.current_weather_ttl.
+            timeout (float): Request timeout in seconds.
 
         Returns:
             pd.DataFrame: A DataFrame containing selected current weather data for the specified city.
         """
-        url = "https://api.weatherstack.com/current"
+        if max_age is None:
+            max_age = self.current_weather_ttl
+
+        # Serve repeated requests for the same city from the cache
+        cached = self.current_weather_cache.get(city_name)
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1].copy()
+
+        url = self.weatherstack_url
 
         # Handle specific cases for city names
         query_city = city_name
@@ -75,8 +195,12 @@ class DataPipeline:
         }
         headers = self.make_headers()  # Assuming self.make_headers() is implemented
 
-        # Sending the GET request
-        response = requests.get(url, params=querystring, headers=headers)
+        # Sending the GET request over the pooled session
+        try:
+            response = self.session.get(url, params=querystring, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Request failed for {query_city}: {e}")
+            return None
 
         if response.status_code == 200:
             data = response.json()
@@ -97,7 +221,9 @@ class DataPipeline:
                 }
 
                 # Convert the dictionary into a DataFrame
-                return pd.DataFrame([selected_data])
+                current_weather = pd.DataFrame([selected_data])
+                self.current_weather_cache[city_name] = (time.monotonic(), current_weather)
+                return current_weather.copy()
 
             else:
                 print(f"Error in API response for {query_city}: {data['error']}")
@@ -106,287 +232,1791 @@ class DataPipeline:
             print(f"HTTP Error for {query_city}: {response.status_code} - {response.reason}")
             return None
     
+    def get_current_weather_batch(self, cities=None, max_workers=4, max_age=None, timeout=10):
+        """
+        Fetches current weather for several cities concurrently and combines it into one DataFrame.
+
+        Args:
+            cities (list): City names. Defaults to the cities in self.target_coords.
+            max_workers (int): Maximum number of requests in flight at once.
+            max_age (float): Maximum age of a cached result in seconds. Defaults to self.current_weather_ttl.
+            timeout (float): Per-request timeout in seconds.
+
+        Returns:
+            pd.DataFrame: One row per city that succeeded, with a 'name' column.
+                The cities that failed are listed in the DataFrame's attrs['failed'].
+        """
+        if cities is None:
+            cities = [city['name'] for city in self.target_coords]
+
+        def fetch(city_name):
+            try:
+                return self.get_current_weather(city_name, max_age=max_age, timeout=timeout)
+            except Exception as e:
+                print(f"Error fetching current weather for {city_name}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch, cities))
+
+        frames = [result.assign(name=city_name) for city_name, result in zip(cities, results) if result is not None]
+        failed = [city_name for city_name, result in zip(cities, results) if result is None]
+        if failed:
+            print(f"Current weather unavailable for: {', '.join(failed)}")
+
+        batch = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['name'])
+        batch = batch[['name'] + [col for col in batch.columns if col != 'name']]
+        batch.attrs['failed'] = failed
+        return batch
+
+    def start_current_weather_refresher(self, interval=3600, cities=None, shared_path=None):
+        """
+        Starts a background thread that refreshes the current weather of all cities every interval seconds.
+        Each refresh makes one Weatherstack request per city, so keep the interval long enough for the plan's
+        monthly quota: 9 cities every hour is about 6,500 requests a month.
+
+        With shared_path, several processes (e.g. gunicorn workers) share one refresher: only the process
+        holding the lock file next to shared_path makes requests and writes the snapshot there, and the
+        others read it. If that process exits, another takes over at its next tick.
+
+        Args:
+            interval (float): Seconds between refreshes.
+            cities (list): City names. Defaults to the cities in self.target_coords.
+            shared_path (str): Parquet file the snapshot is shared through, or None to keep it in this process.
+        """
+        if self.refresher_stop is not None:
+            return
+        self.refresher_stop = threading.Event()
+        stop = self.refresher_stop
+        # One missed refresh is tolerated before the snapshot counts as stale
+        self.current_weather_snapshot_max_age = 2 * interval
+        self.current_weather_shared_path = shared_path
+        lock = {'file': None}
+
+        def is_leader():
+            if shared_path is None:
+                return True
+            if lock['file'] is None:
+                import fcntl
+                lock_file = open(shared_path + '.lock', 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+                # Held until the process exits
+                lock['file'] = lock_file
+            return True
+
+        def refresh():
+            while not stop.is_set():
+                try:
+                    if is_leader():
+                        snapshot = self.get_current_weather_batch(cities, max_age=0)
+                        if not snapshot.empty:
+                            self.set_current_weather_snapshot(snapshot)
+                except Exception as e:
+                    print(f"Current weather refresh failed: {e}")
+                stop.wait(interval)
+
+        threading.Thread(target=refresh, name='current-weather-refresher', daemon=True).start()
+
+    def stop_current_weather_refresher(self):
+        if self.refresher_stop is not None:
+            self.refresher_stop.set()
+            self.refresher_stop = None
+
+    def set_current_weather_snapshot(self, snapshot, fetched_at=None):
+        """
+        Stores a refreshed snapshot in memory and, when the refresher is shared, in the shared file.
+
+        Args:
+            snapshot (pd.DataFrame): Batch from get_current_weather_batch.
+            fetched_at (float): time.time() of the fetch. Defaults to now.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        self.current_weather_snapshot = snapshot
+        self.current_weather_snapshot_time = fetched_at
+        if self.current_weather_shared_path is not None:
+            with atomic_write(self.current_weather_shared_path, mode=None) as tmp_path:
+                snapshot.to_parquet(tmp_path, index=False)
+            os.utime(self.current_weather_shared_path, (fetched_at, fetched_at))
+
+    def latest_snapshot(self):
+        """
+        Returns the current weather snapshot if it is recent enough to serve.
+
+        Returns:
+            pd.DataFrame: The snapshot, or None if there is none or it is older than current_weather_snapshot_max_age.
+        """
+        path = self.current_weather_shared_path
+        if path is not None and os.path.exists(path):
+            # Another process may have refreshed the shared file since it was last read
+            modified = os.path.getmtime(path)
+            if self.current_weather_snapshot_time is None or modified > self.current_weather_snapshot_time:
+                try:
+                    self.current_weather_snapshot = pd.read_parquet(path)
+                    self.current_weather_snapshot_time = modified
+                except Exception as e:
+                    print(f"Error reading the current weather snapshot: {e}")
+
+        if self.current_weather_snapshot is None or self.current_weather_snapshot_time is None:
+            return None
+        if time.time() - self.current_weather_snapshot_time > self.current_weather_snapshot_max_age:
+            return None
+        return self.current_weather_snapshot
+
+    def get_latest_weather(self, city_name):
+        """
+        Returns a city's current weather from the snapshot, fetching it only if the snapshot lacks the city or is stale.
+
+        Args:
+            city_name (str): Name of the city.
+
+        Returns:
+            pd.DataFrame: Current weather in the same format as get_current_weather, or None.
+        """
+        snapshot = self.latest_snapshot()
+        if snapshot is not None:
+            row = snapshot[snapshot['name'] == city_name]
+            if not row.empty:
+                return row.drop(columns=['name']).reset_index(drop=True)
+        return self.get_current_weather(city_name)
+    
     def get_dayly_weather(self):
         file_path = "data/charlottesville 2023-03-01 to 2024-11-01.csv"
         data = pd.read_csv(file_path)
         return data
     
-    def get_city_data(self):
-        urls = [
-            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=f0995135769f9d08b3f696817b0c41e2&zip=false',  # URL 4
-            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=0f28c2478c80e2039b41b261d888984a&zip=false',  # URL 3
-            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=59258debcdd5b0403d2b24bdc5eb37cf&zip=false',  # URL 2
-            'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/retrievebulkdataset?&key=KUCGGQQ58KYENK3BTD9GMXND7&taskId=e2280b4cde99ad754f6ffab62180e01a&zip=false'   # URL 1
-        ]
+    def fetch_csv(self, url, session=None, retries=3, backoff=1.0, timeout=60):
+        """
+        Downloads a single CSV with retries and exponential backoff.
 
-        # Initialize an empty DataFrame to store combined data
-        combined_data = pd.DataFrame()
+        Args:
+            url (str): URL of the CSV to download.
+            session (requests.Session): Optional session to reuse pooled connections.
+            retries (int): Number of attempts before giving up.
+            backoff (float): Base delay in seconds, doubled after each failed attempt.
+            timeout (float): Per-request timeout in seconds.
+
+        Returns:
+            pd.DataFrame: The parsed CSV, or None if every attempt failed.
+        """
+        http = session if session is not None else requests
+
+        def read():
+            response = http.get(url, timeout=timeout)
+            response.raise_for_status()
+            return pd.read_csv(io.StringIO(response.text))
+
+        return retry_with_backoff(read, retries, backoff, f"reading data from {url}")
+
+    @profiled_stage
+    def get_city_data(self, urls=None, concurrent=True, max_workers=4, retries=3, backoff=1.0, timeout=60,
+                      strict=False):
+        """
+        Downloads the Visual Crossing bulk datasets and combines them into one DataFrame.
+
+        Args:
+            urls (list): CSV URLs to read. Defaults to self.city_data_urls.
+            concurrent (bool): Whether to download all URLs in parallel with a thread pool.
+            max_workers (int): Maximum number of parallel downloads.
+            retries (int): Number of attempts per URL.
+            backoff (float): Base retry delay in seconds.
+            timeout (float): Per-URL request timeout in seconds.
+            strict (bool): Whether to raise when a URL still fails after its retries instead of leaving it out.
+
+        Returns:
+            pd.DataFrame: Combined city data, excluding New York.
+        """
+        if urls is None:
+            urls = self.city_data_urls
+
+        # Share one pooled session across all downloads
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            def fetch(url):
+                return self.fetch_csv(url, session=session, retries=retries, backoff=backoff, timeout=timeout)
+
+            if concurrent and len(urls) > 1:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+                    frames = list(executor.map(fetch, urls))  # map keeps the URL order
+            else:
+                frames = [fetch(url) for url in urls]
+
+        failed = [url for url, frame in zip(urls, frames) if frame is None]
+        if strict and failed:
+            raise RuntimeError(f"{len(failed)} of {len(urls)} city data downloads failed: {failed}")
+
+        # Concatenate once instead of growing the DataFrame inside the loop
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return pd.DataFrame(columns=['name'])
+        combined_data = pd.concat(frames, ignore_index=True)
 
-        # Read and append data from each URL
-        for url in urls:
-            try:
-                print(f"Reading data from {url}...")
-                data = pd.read_csv(url)
-                combined_data = pd.concat([combined_data, data], ignore_index=True)
-            except Exception as e:
-                print(f"Error reading data from {url}: {e}")
-                continue
-            
         combined_data = combined_data[combined_data['name'].str.lower() != "newyork"]
 
         return combined_data
 
-    def get_city_info(self):
-        data = self.get_city_data()
+    def get_city_info(self, city_data=None):
+        # Reuse already downloaded city data when given instead of downloading it again
+        data = self.get_city_data() if city_data is None else city_data
         # Select relevant columns
         columns_to_select = ['name', 'address', 'resolvedAddress', 'latitude', 'longitude']
         # Filter for unique 'name' values
         unique_data = data[columns_to_select].drop_duplicates(subset='name').reset_index(drop=True)
         return(unique_data)
 
-    def get_grib_data(self):
+    def download_era5(self, start, end, directory='data', variables=None, times=('00:00', '12:00'),
+                      padding=0.5, max_workers=4, client_factory=None):
         """
-        Reads two local GRIB files and combines their contents into a single pandas DataFrame.
+        Downloads ERA5-Land GRIB files around the target cities, one request per month and city,
+        and makes them the files get_grib_data and get_grib_city_data read by default.
+        Files already downloaded for the same request are skipped, so an interrupted run can simply be repeated.
+
+        Args:
+            start (str): First month, e.g. '2023-01'.
+            end (str): Last month, inclusive.
+            directory (str): Directory of the GRIB files and the download manifest.
+            variables (list): CDS variable names. Defaults to era5download.ERA5_VARIABLES.
+            times (tuple): Hours of each day to download.
+            padding (float): Degrees around each city in its download box.
+            max_workers (int): Maximum number of requests running at once.
+            client_factory (callable): Returns a cdsapi.Client-like object. Defaults to cdsapi.Client.
 
         Returns:
-            pd.DataFrame: Combined data from the two GRIB files as a DataFrame.
+            list: Paths of the downloaded GRIB files, ordered by month and city.
         """
-        # Paths to the locally downloaded GRIB files
-        grib_file_paths = [
-            "data/6d689956151f055eb4faef10a270a18f.grib",
-            "data/522c7966bf7121a0ef80a12ec223d5af.grib"
-        ]
+        jobs = month_jobs(start, end, city_regions(self.target_coords, padding), variables, times)
+        manager = DownloadManager(directory, max_workers=max_workers, client_factory=client_factory)
+        self.grib_file_paths = manager.run(jobs)
+        return self.grib_file_paths
+
+    def nearest_grid_index(self, grid_values, targets, tolerance=None):
+        """
+        Finds the index of the nearest grid cell for each target coordinate.
+
+        Args:
+            grid_values (np.ndarray): 1-D latitude or longitude values of the grid.
+            targets (np.ndarray): Coordinates to look up.
+            tolerance (float): Maximum allowed distance. Defaults to half the grid spacing.
+
+        Returns:
+            np.ndarray: Nearest indices, with -1 for targets outside the tolerance.
+        """
+        grid_values = np.asarray(grid_values, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        if tolerance is None:
+            spacing = np.abs(np.diff(grid_values)).min() if len(grid_values) > 1 else 0.0
+            tolerance = spacing / 2 + 1e-6
+
+        distances = np.abs(grid_values[None, :] - targets[:, None])
+        indices = distances.argmin(axis=1)
+        indices[distances[np.arange(len(targets)), indices] > tolerance] = -1
+        return indices
+
+    def select_target_points(self, ds, tolerance=None):
+        """
+        Selects the grid cells nearest to self.target_coords from a GRIB dataset before any flattening.
+
+        Args:
+            ds (xr.Dataset): Dataset with 'latitude' and 'longitude' dimensions.
+            tolerance (float): Maximum distance between a city and its grid cell. Defaults to half the grid spacing.
 
-        combined_df = pd.DataFrame()  # Initialize an empty DataFrame to store combined data
+        Returns:
+            xr.Dataset: Dataset indexed by a 'name' dimension instead of latitude/longitude, or None if no city lies on the grid.
+        """
+        target_df = pd.DataFrame(self.target_coords)
+        lat_idx = self.nearest_grid_index(ds['latitude'].values, target_df['latitude'].values, tolerance)
+        lon_idx = self.nearest_grid_index(ds['longitude'].values, target_df['longitude'].values, tolerance)
+
+        # Keep only the cities covered by this grid
+        keep = (lat_idx >= 0) & (lon_idx >= 0)
+        if not keep.any():
+            return None
+        names = target_df['name'].values[keep]
+
+        # Vectorized point selection: one (latitude, longitude) pair per city
+        points = ds.isel(
+            latitude=xr.DataArray(lat_idx[keep], dims='name', coords={'name': names}),
+            longitude=xr.DataArray(lon_idx[keep], dims='name', coords={'name': names})
+        )
+        return points
+
+    def iter_grib_data(self, grib_file_paths=None, chunk_size=24, points_only=False, tolerance=None, since=None,
+                       strict=False):
+        """
+        Streams GRIB files as a sequence of bounded-size DataFrames, one block of time steps at a time.
+
+        Args:
+            grib_file_paths (list): GRIB files to read. Defaults to self.grib_file_paths.
+            chunk_size (int): Number of time steps converted to a DataFrame at once.
+            points_only (bool): Whether to keep only the grid cells nearest to self.target_coords.
+            tolerance (float): Maximum city-to-cell distance used when points_only is True.
+            since (str or pd.Timestamp): Only yield time steps after this timestamp.
+            strict (bool): Whether to raise when a file cannot be read instead of skipping it.
+
+        Yields:
+            pd.DataFrame: Flattened GRIB data for one chunk of time steps.
+        """
+        if grib_file_paths is None:
+            grib_file_paths = self.grib_file_paths
 
         for grib_file_path in grib_file_paths:
             try:
                 print(f"Reading GRIB data from file: {grib_file_path}")
 
-                # Read the GRIB file into an xarray Dataset
-                ds = xr.open_dataset(grib_file_path, engine="cfgrib")
+                # Open lazily through the cached index so only the selected time steps are decoded
+                with self.grib_index.open_dataset(grib_file_path) as ds:
+                    if points_only:
+                        ds = self.select_target_points(ds, tolerance=tolerance)
+                        if ds is None:
+                            print(f"No target cities found in {grib_file_path}.")
+                            continue
+
+                    if since is not None and "time" in ds.dims:
+                        # Skip time steps that are already stored
+                        ds = ds.isel(time=np.flatnonzero(ds["time"].values > np.datetime64(pd.Timestamp(since))))
+
+                    if "time" not in ds.dims:
+                        chunks = [ds]
+                    else:
+                        chunks = (ds.isel(time=slice(start, start + chunk_size))
+                                  for start in range(0, ds.sizes["time"], chunk_size))
+
+                    for chunk in chunks:
+                        # Decode each variable once before flattening
+                        df = chunk.load().to_dataframe().reset_index()
+                        if points_only:
+                            df = df.drop(columns=["latitude", "longitude"], errors="ignore")
+                        yield df
+
+                print(f"Data from {grib_file_path} streamed successfully.")
 
-                # Convert the xarray Dataset to a pandas DataFrame
-                print(f"Converting GRIB data from {grib_file_path} to DataFrame...")
-                df = ds.to_dataframe().reset_index()
+            except Exception as e:
+                print(f"Error processing GRIB file {grib_file_path}: {e}")
+                if strict:
+                    raise
 
-                # Append the DataFrame to the combined DataFrame
-                combined_df = pd.concat([combined_df, df], ignore_index=True)
-                print(f"Data from {grib_file_path} added successfully.")
+    def decode_grib_slice(self, grib_file_path, times=None, variables=None, points_only=False, tolerance=None):
+        """
+        Decodes part of one GRIB file into a DataFrame.
 
+        Args:
+            grib_file_path (str): GRIB file to read.
+            times (list): Positions of the time steps to decode. Defaults to all time steps.
+            variables (list): Data variables to decode. Defaults to all variables.
+            points_only (bool): Whether to keep only the grid cells nearest to self.target_coords.
+            tolerance (float): Maximum city-to-cell distance used when points_only is True.
+
+        Returns:
+            pd.DataFrame: Flattened GRIB data of the selected time steps and variables.
+        """
+        # Only the messages of the requested variables are opened
+        with self.grib_index.open_dataset(grib_file_path, variables) as ds:
+            if points_only:
+                ds = self.select_target_points(ds, tolerance=tolerance)
+                if ds is None:
+                    return pd.DataFrame(columns=["name"])
+            if times is not None:
+                ds = ds.isel(time=list(times))
+
+            df = ds.load().to_dataframe().reset_index()
+        if points_only:
+            df = df.drop(columns=["latitude", "longitude"], errors="ignore")
+        return df
+
+    def plan_grib_slices(self, grib_file_paths=None, processes=2, slice_size=None, split_variables=False,
+                         points_only=False, tolerance=None, since=None, strict=False):
+        """
+        Splits GRIB files into independent decoding tasks by time step and, optionally, by variable.
+        Files are planned from their cached catalogue; a file seen for the first time is indexed here
+        once, before the workers open it.
+
+        Args:
+            grib_file_paths (list): GRIB files to read. Defaults to self.grib_file_paths.
+            processes (int): Number of worker processes the tasks are sized for.
+            slice_size (int): Time steps per task. Defaults to about two tasks per process.
+            split_variables (bool): Whether to decode each variable of a slice as a separate task.
+            points_only (bool): Whether the tasks keep only the grid cells nearest to self.target_coords.
+            tolerance (float): Maximum city-to-cell distance used when points_only is True.
+            since (str or pd.Timestamp): Only plan time steps after this timestamp.
+            strict (bool): Whether to raise when a file cannot be read instead of skipping it.
+
+        Returns:
+            list: Task dicts with a 'slice' id and the arguments of decode_grib_slice, in file and time order.
+        """
+        if grib_file_paths is None:
+            grib_file_paths = self.grib_file_paths
+
+        # Time steps and variables of each file, read from its catalogue without opening it
+        target_df = pd.DataFrame(self.target_coords)
+        files = []
+        for grib_file_path in grib_file_paths:
+            try:
+                catalogue = self.grib_index.catalogue(grib_file_path)
             except Exception as e:
                 print(f"Error processing GRIB file {grib_file_path}: {e}")
+                if strict:
+                    raise
+                continue
+
+            if points_only and catalogue["latitude"] is not None:
+                # Skip files whose grid covers none of the target cities
+                lat_idx = self.nearest_grid_index(catalogue["latitude"], target_df["latitude"].values, tolerance)
+                lon_idx = self.nearest_grid_index(catalogue["longitude"], target_df["longitude"].values, tolerance)
+                if not ((lat_idx >= 0) & (lon_idx >= 0)).any():
+                    print(f"No target cities found in {grib_file_path}.")
+                    continue
+
+            variables = list(catalogue["variables"])
+            if catalogue["time"] is None:
+                times = None
+            elif since is not None:
+                times = np.flatnonzero(pd.DatetimeIndex(catalogue["time"]) > pd.Timestamp(since))
+            else:
+                times = np.arange(len(catalogue["time"]))
+            files.append((grib_file_path, times, variables))
+
+        if slice_size is None:
+            time_steps = sum(1 if times is None else len(times) for _, times, _ in files)
+            slice_size = slice_size_for(time_steps, processes)
+
+        tasks = []
+        slice_id = 0
+        for grib_file_path, times, variables in files:
+            if times is None:
+                slices = [None]
+            else:
+                slices = [times[start:start + slice_size].tolist() for start in range(0, len(times), slice_size)]
+            groups = [[variable] for variable in variables] if split_variables else [None]
+            for time_slice in slices:
+                for group in groups:
+                    tasks.append({'slice': slice_id, 'grib_file_path': grib_file_path, 'times': time_slice,
+                                  'variables': group, 'points_only': points_only, 'tolerance': tolerance})
+                slice_id += 1
+        return tasks
+
+    def grib_decoder_state(self):
+        """
+        Attributes decode_grib_slice needs, passed to the worker processes of decode_grib_parallel.
+
+        Returns:
+            dict: Attribute name to value; every value must be picklable.
+        """
+        return {'target_coords': self.target_coords, 'grib_index': self.grib_index}
+
+    def decode_grib_parallel(self, grib_file_paths=None, processes=None, slice_size=None, split_variables=False,
+                             points_only=False, tolerance=None, since=None, strict=False, start_method='spawn'):
+        """
+        Decodes GRIB files on a process pool, one task per time slice (and variable), and returns the slices in order.
+
+        Args:
+            grib_file_paths (list): GRIB files to read. Defaults to self.grib_file_paths.
+            processes (int): Number of worker processes. Defaults to the number of CPUs.
+            slice_size (int): Time steps per task. Defaults to about two tasks per process.
+            split_variables (bool): Whether to decode each variable of a slice as a separate task.
+            points_only (bool): Whether to keep only the grid cells nearest to self.target_coords.
+            tolerance (float): Maximum city-to-cell distance used when points_only is True.
+            since (str or pd.Timestamp): Only read time steps after this timestamp.
+            strict (bool): Whether to raise when a file cannot be read instead of skipping it.
+            start_method (str): multiprocessing start method. 'spawn' avoids forking a process whose other
+                threads (stage graph, downloads) may hold locks.
+
+        Returns:
+            list: One DataFrame per time slice, in file and time order.
+        """
+        processes = processes or os.cpu_count() or 1
+        tasks = self.plan_grib_slices(grib_file_paths, processes, slice_size, split_variables,
+                                      points_only, tolerance, since, strict)
+        if not tasks:
+            return []
+        print(f"Decoding {len({task['slice'] for task in tasks})} GRIB slices in {len(tasks)} tasks on {processes} processes")
+        return decode_parallel(self, tasks, processes, start_method)
+
+    @profiled_stage
+    def get_grib_data(self, grib_file_paths=None, chunk_size=24, processes=None, slice_size=None, split_variables=False,
+                      start_method='spawn'):
+        """
+        Reads the local GRIB files and combines their contents into a single pandas DataFrame.
+
+        Args:
+            grib_file_paths (list): GRIB files to read. Defaults to self.grib_file_paths.
+            chunk_size (int): Number of time steps converted to a DataFrame at once.
+            processes (int): Number of processes decoding in parallel; None decodes serially in this process.
+            slice_size (int): Time steps per parallel task. Defaults to about two tasks per process.
+            split_variables (bool): Whether parallel tasks also split each time slice by variable.
+            start_method (str): multiprocessing start method of the worker processes.
+
+        Returns:
+            pd.DataFrame: Combined data from the GRIB files as a DataFrame.
+        """
+        if processes:
+            chunks = self.decode_grib_parallel(grib_file_paths, processes, slice_size, split_variables,
+                                               start_method=start_method)
+        else:
+            chunks = list(self.iter_grib_data(grib_file_paths, chunk_size=chunk_size))
+        combined_df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+        print("All GRIB files processed successfully.")
+        return combined_df
+        
+    @profiled_stage
+    def get_zip_data(self, grib_data):
+        """
+        Filters grib_data to include only rows where (latitude, longitude) match predefined locations (rounded to one decimal place).
+        Adds a 'name' column corresponding to the location name and removes 'latitude' and 'longitude' columns.
+
+        Args:
+            grib_data (pd.DataFrame): The DataFrame containing data extracted from the GRIB file.
+
+        Returns:
+            pd.DataFrame: Filtered DataFrame with location names and no latitude/longitude columns.
+        """
+        # Ensure grib_data is a DataFrame
+        if not isinstance(grib_data, pd.DataFrame):
+            raise ValueError("grib_data must be a pandas DataFrame.")
+
+        # Build a DataFrame for the target coordinates
+        target_df = pd.DataFrame(self.target_coords)
+
+        # Merge grib_data with target_df on latitude and longitude
+        filtered_data = grib_data.merge(
+            target_df,
+            how="inner",
+            on=["latitude", "longitude"]
+        )
+
+        # Remove latitude and longitude columns
+        filtered_data = filtered_data.drop(columns=["latitude", "longitude"])
+
+        # Reset the index of the filtered DataFrame
+        filtered_data = filtered_data.reset_index(drop=True)
+
+        return filtered_data
+
+    @profiled_stage
+    def get_grib_city_data(self, grib_file_paths=None, chunk_size=24, tolerance=None, since=None,
+                           processes=None, slice_size=None, split_variables=False, strict=False, start_method='spawn'):
+        """
+        Extracts the target cities directly from the GRIB grids, matching each city to its nearest grid cell.
+        Produces the same kind of table as get_zip_data(get_grib_data()) without flattening the full grid.
+
+        Args:
+            grib_file_paths (list): GRIB files to read. Defaults to self.grib_file_paths.
+            chunk_size (int): Number of time steps converted to a DataFrame at once.
+            tolerance (float): Maximum city-to-cell distance. Defaults to half the grid spacing.
+            since (str or pd.Timestamp): Only read time steps after this timestamp.
+            processes (int): Number of processes decoding in parallel; None decodes serially in this process.
+            slice_size (int): Time steps per parallel task. Defaults to about two tasks per process.
+            split_variables (bool): Whether parallel tasks also split each time slice by variable.
+            strict (bool): Whether to raise when a file cannot be read or no target city is found,
+                instead of returning what could be read.
+            start_method (str): multiprocessing start method of the worker processes.
+
+        Returns:
+            pd.DataFrame: GRIB data for the target cities with a 'name' column and no latitude/longitude columns.
+        """
+        if processes:
+            chunks = self.decode_grib_parallel(grib_file_paths, processes, slice_size, split_variables,
+                                               points_only=True, tolerance=tolerance, since=since, strict=strict,
+                                               start_method=start_method)
+        else:
+            chunks = list(self.iter_grib_data(grib_file_paths, chunk_size=chunk_size,
+                                              points_only=True, tolerance=tolerance, since=since, strict=strict))
+        if not chunks:
+            if strict:
+                raise RuntimeError("No target city data was found in the GRIB files.")
+            return pd.DataFrame(columns=["name"])
+
+        zip_data = pd.concat(chunks, ignore_index=True)
+
+        # Match the column order of get_zip_data, with 'name' last
+        zip_data = zip_data[[col for col in zip_data.columns if col != "name"] + ["name"]]
+        return zip_data
+    
+    @profiled_stage
+    def make_constants_tabel(self, zip_data, city_info=None):
+        """
+        Extracts 'z' and 'lsm' values for 9 cities from zip_data and merges them with city_info.
+
+        Args:
+            zip_data (pd.DataFrame): DataFrame containing weather data, including 'z' and 'lsm' columns.
+            city_info (pd.DataFrame): Result of get_city_info. Downloaded when not given.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing city information enriched with 'z' and 'lsm' values.
+        """
+        # Get city information DataFrame
+        if city_info is None:
+            city_info = self.get_city_info()  # Assuming this returns a DataFrame with city names and other information
+
+        # Extract the first occurrence of 'z' and 'lsm' for each city
+        constants = (
+            zip_data.groupby("name")[["z", "lsm"]]
+            .first()  # Take the first occurrence of 'z' and 'lsm' for each city
+            .reset_index()  # Reset index to make 'name' a column
+        )
+
+        # Merge 'constants' DataFrame with 'city_info' based on 'name'
+        enriched_city_info = pd.merge(city_info, constants, on="name", how="left")
+
+        return enriched_city_info
+    
+    def compact_dtypes(self, data):
+        """
+        Shrinks a weather table in place of its default dtypes: 'name' becomes categorical and float64 measures become float32.
+
+        Args:
+            data (pd.DataFrame): DataFrame with a 'name' column and numeric measures.
+
+        Returns:
+            pd.DataFrame: DataFrame with compact dtypes.
+        """
+        data = data.copy()
+        if "name" in data.columns:
+            data["name"] = data["name"].astype("category")
+        float_columns = data.select_dtypes(include="float64").columns
+        data[float_columns] = data[float_columns].astype("float32")
+        return data
+
+    @profiled_stage
+    def hourly_data(self, zip_data, compact=False):
+        """
+        Processes zip_data by removing specified columns, sorting, and deriving date and hour columns from the timestamp.
+        The timestamp is the GRIB 'valid_time' when present, since for files with several forecast steps the
+        reference 'time' repeats. Rows without any measurement (e.g. an accumulation's first step) are dropped.
+
+        Args:
+            zip_data (pd.DataFrame): DataFrame containing weather data with various columns.
+            compact (bool): Whether to store 'name' as categorical and measures as float32.
+
+        Returns:
+            pd.DataFrame: Processed DataFrame with 'datetime' and 'date' as datetime64 columns and 'hour' as an integer.
+
+        Raises:
+            ValueError: If two rows have the same city and timestamp.
+        """
+        # The time each value is valid for: reference time plus forecast step
+        processed_data = zip_data.copy()
+        if "valid_time" in processed_data.columns and processed_data["valid_time"].notna().all():
+            processed_data["time"] = processed_data["valid_time"]
+
+        # Drop unnecessary columns
+        columns_to_drop = ["number", "step", "valid_time", "z", "lsm"]
+        processed_data = processed_data.drop(columns=columns_to_drop, errors="ignore")
+
+        # Drop rows where every measurement is missing
+        measures = [col for col in processed_data.columns if col not in ("name", "time", "surface")]
+        if measures:
+            processed_data = processed_data.dropna(subset=measures, how="all")
+
+        duplicated = processed_data.duplicated(subset=["name", "time"], keep=False)
+        if duplicated.any():
+            examples = (processed_data.loc[duplicated, ["name", "time"]].drop_duplicates().head(5)
+                        .rename(columns={"time": "datetime"}))
+            raise ValueError(f"{int(duplicated.sum())} hourly rows share a (name, datetime) key, e.g. "
+                             f"{examples.to_dict('records')}")
+
+        # Sort the data by 'name' and 'time'
+        processed_data = processed_data.sort_values(by=["name", "time"]).reset_index(drop=True)
+
+        # Derive typed date and hour fields from the timestamp
+        timestamps = pd.to_datetime(processed_data.pop("time"))
+        processed_data["datetime"] = timestamps
+        processed_data["date"] = timestamps.dt.normalize()
+        processed_data["hour"] = timestamps.dt.hour.astype("int8")
+
+        # Convert 't2m' and 'skt' from Kelvin to Celsius
+        if "t2m" in processed_data.columns:
+            processed_data["t2m"] = processed_data["t2m"] - 273.15
+        if "skt" in processed_data.columns:
+            processed_data["skt"] = processed_data["skt"] - 273.15
+            
+        # Rearrange columns so 'datetime', 'date' and 'hour' come after 'name'
+        leading_columns = ["name", "datetime", "date", "hour"]
+        column_order = leading_columns + [col for col in processed_data.columns if col not in leading_columns]
+        processed_data = processed_data[column_order]
+
+        if compact:
+            processed_data = self.compact_dtypes(processed_data)
+
+        return processed_data
+    
+    @profiled_stage
+    def daily_data(self, city_data, compact=False):
+        """
+        Processes city_data by parsing datetime, sorting, resetting the index, 
+        and cleaning up unnecessary columns.
+
+        Args:
+            city_data (pd.DataFrame): DataFrame containing city weather data.
+            compact (bool): Whether to store 'name' as categorical and measures as float32.
+
+        Returns:
+            pd.DataFrame: Processed DataFrame with 'date' as a datetime64 column.
+        """
+        # Ensure 'datetime' is properly parsed as a datetime object
+        city_data['datetime'] = pd.to_datetime(city_data['datetime'])
+
+        # Sort the DataFrame by 'name' and 'datetime'
+        city_data = city_data.sort_values(by=['name', 'datetime'], ascending=[True, True])
+
+        # Reset the index after sorting
+        city_data = city_data.reset_index(drop=True)
+
+        # Delete unnecessary columns
+        columns_to_drop = ['address', 'resolvedAddress', 'latitude', 'longitude', 'icon']
+        city_data = city_data.drop(columns=columns_to_drop, errors='ignore')
+
+        # Rename 'datetime' to 'date'
+        city_data = city_data.rename(columns={'datetime': 'date'})
+
+        if compact:
+            city_data = self.compact_dtypes(city_data)
+
+        return city_data
+
+
+    def dbml_helper(self, data):
+        """
+        Lists the columns of a table with their DBML types, for datapipeline.dbml.
+        The types follow sql_table: datetime columns are timestamp, except 'date', which is a date.
+
+        Args:
+            data (pd.DataFrame): Table to describe.
+
+        Returns:
+            str: One 'column type' line per column.
+        """
+        types = []
+        for column, dtype in data.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                types.append('boolean')
+            elif pd.api.types.is_integer_dtype(dtype):
+                types.append('int')
+            elif pd.api.types.is_float_dtype(dtype):
+                types.append('float')
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                types.append('date' if column == 'date' else 'timestamp')
+            else:
+                types.append('varchar')
+        dt = pd.DataFrame({'column': data.columns, 'dtype': types})
+        return dt.to_string(index=False, header=False)
+    
+    # def connect_to_postgres(self, pw, user='postgres', 
+    #                         host='localhost', port='5432',
+    #                         create_datapipeline = False):
+    #     dbserver = psycopg.connect(
+    #         user=user, 
+    #         password=pw, 
+    #         host=host, 
+    #         port=port)
+    #     dbserver.autocommit = True
+    #     if create_datapipeline:
+    #             cursor = dbserver.cursor()
+    #             cursor.execute("DROP DATABASE IF EXISTS datapipeline")
+    #             cursor.execute("CREATE DATABASE datapipeline")
+    #     engine = create_engine(f'postgresql+psycopg://{user}:{pw}@{host}:{port}/datapipeline')
+    #     return dbserver, engine
+    
+    def connect_to_mysql(self, pw, user='root', host='localhost', port='3306', create_datapipeline=False, local_infile=False):
+        """
+        Connect to MySQL and optionally create the `datapipeline` database.
+        
+        Args:
+            pw (str): MySQL root password.
+            user (str): MySQL username.
+            host (str): MySQL host address.
+            port (str): MySQL port number.
+            create_datapipeline (bool): Whether to drop and create the `datapipeline` database.
+            local_infile (bool): Whether the engine may use LOAD DATA LOCAL INFILE for bulk loads.
+
+        Returns:
+            dbserver: pymysql connection object.
+            engine: SQLAlchemy engine for MySQL.
+        """
+        # Connect to MySQL server
+        dbserver = pymysql.connect(
+            user=user,
+            password=pw,
+            host=host,
+            port=int(port),
+            database=None  # Connect to MySQL without specifying a database
+        )
+
+        # Autocommit to allow database creation
+        dbserver.autocommit(True)
+
+        if create_datapipeline:
+            cursor = dbserver.cursor()
+            cursor.execute("DROP DATABASE IF EXISTS datapipeline")
+            cursor.execute("CREATE DATABASE datapipeline")
+            print("Database `datapipeline` created successfully in MySQL.")
+
+        # Create SQLAlchemy engine for the newly created database
+        engine = sqlalchemy.create_engine(f'mysql+pymysql://{user}:{pw}@{host}:{port}/datapipeline',
+                               connect_args={'local_infile': local_infile})
+        return dbserver, engine   
+    
+    def sql_table(self, data, table_name, primary_key, metadata=None):
+        """
+        Builds an explicitly typed SQLAlchemy table for a DataFrame.
+
+        Args:
+            data (pd.DataFrame): Data the table will hold.
+            table_name (str): Name of the table.
+            primary_key (list): Columns forming the primary key.
+            metadata (sqlalchemy.MetaData): Metadata to attach the table to.
+
+        Returns:
+            Table: The table definition.
+        """
+        columns = []
+        for column, dtype in data.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype):
+                sql_type = sqlalchemy.types.Boolean()
+            elif pd.api.types.is_integer_dtype(dtype):
+                sql_type = sqlalchemy.types.BigInteger()
+            elif pd.api.types.is_float_dtype(dtype):
+                sql_type = sqlalchemy.types.Float(precision=24 if dtype == 'float32' else 53)
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                sql_type = sqlalchemy.types.Date() if column == 'date' else sqlalchemy.types.DateTime()
+            elif column in primary_key or isinstance(dtype, pd.CategoricalDtype):
+                sql_type = sqlalchemy.types.String(64)  # key columns need a bounded length
+            else:
+                sql_type = sqlalchemy.types.Text()
+            columns.append(sqlalchemy.Column(column, sql_type, primary_key=column in primary_key))
+        return sqlalchemy.Table(table_name, metadata if metadata is not None else sqlalchemy.MetaData(), *columns)
+
+    def bulk_load(self, data, table_name, engine, primary_key, indexes=(), method='executemany', batch_size=50000):
+        """
+        Replaces a table with an explicitly typed schema and loads it in large transactions.
+        Secondary indexes are created after the load.
+
+        Args:
+            data (pd.DataFrame): Data to load.
+            table_name (str): Name of the table.
+            engine: SQLAlchemy engine, e.g. from connect_to_mysql.
+            primary_key (list): Columns forming the primary key.
+            indexes (list): Column lists to index after loading.
+            method (str): 'executemany' for multi-row INSERTs, or 'infile' for MySQL LOAD DATA LOCAL INFILE.
+            batch_size (int): Rows per executemany call.
+
+        Raises:
+            ValueError: If rows share a primary key, rather than silently keeping one of them.
+        """
+        duplicated = data.duplicated(subset=primary_key, keep=False)
+        if duplicated.any():
+            raise ValueError(f"{int(duplicated.sum())} rows of {table_name} share a primary key {primary_key}")
+        table = self.sql_table(data, table_name, primary_key)
+
+        with engine.begin() as conn:
+            table.drop(conn, checkfirst=True)
+            table.create(conn)
+
+            if method == 'infile':
+                # MySQL reads booleans as 0/1 and missing values as \N
+                bool_columns = data.select_dtypes(include='bool').columns
+                data = data.astype({column: 'int8' for column in bool_columns})
+                if 'date' in data.columns and pd.api.types.is_datetime64_any_dtype(data['date']):
+                    # 'date' is a DATE column; the other datetime columns keep their time
+                    data = data.assign(date=data['date'].dt.strftime('%Y-%m-%d'))
+                with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+                    data.to_csv(f, index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d %H:%M:%S')
+                try:
+                    column_list = ', '.join(f'`{column}`' for column in data.columns)
+                    conn.execute(sqlalchemy.text(
+                        f"LOAD DATA LOCAL INFILE '{f.name}' INTO TABLE `{table_name}` "
+                        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                        f"LINES TERMINATED BY '\\n' ({column_list})"
+                    ))
+                finally:
+                    os.remove(f.name)
+            else:
+                # Plain DB-API executemany; pymysql rewrites it into multi-row INSERT statements
+                statement = self.insert_statement(engine, table_name, data.columns)
+                records = self.sql_records(data)
+                for start in range(0, len(records), batch_size):
+                    conn.exec_driver_sql(statement, records[start:start + batch_size])
+
+            for index_columns in indexes:
+                index_name = f"ix_{table_name}_{'_'.join(index_columns)}"
+                sqlalchemy.Index(index_name, *[table.c[column] for column in index_columns]).create(conn)
+
+    def insert_statement(self, engine, table_name, columns, primary_key=None):
+        """
+        Builds a DB-API INSERT statement for the engine's dialect, optionally as an upsert.
+
+        Args:
+            engine: SQLAlchemy engine.
+            table_name (str): Name of the table.
+            columns (list): Columns to insert.
+            primary_key (list): If given, rows whose key already exists update the other columns instead.
+
+        Returns:
+            str: The SQL statement with positional placeholders.
+        """
+        placeholder = '?' if engine.dialect.paramstyle == 'qmark' else '%s'
+        quote = engine.dialect.identifier_preparer.quote
+        statement = (
+            f"INSERT INTO {quote(table_name)} ({', '.join(quote(column) for column in columns)}) "
+            f"VALUES ({', '.join([placeholder] * len(columns))})"
+        )
+        if primary_key is None:
+            return statement
+
+        update_columns = [column for column in columns if column not in primary_key] or list(primary_key)
+        if engine.dialect.name == 'mysql':
+            updates = ', '.join(f"{quote(column)} = VALUES({quote(column)})" for column in update_columns)
+            return f"{statement} ON DUPLICATE KEY UPDATE {updates}"
+        updates = ', '.join(f"{quote(column)} = excluded.{quote(column)}" for column in update_columns)
+        key = ', '.join(quote(column) for column in primary_key)
+        return f"{statement} ON CONFLICT ({key}) DO UPDATE SET {updates}"
+
+    def high_water_marks(self, engine, table_name, time_column):
+        """
+        Returns the latest stored timestamp per city.
+
+        Args:
+            engine: SQLAlchemy engine.
+            table_name (str): Name of the table.
+            time_column (str): Column holding the record timestamp, e.g. 'date' or 'datetime'.
+
+        Returns:
+            dict: City name to latest pd.Timestamp; empty if the table does not exist.
+        """
+        if not sqlalchemy.inspect(engine).has_table(table_name):
+            return {}
+        quote = engine.dialect.identifier_preparer.quote
+        marks = pd.read_sql_query(
+            f"SELECT name, MAX({quote(time_column)}) AS mark FROM {quote(table_name)} GROUP BY name",
+            con=engine
+        )
+        return dict(zip(marks['name'], pd.to_datetime(marks['mark'])))
+
+    def table_row_count(self, engine, table_name):
+        """
+        Returns the number of rows of a SQL table.
+
+        Args:
+            engine: SQLAlchemy engine.
+            table_name (str): Name of the table.
+
+        Returns:
+            int: Row count, or None if the table does not exist.
+        """
+        if not sqlalchemy.inspect(engine).has_table(table_name):
+            return None
+        quote = engine.dialect.identifier_preparer.quote
+        with engine.connect() as conn:
+            return conn.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {quote(table_name)}")).scalar()
+
+    def filter_new_records(self, data, marks, time_column):
+        """
+        Keeps the rows that are newer than their city's high-water mark.
+
+        Args:
+            data (pd.DataFrame): Records with 'name' and time_column columns.
+            marks (dict): City name to latest stored timestamp.
+            time_column (str): Column holding the record timestamp.
+
+        Returns:
+            pd.DataFrame: Rows after the mark, plus all rows of cities without a mark.
+        """
+        if not marks:
+            return data
+        city_marks = pd.to_datetime(data['name'].astype(str).map(marks))
+        return data[city_marks.isna() | (pd.to_datetime(data[time_column]) > city_marks)].copy()
+
+    def upsert(self, data, table_name, engine, primary_key, indexes=(), batch_size=50000):
+        """
+        Inserts new rows and updates existing ones by primary key; creates the table with bulk_load if it is missing.
+
+        Args:
+            data (pd.DataFrame): Rows to write.
+            table_name (str): Name of the table.
+            engine: SQLAlchemy engine.
+            primary_key (list): Columns forming the primary key.
+            indexes (list): Column lists to index when the table is created.
+            batch_size (int): Rows per executemany call.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if not sqlalchemy.inspect(engine).has_table(table_name):
+            self.bulk_load(data, table_name, engine, primary_key, indexes=indexes, batch_size=batch_size)
+            return len(data)
+
+        data = data.drop_duplicates(subset=primary_key, keep='last')
+        statement = self.insert_statement(engine, table_name, data.columns, primary_key=primary_key)
+        records = self.sql_records(data)
+        with engine.begin() as conn:
+            for start in range(0, len(records), batch_size):
+                conn.exec_driver_sql(statement, records[start:start + batch_size])
+        return len(records)
+
+    def sql_records(self, data):
+        """
+        Converts a DataFrame to a list of row tuples of Python values, with missing values as None.
+        Datetimes become datetime objects, except in 'date', the DATE column of sql_table, where they become dates.
+
+        Args:
+            data (pd.DataFrame): Data to convert.
+
+        Returns:
+            list: One tuple per row.
+        """
+        columns = []
+        for column in data.columns:
+            series = data[column]
+            if series.isna().any():
+                series = series.astype(object).where(series.notna(), None)
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                values = pd.DatetimeIndex(series).to_pydatetime().tolist()
+                columns.append([value.date() for value in values] if column == 'date' else values)
+            else:
+                columns.append(series.tolist())
+        return list(zip(*columns))
+
+    @profiled_stage
+    def make_dailydata_df(self, daily_data, engine, bulk=False, method='executemany', incremental=False):
+        daily_data.columns = daily_data.columns.str.lower()
+        if incremental:
+            marks = self.high_water_marks(engine, 'dailydata', 'date')
+            new_data = self.filter_new_records(daily_data, marks, 'date')
+            return self.upsert(new_data, 'dailydata', engine, primary_key=['name', 'date'], indexes=[['date']])
+        if bulk:
+            self.bulk_load(daily_data, 'dailydata', engine, primary_key=['name', 'date'],
+                           indexes=[['date']], method=method)
+        else:
+            daily_data.to_sql('dailydata', con=engine, index=False, chunksize=1000, if_exists='replace')
+    
+    @profiled_stage
+    def make_hourlydata_df(self, hourly_data, engine, bulk=False, method='executemany', incremental=False):
+        hourly_data.columns = hourly_data.columns.str.lower()
+        if incremental:
+            marks = self.high_water_marks(engine, 'hourlydata', 'datetime')
+            new_data = self.filter_new_records(hourly_data, marks, 'datetime')
+            return self.upsert(new_data, 'hourlydata', engine, primary_key=['name', 'datetime'],
+                               indexes=[['date'], ['name', 'date']])
+        if bulk:
+            self.bulk_load(hourly_data, 'hourlydata', engine, primary_key=['name', 'datetime'],
+                           indexes=[['date'], ['name', 'date']], method=method)
+        else:
+            hourly_data.to_sql('hourlydata', con=engine, index=False, chunksize=1000, if_exists='replace')
+    
+    @profiled_stage
+    def make_constants_df(self, constants, engine, bulk=False, method='executemany'):
+        constants.columns = constants.columns.str.lower()
+        if bulk:
+            self.bulk_load(constants, 'constants', engine, primary_key=['name'], method=method)
+        else:
+            constants.to_sql('constants', con=engine, index=False, chunksize=1000, if_exists='replace')
+    
+    @profiled_stage
+    def refresh_incremental(self, engine):
+        """
+        Adds the records newer than each city's high-water mark to dailydata and hourlydata.
+        GRIB time steps up to the oldest hourly mark are skipped before decoding.
+
+        Args:
+            engine: SQLAlchemy engine for the datapipeline database.
+
+        Returns:
+            dict: Number of rows written per table.
+        """
+        daily_marks = self.high_water_marks(engine, 'dailydata', 'date')
+        city_data = self.get_city_data()
+        # Nothing new (or nothing downloaded) leaves the table as it is
+        daily_rows = 0
+        if not city_data.empty:
+            city_data = self.filter_new_records(city_data, daily_marks, 'datetime')
+            if not city_data.empty:
+                daily_rows = self.make_dailydata_df(self.daily_data(city_data), engine, incremental=True)
+
+        hourly_marks = self.high_water_marks(engine, 'hourlydata', 'datetime')
+        # Only skip GRIB time steps when every city already has a mark
+        covered = all(city['name'] in hourly_marks for city in self.target_coords)
+        since = min(hourly_marks.values()) if hourly_marks and covered else None
+        zip_data = self.get_grib_city_data(since=since)
+        hourly_rows = 0
+        if not zip_data.empty:
+            hourly_rows = self.make_hourlydata_df(self.hourly_data(zip_data), engine, incremental=True)
+
+        print(f"Incremental refresh wrote {daily_rows} daily and {hourly_rows} hourly rows.")
+        return {'dailydata': daily_rows, 'hourlydata': hourly_rows}
+
+    def write_parquet_dataset(self, data, path, partition_cols=('name', 'month')):
+        """
+        Writes a daily or hourly table as a typed Parquet dataset partitioned by city and month.
+        The dataset is written to a new directory that then replaces the old one, so partitions
+        of cities or months that are no longer in the data are removed.
+
+        Args:
+            data (pd.DataFrame or WeatherStore): Weather data with 'name' and 'date' columns.
+            path (str): Directory of the dataset, e.g. 'hourlydata'.
+            partition_cols (tuple): Columns used for the directory partitions.
+        """
+        data = self.as_frame(data)
+        dates = pd.to_datetime(data['date'])
+        data = data.assign(date=dates, month=dates.dt.year * 100 + dates.dt.month)
+
+        path = os.path.abspath(path)
+        new_path = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}-", dir=os.path.dirname(path))
+        try:
+            data.to_parquet(new_path, index=False, partition_cols=list(partition_cols))
+        except Exception:
+            shutil.rmtree(new_path, ignore_errors=True)
+            raise
+        old_path = None
+        if os.path.exists(path):
+            old_path = new_path + '.old'
+            os.replace(path, old_path)
+        os.replace(new_path, path)
+        if old_path is not None:
+            shutil.rmtree(old_path)
+
+    def read_parquet_dataset(self, path, columns=None, cities=None, start_date=None, end_date=None):
+        """
+        Reads a Parquet dataset written by write_parquet_dataset, pushing city and date filters down to the files.
+
+        Args:
+            path (str): Directory of the dataset.
+            columns (list): Columns to read, or None for all columns.
+            cities (list): Cities to read, or None for all cities.
+            start_date (str): Start date (YYYY-MM-DD), or None for no lower bound.
+            end_date (str): End date (YYYY-MM-DD), or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The selected rows and columns.
+        """
+        filters = []
+        if cities is not None:
+            filters.append(('name', 'in', list(cities)))
+        # Month filters prune whole partitions before the date filter is applied to rows
+        if start_date is not None:
+            start = pd.Timestamp(start_date)
+            filters += [('month', '>=', start.year * 100 + start.month), ('date', '>=', start)]
+        if end_date is not None:
+            end = pd.Timestamp(end_date)
+            filters += [('month', '<=', end.year * 100 + end.month), ('date', '<=', end)]
+
+        data = pd.read_parquet(path, columns=columns, filters=filters or None, memory_map=True)
+        return data.drop(columns=['month'], errors='ignore')
+
+    @profiled_stage
+    def save_tables(self, daily_data, hourly_data, constants, directory='.'):
+        """
+        Writes dailydata and hourlydata as partitioned Parquet datasets and constants as a Parquet file.
+
+        Args:
+            daily_data (pd.DataFrame or WeatherStore): Daily weather data.
+            hourly_data (pd.DataFrame or WeatherStore): Hourly weather data.
+            constants (pd.DataFrame): City constants.
+            directory (str): Directory to write the datasets to.
+        """
+        self.write_parquet_dataset(daily_data, os.path.join(directory, 'dailydata'))
+        self.write_parquet_dataset(hourly_data, os.path.join(directory, 'hourlydata'))
+        constants.to_parquet(os.path.join(directory, 'constants.parquet'), index=False)
+
+    def load_table(self, name, directory='.', columns=None):
+        """
+        Loads 'dailydata', 'hourlydata' or 'constants' from Parquet when available, falling back to the CSV file.
+
+        Args:
+            name (str): Table name.
+            directory (str): Directory containing the tables.
+            columns (list): Columns to read, or None for all columns.
+
+        Returns:
+            pd.DataFrame: The table, with 'date' and 'datetime' parsed as datetime64.
+        """
+        dataset_path = os.path.join(directory, name)
+        file_path = os.path.join(directory, f"{name}.parquet")
+        if os.path.isdir(dataset_path):
+            return self.read_parquet_dataset(dataset_path, columns=columns)
+        if os.path.exists(file_path):
+            return pd.read_parquet(file_path, columns=columns, memory_map=True)
+
+        # Older hourly CSVs only have 'date' and 'time', which the derived columns are built from
+        usecols = None if columns is None else lambda column: column in columns or column in ('date', 'time')
+        data = self.prepare_csv_table(name, pd.read_csv(os.path.join(directory, f"{name}.csv"), usecols=usecols))
+        return data if columns is None else data[list(columns)]
+
+    def prepare_csv_table(self, name, data):
+        """
+        Parses the date columns of a table read from CSV. An hourlydata.csv written before the
+        'datetime' and 'hour' columns existed gets them derived from its 'date' and 'time' columns.
+
+        Args:
+            name (str): Table name.
+            data (pd.DataFrame): Table as read from the CSV file.
+
+        Returns:
+            pd.DataFrame: The table, with 'date' and 'datetime' parsed as datetime64.
+        """
+        if name == 'hourlydata' and 'datetime' not in data.columns and {'date', 'time'} <= set(data.columns):
+            print("hourlydata.csv has no datetime and hour columns; deriving them from date and time. "
+                  "Run the pipeline again to rewrite it.")
+            # Midnight rows were written with an empty time
+            timestamps = pd.to_datetime(data['date'].astype(str) + ' ' + data['time'].fillna('00:00:00').astype(str))
+            leading = {'datetime': timestamps, 'date': timestamps.dt.normalize(), 'hour': timestamps.dt.hour.astype('int8')}
+            rest = data.drop(columns=['name', 'date', 'time'])
+            data = pd.concat([data[['name']], pd.DataFrame(leading, index=data.index), rest], axis=1)
+
+        for column in ['date', 'datetime']:
+            if column in data.columns:
+                data[column] = pd.to_datetime(data[column])
+        return data
+
+    def publish_shared_tables(self, shared_dir, directory='.'):
+        """
+        Loads the dashboard tables once and writes them as uncompressed Arrow IPC files that
+        worker processes memory-map with attach_shared_table instead of loading their own copies.
+        The daily and hourly tables are written in WeatherStore order.
+
+        Args:
+            shared_dir (str): Directory for the Arrow files, ideally on tmpfs such as /dev/shm.
+            directory (str): Directory containing the tables read by load_table.
+
+        Returns:
+            dict: Table name to Arrow file path.
+        """
+        os.makedirs(shared_dir, exist_ok=True)
+        paths = {}
+        for name in ['hourlydata', 'dailydata', 'constants']:
+            data = self.load_table(name, directory)
+            if name != 'constants':
+                data = WeatherStore(data).data
+
+            # Keep NaN as a float value rather than an Arrow null so numeric columns map without a copy,
+            # and dictionary-encode text so workers share the codes
+            arrays = []
+            for column in data.columns:
+                values = data[column]
+                if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+                    values = values.astype('category')
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    arrays.append(pa.array(values))
+                else:
+                    arrays.append(pa.array(values.to_numpy(), from_pandas=False))
+            table = pa.Table.from_arrays(arrays, names=list(data.columns))
+
+            # Workers never map a half-written file
+            path = os.path.join(shared_dir, f"{name}.arrow")
+            with atomic_write(path, 'wb') as f:
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+            paths[name] = path
+            print(f"Published {name}: {len(data):,} rows to {path}")
+        return paths
+
+    def attach_shared_table(self, name, shared_dir):
+        """
+        Memory-maps a table written by publish_shared_tables.
+        Numeric and datetime columns are views of the mapped file, so every process attached to
+        the same file shares one copy in the page cache.
+
+        Args:
+            name (str): Table name.
+            shared_dir (str): Directory passed to publish_shared_tables.
+
+        Returns:
+            pd.DataFrame: The table.
+        """
+        source = pa.memory_map(os.path.join(shared_dir, f"{name}.arrow"), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True, self_destruct=False)
+
+    def table_columns(self, name, directory='.', shared_dir=None):
+        """
+        Returns the column names of a table from its schema or header, without loading its rows.
+
+        Args:
+            name (str): Table name.
+            directory (str): Directory containing the tables read by load_table.
+            shared_dir (str): Directory of the files written by publish_shared_tables, if they are used instead.
+
+        Returns:
+            list: Column names in the order load_table (or attach_shared_table) returns them.
+        """
+        return self.table_schema(name, directory, shared_dir).names
+
+    def table_schema(self, name, directory='.', shared_dir=None):
+        """
+        Returns the Arrow schema of a table without loading its rows.
+        For a CSV table the types are inferred from its first rows.
+
+        Args:
+            name (str): Table name.
+            directory (str): Directory containing the tables read by load_table.
+            shared_dir (str): Directory of the files written by publish_shared_tables, if they are used instead.
+
+        Returns:
+            pa.Schema: Columns and types in the order load_table (or attach_shared_table) returns them.
+        """
+        if shared_dir:
+            with pa.memory_map(os.path.join(shared_dir, f"{name}.arrow"), 'r') as source:
+                return pa.ipc.open_file(source).schema
+
+        dataset_path = os.path.join(directory, name)
+        file_path = os.path.join(directory, f"{name}.parquet")
+        if os.path.isdir(dataset_path):
+            import pyarrow.dataset
+            schema = pyarrow.dataset.dataset(dataset_path, format='parquet', partitioning='hive').schema
+            return schema.remove(schema.get_field_index('month')) if 'month' in schema.names else schema
+        if os.path.exists(file_path):
+            import pyarrow.parquet
+            return pyarrow.parquet.read_schema(file_path)
+
+        sample = self.prepare_csv_table(name, pd.read_csv(os.path.join(directory, f"{name}.csv"), nrows=1000))
+        return pa.Schema.from_pandas(sample, preserve_index=False)
+
+    def table_column_types(self, name, directory='.', shared_dir=None):
+        """
+        Returns the DataTable column type of each column of a table: 'numeric', 'datetime' or 'text'.
+
+        Args:
+            name (str): Table name.
+            directory (str): Directory containing the tables read by load_table.
+            shared_dir (str): Directory of the files written by publish_shared_tables, if they are used instead.
+
+        Returns:
+            dict: Column name to DataTable type, in column order.
+        """
+        types = {}
+        for field in self.table_schema(name, directory, shared_dir):
+            arrow_type = field.type
+            if pa.types.is_dictionary(arrow_type):
+                arrow_type = arrow_type.value_type
+            if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+                types[field.name] = 'datetime'
+            elif pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+                types[field.name] = 'numeric'
+            else:
+                types[field.name] = 'text'
+        return types
+
+    def season_names(self, dates):
+        """
+        Maps dates to meteorological season names.
+
+        Args:
+            dates (pd.Series): Dates to classify.
+
+        Returns:
+            pd.Series: 'Winter', 'Spring', 'Summer' or 'Fall' for each date.
+        """
+        # Define a mapping for season numbers to names
+        season_mapping = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'}
+        seasons = pd.to_datetime(dates).dt.month % 12 // 3 + 1
+        return seasons.map(season_mapping)
+
+    def extreme_flags(self, daily_data):
+        """
+        Flags days with extreme temperature (above 35°C or below -10°C) or extreme precipitation (above 50 mm).
+
+        Args:
+            daily_data (pd.DataFrame): DataFrame containing daily weather data.
 
-        print("All GRIB files processed successfully.")
-        return combined_df
-        
-    def get_zip_data(self, grib_data):
+        Returns:
+            pd.DataFrame: Boolean 'extreme_temp' and 'extreme_precip' columns aligned with daily_data.
         """
-        Filters grib_data to include only rows where (latitude, longitude) match predefined locations (rounded to one decimal place).
-        Adds a 'name' column corresponding to the location name and removes 'latitude' and 'longitude' columns.
+        return pd.DataFrame({
+            'extreme_temp': (daily_data['tempmax'] > 35) | (daily_data['tempmin'] < -10),
+            'extreme_precip': daily_data['precip'] > 50
+        }, index=daily_data.index)
+
+    @profiled_stage
+    def make_rollups(self, daily_data, hourly_data):
+        """
+        Materializes the aggregate tables used by the dashboard analytics and makes them available to the analysis methods.
 
         Args:
-            grib_data (pd.DataFrame): The DataFrame containing data extracted from the GRIB file.
+            daily_data (pd.DataFrame or WeatherStore): Daily weather data.
+            hourly_data (pd.DataFrame or WeatherStore): Hourly weather data with 'date', 'hour' and 't2m' columns.
 
         Returns:
-            pd.DataFrame: Filtered DataFrame with location names and no latitude/longitude columns.
+            dict: Rollup tables keyed by table name:
+                'seasonalrollup': mean temp, precip and humidity per city and season.
+                'cityrollup': mean temp, precip and windspeedmean per city.
+                'extremerollup': extreme temperature and precipitation flags per city and day.
+                'hourlyrollup': t2m sum and count per city, month and hour of day.
         """
-        # Ensure grib_data is a DataFrame
-        if not isinstance(grib_data, pd.DataFrame):
-            raise ValueError("grib_data must be a pandas DataFrame.")
+        daily_data = self.as_frame(daily_data)
+        hourly_data = self.as_frame(hourly_data)
+        daily_dates = pd.to_datetime(daily_data['date'])
+
+        seasonal = (
+            daily_data.assign(season=self.season_names(daily_dates))
+            .groupby(['name', 'season'], observed=True)[['temp', 'precip', 'humidity']]
+            .mean()
+            .reset_index()
+        )
 
-        # Build a DataFrame for the target coordinates
-        target_df = pd.DataFrame(self.target_coords)
+        city = daily_data.groupby('name', observed=True)[['temp', 'precip', 'windspeedmean']].mean().reset_index()
 
-        # Merge grib_data with target_df on latitude and longitude
-        filtered_data = grib_data.merge(
-            target_df,
-            how="inner",
-            on=["latitude", "longitude"]
+        extremes = (
+            pd.concat([daily_data[['name']], daily_dates, self.extreme_flags(daily_data)], axis=1)
+            .groupby(['name', 'date'], observed=True)[['extreme_temp', 'extreme_precip']]
+            .sum()
+            .reset_index()
         )
 
-        # Remove latitude and longitude columns
-        filtered_data = filtered_data.drop(columns=["latitude", "longitude"])
+        # Sums and counts per month, so any range of whole months can be combined exactly
+        hourly_months = pd.to_datetime(hourly_data['date']).dt.to_period('M').dt.to_timestamp()
+        hourly = (
+            hourly_data.assign(month=hourly_months)
+            .groupby(['name', 'month', 'hour'], observed=True)['t2m']
+            .agg(t2m_sum='sum', t2m_count='count')
+            .reset_index()
+        )
 
-        # Reset the index of the filtered DataFrame
-        filtered_data = filtered_data.reset_index(drop=True)
+        rollups = {
+            'seasonalrollup': seasonal,
+            'cityrollup': city,
+            'extremerollup': extremes,
+            'hourlyrollup': hourly
+        }
+        sources = {
+            'dailydata': self.table_signature(daily_data, self.rollup_source_columns['dailydata']),
+            'hourlydata': self.table_signature(hourly_data, self.rollup_source_columns['hourlydata'])
+        }
+        self.set_rollups(rollups, sources)
+        return rollups
 
-        return filtered_data
-    
-    def make_constants_tabel(self, zip_data):
+    def table_signature(self, data, columns):
         """
-        Extracts 'z' and 'lsm' values for 9 cities from zip_data and merges them with city_info.
+        Identifies the contents of a table, so rollups are only used with the data they were built from.
+        The digest ignores row order and the storage type of each column (e.g. categorical or text
+        names, float32 or float64 values), so the same data read from CSV, Parquet or a shared Arrow
+        file has the same signature.
 
         Args:
-            zip_data (pd.DataFrame): DataFrame containing weather data, including 'z' and 'lsm' columns.
+            data (pd.DataFrame or WeatherStore): Table to identify.
+            columns (list): Columns to include; columns missing from the table are left out.
 
         Returns:
-            pd.DataFrame: A DataFrame containing city information enriched with 'z' and 'lsm' values.
+            dict: 'rows' (row count) and 'digest' (hex string).
         """
-        # Get city information DataFrame
-        city_info = self.get_city_info()  # Assuming this returns a DataFrame with city names and other information
-
-        # Extract the first occurrence of 'z' and 'lsm' for each city
-        constants = (
-            zip_data.groupby("name")[["z", "lsm"]]
-            .first()  # Take the first occurrence of 'z' and 'lsm' for each city
-            .reset_index()  # Reset index to make 'name' a column
-        )
+        data = self.as_frame(data)
+        normalized = {}
+        for column in columns:
+            if column not in data.columns:
+                continue
+            values = data[column]
+            if column in ('date', 'datetime'):
+                normalized[column] = pd.to_datetime(values)
+            elif pd.api.types.is_numeric_dtype(values):
+                normalized[column] = values.astype('float64').round(6)
+            else:
+                normalized[column] = values.astype(str)
+        normalized = pd.DataFrame(normalized, index=data.index)
 
-        # Merge 'constants' DataFrame with 'city_info' based on 'name'
-        enriched_city_info = pd.merge(city_info, constants, on="name", how="left")
+        # Summing the row hashes (modulo 2**64) makes the digest independent of row order
+        row_hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+        digest = hashlib.sha256(json.dumps([
+            list(normalized.columns), int(row_hashes.sum(dtype=np.uint64))
+        ]).encode()).hexdigest()
+        return {'rows': len(data), 'digest': digest}
 
-        return enriched_city_info
-    
-    def hourly_data(self, zip_data):
+    def rollup(self, name, data):
         """
-        Processes zip_data by removing specified columns, sorting, and splitting time into date and time columns.
+        Returns a rollup table if it was built from the given data.
 
         Args:
-            zip_data (pd.DataFrame): DataFrame containing weather data with various columns.
+            name (str): Rollup table name, e.g. 'seasonalrollup'.
+            data (pd.DataFrame or WeatherStore): The table being analysed, i.e. the daily data for the
+                daily rollups and the hourly data for 'hourlyrollup'.
 
         Returns:
-            pd.DataFrame: Processed DataFrame with specified modifications.
+            pd.DataFrame: The rollup table, or None if there is none or it was built from other data.
         """
-        # Drop unnecessary columns
-        columns_to_drop = ["number", "step", "valid_time", "z", "lsm"]
-        processed_data = zip_data.drop(columns=columns_to_drop, errors="ignore")
+        table = self.rollups.get(name)
+        if table is None:
+            return None
+        source = self.rollup_tables[name]
+        expected = self.rollup_sources.get(source)
+        if expected is None:
+            return None
 
-        # Sort the data by 'name' and 'time'
-        processed_data = processed_data.sort_values(by=["name", "time"]).reset_index(drop=True)
-        
-        # Ensure the 'time' column is a string
-        processed_data["time"] = processed_data["time"].astype(str)
+        # Each table is hashed once per source: a WeatherStore by its version and a DataFrame by its
+        # identity, as in the figure cache (the analysis methods never modify their data)
+        if isinstance(data, WeatherStore):
+            key = (source, 'store', data.version)
+        else:
+            key = (source, 'frame', id(data))
+        matches = self.rollup_source_checks.get(key)
+        if matches is None:
+            matches = (len(data) == expected['rows'] and
+                       self.table_signature(data, self.rollup_source_columns[source]) == expected)
+            self.rollup_source_checks[key] = matches
+            if key[1] == 'frame':
+                # Forget the frame once it is garbage-collected so its id can be reused safely
+                weakref.finalize(data, self.rollup_source_checks.pop, key, None)
+            if not matches:
+                print(f"Not using the {source} rollups: they were built from different data.")
+        return table if matches else None
+
+    def set_rollups(self, rollups, sources):
+        """
+        Makes rollup tables available to the analysis methods and drops figures computed without them.
 
-        # Split 'time' into 'date' and 'time' columns
-        processed_data["date"] = processed_data["time"].str.split(" ").str[0]
-        processed_data["time"] = processed_data["time"].str.split(" ").str[1]
+        Args:
+            rollups (dict): Rollup tables keyed by table name, as returned by make_rollups.
+            sources (dict): Signature of each source table the rollups were built from, keyed by table name.
+        """
+        self.rollups = dict(rollups)
+        self.rollup_sources = dict(sources)
+        self.rollup_source_checks = {}
+        self.figure_cache.clear()
 
-        # Convert 't2m' and 'skt' from Kelvin to Celsius
-        if "t2m" in processed_data.columns:
-            processed_data["t2m"] = processed_data["t2m"] - 273.15
-        if "skt" in processed_data.columns:
-            processed_data["skt"] = processed_data["skt"] - 273.15
-            
-        # Rearrange columns so 'date' and 'time' come after 'name'
-        column_order = ["name", "date", "time"] + [col for col in processed_data.columns if col not in ["name", "date", "time"]]
-        processed_data = processed_data[column_order]
+    def save_rollups(self, rollups, directory='.'):
+        """
+        Writes each rollup table to '<name>.parquet' next to the dailydata and hourlydata datasets,
+        and the signatures of their source tables to 'rollupsources.json'.
 
-        return processed_data
-    
-    def daily_data(self, city_data):
+        Args:
+            rollups (dict): Rollup tables keyed by table name.
+            directory (str): Directory to write the Parquet files to.
         """
-        Processes city_data by parsing datetime, sorting, resetting the index, 
-        and cleaning up unnecessary columns.
+        for name, table in rollups.items():
+            with atomic_write(os.path.join(directory, f"{name}.parquet"), mode=None) as tmp_path:
+                table.to_parquet(tmp_path, index=False)
+        with atomic_write(os.path.join(directory, 'rollupsources.json')) as f:
+            json.dump(self.rollup_sources, f, indent=2)
+
+    def load_rollups(self, directory='.'):
+        """
+        Reads the rollup tables that exist in directory and makes them available to the analysis methods.
+        Each is read from '<name>.parquet', falling back to the CSV file written by older versions.
+        The analysis methods only use them with data matching the signatures in 'rollupsources.json';
+        rollups without that file are ignored.
 
         Args:
-            city_data (pd.DataFrame): DataFrame containing city weather data.
+            directory (str): Directory containing the rollup files.
 
         Returns:
-            pd.DataFrame: Processed DataFrame with specified modifications.
+            dict: The rollup tables that were found.
         """
-        # Ensure 'datetime' is properly parsed as a datetime object
-        city_data['datetime'] = pd.to_datetime(city_data['datetime'])
+        sources_path = os.path.join(directory, 'rollupsources.json')
+        if not os.path.exists(sources_path):
+            self.set_rollups({}, {})
+            return {}
+        with open(sources_path) as f:
+            sources = json.load(f)
+
+        date_columns = {'extremerollup': ['date'], 'hourlyrollup': ['month']}
+        rollups = {}
+        for name in ['seasonalrollup', 'cityrollup', 'extremerollup', 'hourlyrollup']:
+            file_path = os.path.join(directory, f"{name}.parquet")
+            csv_path = os.path.join(directory, f"{name}.csv")
+            if os.path.exists(file_path):
+                rollups[name] = pd.read_parquet(file_path)
+            elif os.path.exists(csv_path):
+                rollups[name] = pd.read_csv(csv_path, parse_dates=date_columns.get(name, False))
+        self.set_rollups(rollups, sources)
+        return rollups
+
+    def make_rollups_df(self, rollups, engine):
+        for name, table in rollups.items():
+            table.to_sql(name, con=engine, index=False, chunksize=1000, if_exists='replace')
+    
+    ### Pipeline graph ###
 
-        # Sort the DataFrame by 'name' and 'datetime'
-        city_data = city_data.sort_values(by=['name', 'datetime'], ascending=[True, True])
+    def build_pipeline_graph(self, directory='.', engine=None, cache_dir='.pipeline_cache', max_workers=2,
+                             grib_processes=None, grib_start_method='spawn'):
+        """
+        Declares the ingestion flow as a stage graph with cached intermediate outputs.
 
-        # Reset the index after sorting
-        city_data = city_data.reset_index(drop=True)
+        GRIB branch: grib files -> zipdata -> hourlydata and (with cityinfo) constants.
+        City branch: city CSV downloads -> citydata -> cityinfo and dailydata.
+        Sinks write the dashboard tables and rollups to directory, and load the SQL tables when an engine is given.
 
-        # Delete unnecessary columns
-        columns_to_drop = ['address', 'resolvedAddress', 'latitude', 'longitude', 'icon']
-        city_data = city_data.drop(columns=columns_to_drop, errors='ignore')
+        Args:
+            directory (str): Directory the tables and rollups are written to.
+            engine (sqlalchemy.engine.Engine): Engine to bulk load the tables into, or None to skip SQL.
+            cache_dir (str): Directory of the cached stage outputs.
+            max_workers (int): Maximum number of stages running at once.
+            grib_processes (int): Number of processes decoding the GRIB files, or None to decode them serially.
+            grib_start_method (str): multiprocessing start method of the GRIB decoding processes.
 
-        # Rename 'datetime' to 'date'
-        city_data = city_data.rename(columns={'datetime': 'date'})
+        Returns:
+            PipelineGraph: The graph; call run() on it or use run_pipeline.
+        """
+        graph = PipelineGraph(cache_dir=cache_dir, max_workers=max_workers)
+        digest_memo = os.path.join(cache_dir, 'filedigests.json')
+        grib_file_paths = list(self.grib_file_paths)
+        city_data_urls = list(self.city_data_urls)
+
+        # Sources: the GRIB files are identified by their contents, the bulk downloads by their task URLs
+        # Sources raise on any failed file or download, so partial data is never cached
+        graph.add('zipdata', lambda: self.get_grib_city_data(grib_file_paths, processes=grib_processes, strict=True,
+                                                              start_method=grib_start_method),
+                  fingerprint=lambda: [file_digest(path, digest_memo) for path in grib_file_paths],
+                  params={'target_coords': self.target_coords},
+                  code=(self.get_grib_city_data, self.iter_grib_data, self.select_target_points, self.decode_grib_slice))
+        graph.add('citydata', lambda: self.get_city_data(city_data_urls, strict=True),
+                  fingerprint=lambda: city_data_urls,
+                  code=(self.get_city_data, self.fetch_csv))
+
+        graph.add('cityinfo', lambda city_data: self.get_city_info(city_data), inputs=['citydata'],
+                  code=(self.get_city_info,))
+        graph.add('hourlydata', lambda zip_data: self.hourly_data(zip_data), inputs=['zipdata'],
+                  code=(self.hourly_data,))
+        graph.add('dailydata', lambda city_data: self.daily_data(city_data.copy()), inputs=['citydata'],
+                  code=(self.daily_data,))
+        graph.add('constants', lambda zip_data, city_info: self.make_constants_tabel(zip_data, city_info),
+                  inputs=['zipdata', 'cityinfo'], code=(self.make_constants_tabel,))
+
+        def write_tables(daily_data, hourly_data, constants):
+            self.save_tables(daily_data, hourly_data, constants, directory)
+
+        def write_rollups(daily_data, hourly_data):
+            self.save_rollups(self.make_rollups(daily_data, hourly_data), directory)
+
+        # Sinks are written again whenever a file they wrote was deleted or modified
+        table_paths = [os.path.join(directory, name) for name in ('dailydata', 'hourlydata', 'constants.parquet')]
+        rollup_paths = [os.path.join(directory, f"{name}.parquet")
+                        for name in ('seasonalrollup', 'cityrollup', 'extremerollup', 'hourlyrollup')]
+        rollup_paths.append(os.path.join(directory, 'rollupsources.json'))
+        graph.add('tables', write_tables, inputs=['dailydata', 'hourlydata', 'constants'],
+                  params={'directory': os.path.abspath(directory)}, code=(self.save_tables,),
+                  outputs=lambda: path_state(table_paths))
+        graph.add('rollups', write_rollups, inputs=['dailydata', 'hourlydata'],
+                  params={'directory': os.path.abspath(directory)}, code=(self.make_rollups, self.save_rollups),
+                  outputs=lambda: path_state(rollup_paths))
+
+        if engine is not None:
+            target = {'url': engine.url.render_as_string(hide_password=True)}
+            # The make_*_df methods lowercase the column names in place, so they get copies.
+            # A dropped or emptied table changes its row count, so it is loaded again.
+            graph.add('sql_dailydata', lambda daily_data: self.make_dailydata_df(daily_data.copy(), engine, bulk=True),
+                      inputs=['dailydata'], params=target, code=(self.make_dailydata_df,),
+                      outputs=lambda: self.table_row_count(engine, 'dailydata'))
+            graph.add('sql_hourlydata', lambda hourly_data: self.make_hourlydata_df(hourly_data.copy(), engine, bulk=True),
+                      inputs=['hourlydata'], params=target, code=(self.make_hourlydata_df,),
+                      outputs=lambda: self.table_row_count(engine, 'hourlydata'))
+            graph.add('sql_constants', lambda constants: self.make_constants_df(constants.copy(), engine, bulk=True),
+                      inputs=['constants'], params=target, code=(self.make_constants_df,),
+                      outputs=lambda: self.table_row_count(engine, 'constants'))
+        return graph
+
+    def run_pipeline(self, directory='.', engine=None, cache_dir='.pipeline_cache', max_workers=2, force=(),
+                     grib_processes=None, grib_start_method='spawn'):
+        """
+        Runs the ingestion graph, recomputing only the stages whose code or inputs changed.
 
-        return city_data
+        Args:
+            directory (str): Directory the tables and rollups are written to.
+            engine (sqlalchemy.engine.Engine): Engine to bulk load the tables into, or None to skip SQL.
+            cache_dir (str): Directory of the cached stage outputs.
+            max_workers (int): Maximum number of stages running at once.
+            force (list): Stages to run even if cached, e.g. ['citydata'] to download the bulk data again.
+            grib_processes (int): Number of processes decoding the GRIB files, or None to decode them serially.
+            grib_start_method (str): multiprocessing start method of the GRIB decoding processes. The pool is
+                created on a stage thread while other stages run, so the default 'spawn' should be kept.
+
+        Returns:
+            dict: Per-stage cache key, whether it was cached, and seconds taken.
+        """
+        graph = self.build_pipeline_graph(directory, engine, cache_dir, max_workers, grib_processes,
+                                          grib_start_method)
+        sinks = [name for name in graph.stages if name in ('tables', 'rollups') or name.startswith('sql_')]
+        graph.run(targets=sinks, force=force)
+        return graph.last_run
 
+    ### Analysis ###
 
-    def dbml_helper(self, data):
-        dt = data.dtypes.reset_index().rename({0:'dtype'}, axis=1)
-        replace_map = {'object': 'varchar',
-                        'int64': 'int',
-                        'float64': 'float',
-                        'float32': 'float',
-                        'datetime64[ns]': 'varchar'}
-        dt['dtype'] = dt['dtype'].replace(replace_map)
-        return dt.to_string(index=False, header=False)
-    
-    # def connect_to_postgres(self, pw, user='postgres', 
-    #                         host='localhost', port='5432',
-    #                         create_datapipeline = False):
-    #     dbserver = psycopg.connect(
-    #         user=user, 
-    #         password=pw, 
-    #         host=host, 
-    #         port=port)
-    #     dbserver.autocommit = True
-    #     if create_datapipeline:
-    #             cursor = dbserver.cursor()
-    #             cursor.execute("DROP DATABASE IF EXISTS datapipeline")
-    #             cursor.execute("CREATE DATABASE datapipeline")
-    #     engine = create_engine(f'postgresql+psycopg://{user}:{pw}@{host}:{port}/datapipeline')
-    #     return dbserver, engine
-    
-    def connect_to_mysql(self, pw, user='root', host='localhost', port='3306', create_datapipeline=False):
+    def select_city_data(self, data, cities, start_date=None, end_date=None):
         """
-        Connect to MySQL and optionally create the `datapipeline` database.
-        
+        Selects the rows of one or more cities within an inclusive date range.
+
         Args:
-            pw (str): MySQL root password.
-            user (str): MySQL username.
-            host (str): MySQL host address.
-            port (str): MySQL port number.
-            create_datapipeline (bool): Whether to drop and create the `datapipeline` database.
+            data (pd.DataFrame or WeatherStore): Daily or hourly weather data.
+            cities (str or list): Name of the city, or a list of city names.
+            start_date (str): Start date (YYYY-MM-DD), or None for no lower bound.
+            end_date (str): End date (YYYY-MM-DD), or None for no upper bound.
 
         Returns:
-            dbserver: pymysql connection object.
-            engine: SQLAlchemy engine for MySQL.
+            pd.DataFrame: Rows for the selected cities and date range.
         """
-        # Connect to MySQL server
-        dbserver = pymysql.connect(
-            user=user,
-            password=pw,
-            host=host,
-            port=int(port),
-            database=None  # Connect to MySQL without specifying a database
-        )
+        city_list = [cities] if isinstance(cities, str) else list(cities)
+
+        # Indexed lookup when the data is held in a WeatherStore
+        if isinstance(data, WeatherStore):
+            if len(city_list) == 1:
+                return data.select(city_list[0], start_date, end_date)
+            return data.select_cities(city_list, start_date, end_date)
+
+        mask = data['name'].isin(city_list)
+        if start_date is not None:
+            mask &= data['date'] >= start_date
+        if end_date is not None:
+            mask &= data['date'] <= end_date
+        return data[mask]
+
+    def as_frame(self, data):
+        """
+        Returns the underlying DataFrame of a WeatherStore, or the data unchanged.
 
-        # Autocommit to allow database creation
-        dbserver.autocommit(True)
+        Args:
+            data (pd.DataFrame or WeatherStore): Weather data.
 
-        if create_datapipeline:
-            cursor = dbserver.cursor()
-            cursor.execute("DROP DATABASE IF EXISTS datapipeline")
-            cursor.execute("CREATE DATABASE datapipeline")
-            print("Database `datapipeline` created successfully in MySQL.")
+        Returns:
+            pd.DataFrame: The full weather table.
+        """
+        return data.data if isinstance(data, WeatherStore) else data
 
-        # Create SQLAlchemy engine for the newly created database
-        engine = create_engine(f'mysql+pymysql://{user}:{pw}@{host}:{port}/datapipeline')
-        return dbserver, engine   
-    
-    def make_dailydata_df(self, daily_data, engine):
-        daily_data.columns = daily_data.columns.str.lower()
-        daily_data.to_sql('dailydata', con=engine, index=False, chunksize=1000, if_exists='replace')
-    
-    def make_hourlydata_df(self, hourly_data, engine):
-        hourly_data.columns = hourly_data.columns.str.lower()
-        hourly_data.to_sql('hourlydata', con=engine, index=False, chunksize=1000, if_exists='replace')
-    
-    def make_constants_df(self, constants, engine):
-        constants.columns = constants.columns.str.lower()
-        constants.to_sql('constants', con=engine, index=False, chunksize=1000, if_exists='replace')
-    
-    ### Analysis ###
+    def set_plot_options(self, max_points=None, method=None, max_heatmap_rows=None, use_webgl=None):
+        """
+        Changes the point budgets and trace type of the figures and drops the cached figures.
+        Arguments left as None keep their current value.
+
+        Args:
+            max_points (int): Maximum points per line trace; 0 disables downsampling.
+            method (str): Line downsampling method, 'lttb' or 'minmax'.
+            max_heatmap_rows (int): Maximum date rows of the wind heatmap; 0 disables bucketing.
+            use_webgl (bool): Whether line traces are drawn with WebGL (go.Scattergl).
+        """
+        if max_points is not None:
+            self.max_points = max_points or None
+        if method is not None:
+            self.downsample_method = method
+        if max_heatmap_rows is not None:
+            self.max_heatmap_rows = max_heatmap_rows or None
+        if use_webgl is not None:
+            self.use_webgl = use_webgl
+        self.figure_cache.clear()
+
+    def line_trace(self, data, x_column, y_column, **kwargs):
+        """
+        Builds a line trace downsampled to the point budget.
+
+        Args:
+            data (pd.DataFrame): Rows sorted by x_column.
+            x_column (str): Name of the x column.
+            y_column (str): Name of the y column.
+            **kwargs: Further trace properties (mode, name, line, ...).
 
+        Returns:
+            go.Scatter or go.Scattergl: The trace.
+        """
+        points = downsample(data, x_column, y_column, self.max_points, method=self.downsample_method)
+        trace_type = go.Scattergl if self.use_webgl else go.Scatter
+        return trace_type(x=points[x_column], y=points[y_column], **kwargs)
+
+    @cached_figure
     def plot_basic_weather(self, daily_data, selected_city, start_date, end_date, selected_variable):
         """
         Generates a line plot for the selected variable or group of variables in the specified date range and city.
 
         Args:
-            daily_data (pd.DataFrame): The DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): The DataFrame containing daily weather data.
             selected_city (str): The name of the city.
             start_date (str): The starting date in 'YYYY-MM-DD' format.
             end_date (str): The ending date in 'YYYY-MM-DD' format.
@@ -396,14 +2026,10 @@ class DataPipeline:
             go.Figure: A Plotly figure object for the graph.
         """
         # Filter data for the selected city and date range
-        filtered_data = daily_data[
-            (daily_data['name'] == selected_city) &
-            (daily_data['date'] >= start_date) &
-            (daily_data['date'] <= end_date)
-        ]
+        filtered_data = self.select_city_data(daily_data, selected_city, start_date, end_date)
 
         # Ensure the date column is properly formatted
-        filtered_data['date'] = pd.to_datetime(filtered_data['date'])
+        filtered_data = filtered_data.assign(date=pd.to_datetime(filtered_data['date']))
 
         # Define variable groups
         variable_groups = {
@@ -423,9 +2049,8 @@ class DataPipeline:
 
         for variable in variables_to_plot:
             if variable in filtered_data.columns:
-                fig.add_trace(go.Scatter(
-                    x=filtered_data['date'],  # X-axis: Dates
-                    y=filtered_data[variable],  # Y-axis: Variable data
+                fig.add_trace(self.line_trace(
+                    filtered_data, 'date', variable,  # X-axis: Dates, Y-axis: Variable data
                     mode='lines+markers',  # Line plot with markers
                     name=variable.capitalize(),  # Legend entry
                     line=dict(width=2),  # Customize line style
@@ -445,12 +2070,93 @@ class DataPipeline:
 
         return fig
 
+    def wind_speed_direction(self, u10, v10):
+        """
+        Computes wind speed and the direction the wind blows from out of the 10 m wind components.
+
+        Args:
+            u10 (array-like): Eastward wind component (m/s).
+            v10 (array-like): Northward wind component (m/s).
+
+        Returns:
+            tuple: (speed in m/s, meteorological direction in degrees, 0 = from the north) as NumPy arrays.
+        """
+        u = np.asarray(u10, dtype=np.float64)
+        v = np.asarray(v10, dtype=np.float64)
+        speed = np.hypot(u, v)
+        direction = np.mod(180.0 + np.degrees(np.arctan2(u, v)), 360.0)
+        return speed, direction
+
+    def hour_matrix(self, dates, hours, values):
+        """
+        Averages values into a dense date x hour-of-day matrix.
+
+        Args:
+            dates (pd.Series): Date (or date bucket) of each value.
+            hours (array-like): Hour of day (0-23) of each value.
+            values (np.ndarray): Values to average; NaNs are ignored.
+
+        Returns:
+            tuple: (matrix of shape (n_dates, 24) with NaN for empty cells, sorted pd.DatetimeIndex of its rows)
+        """
+        codes, row_dates = pd.factorize(dates, sort=True)
+        cells = codes * 24 + np.asarray(hours, dtype=np.int64)
+        valid = ~np.isnan(values)
+
+        n_cells = len(row_dates) * 24
+        sums = np.bincount(cells[valid], weights=values[valid], minlength=n_cells)
+        counts = np.bincount(cells[valid], minlength=n_cells)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matrix = np.where(counts > 0, sums / counts, np.nan)
+        return matrix.reshape(len(row_dates), 24), pd.DatetimeIndex(row_dates)
+
+    @cached_figure
+    def wind_rose_bins(self, hourly_data, selected_city, start_date=None, end_date=None, n_sectors=16,
+                       speed_bins=(0, 2, 4, 6, 8, 10, np.inf)):
+        """
+        Frequency of hourly winds by direction sector and speed band, ready for a wind rose (go.Barpolar).
+
+        Args:
+            hourly_data (pd.DataFrame or WeatherStore): DataFrame containing hourly weather data.
+            selected_city (str): Name of the city.
+            start_date (str): Start date (YYYY-MM-DD), or None for the first record.
+            end_date (str): End date (YYYY-MM-DD), or None for the last record.
+            n_sectors (int): Number of direction sectors, centered on north.
+            speed_bins (tuple): Edges of the speed bands in m/s.
+
+        Returns:
+            pd.DataFrame: One row per sector and speed band with 'direction' (sector center in degrees),
+                'speed' (band label), 'count' and 'frequency' (percent of all hours).
+        """
+        filtered_data = self.select_city_data(hourly_data, selected_city, start_date, end_date)
+        speed, direction = self.wind_speed_direction(filtered_data['u10'], filtered_data['v10'])
+        valid = ~(np.isnan(speed) | np.isnan(direction))
+        speed, direction = speed[valid], direction[valid]
+
+        # Sector 0 spans north +/- half a sector
+        width = 360.0 / n_sectors
+        sectors = (np.floor((direction + width / 2) / width) % n_sectors).astype(np.int64)
+        edges = np.asarray(speed_bins, dtype=np.float64)
+        bands = np.clip(np.searchsorted(edges, speed, side='right') - 1, 0, len(edges) - 2)
+
+        n_bands = len(edges) - 1
+        counts = np.bincount(sectors * n_bands + bands, minlength=n_sectors * n_bands)
+        labels = [f"{lo:g}-{hi:g}" if np.isfinite(hi) else f">{lo:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+
+        return pd.DataFrame({
+            'direction': np.repeat(np.arange(n_sectors) * width, n_bands),
+            'speed': np.tile(labels, n_sectors),
+            'count': counts,
+            'frequency': counts / max(len(speed), 1) * 100,
+        })
+
+    @cached_figure
     def plot_wind_heatmap(self, hourly_data, selected_city, start_date, end_date):
         """
         Generates a heatmap for hourly wind speed patterns.
 
         Args:
-            hourly_data (pd.DataFrame): DataFrame containing hourly weather data.
+            hourly_data (pd.DataFrame or WeatherStore): DataFrame containing hourly weather data.
             selected_city (str): Name of the city.
             start_date (str): Start date (YYYY-MM-DD).
             end_date (str): End date (YYYY-MM-DD).
@@ -459,11 +2165,7 @@ class DataPipeline:
             go.Figure: A Plotly figure object for wind speed heatmap.
         """
         # Filter data for the selected city and date range
-        filtered_data = hourly_data[
-            (hourly_data['name'] == selected_city) &
-            (hourly_data['date'] >= start_date) &
-            (hourly_data['date'] <= end_date)
-        ]
+        filtered_data = self.select_city_data(hourly_data, selected_city, start_date, end_date)
 
         if filtered_data.empty:
             print("No data available for the selected city and date range.")
@@ -471,23 +2173,29 @@ class DataPipeline:
 
         # Calculate wind speed from u10 and v10
         if 'u10' in filtered_data.columns and 'v10' in filtered_data.columns:
-            filtered_data['wind_speed'] = np.sqrt(filtered_data['u10'] ** 2 + filtered_data['v10'] ** 2)
+            wind_speed, _ = self.wind_speed_direction(filtered_data['u10'], filtered_data['v10'])
         else:
             print("No wind data available.")
             return go.Figure()
 
+        # Average long ranges into multi-day buckets so the heatmap stays within max_heatmap_rows
+        dates = bucket_dates(pd.to_datetime(filtered_data['date']), self.max_heatmap_rows)
+
+        # Pivot into a date x hour matrix so the figure carries one z value per cell
+        z, row_dates = self.hour_matrix(dates, filtered_data['hour'], wind_speed)
+
         # Create the wind speed heatmap
         fig = go.Figure(data=go.Heatmap(
-            x=filtered_data['time'],  # Use 'time' directly
-            y=filtered_data['date'],
-            z=filtered_data['wind_speed'],
+            x=np.arange(24),
+            y=row_dates.strftime('%Y-%m-%d'),
+            z=np.round(z, 2),
             colorscale='Viridis',
             colorbar=dict(title="Wind Speed (m/s)")
         ))
 
         fig.update_layout(
             title=f"Hourly Wind Speed Heatmap in {selected_city}",
-            xaxis_title="Time",
+            xaxis_title="Hour of Day",
             yaxis_title="Date",
             font=dict(size=12),
             plot_bgcolor='white'
@@ -495,12 +2203,54 @@ class DataPipeline:
 
         return fig
     
+    def hourly_profile(self, hourly_data, selected_city, start_date, end_date):
+        """
+        Mean t2m per hour of day for a city and inclusive date range.
+        Whole months are read from the 'hourlyrollup' table when it was built from hourly_data; only the partial months at the edges are scanned.
+
+        Args:
+            hourly_data (pd.DataFrame or WeatherStore): DataFrame containing hourly weather data.
+            selected_city (str): Name of the city.
+            start_date (str): Start date (YYYY-MM-DD).
+            end_date (str): End date (YYYY-MM-DD).
+
+        Returns:
+            pd.Series: Mean temperature indexed by hour.
+        """
+        rollup = self.rollup('hourlyrollup', hourly_data)
+        if rollup is None:
+            filtered_data = self.select_city_data(hourly_data, selected_city, start_date, end_date)
+            return filtered_data.groupby('hour')['t2m'].mean()
+
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        months = rollup[
+            (rollup['name'] == selected_city) &
+            (rollup['month'] >= start) &
+            (rollup['month'] + pd.offsets.MonthEnd(0) <= end)
+        ]
+        if months.empty:
+            filtered_data = self.select_city_data(hourly_data, selected_city, start_date, end_date)
+            return filtered_data.groupby('hour')['t2m'].mean()
+
+        # Raw rows only for the days before the first and after the last whole month
+        first_month = months['month'].min()
+        last_month_end = months['month'].max() + pd.offsets.MonthEnd(0)
+        edges = pd.concat([
+            self.select_city_data(hourly_data, selected_city, start, first_month - pd.Timedelta(days=1)),
+            self.select_city_data(hourly_data, selected_city, last_month_end + pd.Timedelta(days=1), end)
+        ])
+
+        sums = months.groupby('hour')['t2m_sum'].sum().add(edges.groupby('hour')['t2m'].sum(), fill_value=0)
+        counts = months.groupby('hour')['t2m_count'].sum().add(edges.groupby('hour')['t2m'].count(), fill_value=0)
+        return sums / counts
+
+    @cached_figure
     def plot_hourly_temperature(self, hourly_data, selected_city, start_date, end_date):
         """
         Generates a plot for diurnal temperature patterns.
 
         Args:
-            hourly_data (pd.DataFrame): DataFrame containing hourly weather data.
+            hourly_data (pd.DataFrame or WeatherStore): DataFrame containing hourly weather data.
             selected_city (str): Name of the city.
             start_date (str): Start date (YYYY-MM-DD).
             end_date (str): End date (YYYY-MM-DD).
@@ -508,14 +2258,8 @@ class DataPipeline:
         Returns:
             go.Figure: A Plotly figure object for hourly temperature.
         """
-        # Filter data for the selected city and date range
-        filtered_data = hourly_data[
-            (hourly_data['name'] == selected_city) &
-            (hourly_data['date'] >= start_date) &
-            (hourly_data['date'] <= end_date)
-        ]
-
-        hourly_averages = filtered_data.groupby('time')['t2m'].mean()
+        # Mean temperature per hour of day for the selected city and date range
+        hourly_averages = self.hourly_profile(hourly_data, selected_city, start_date, end_date)
 
         # Create the temperature plot
         fig = go.Figure()
@@ -538,18 +2282,101 @@ class DataPipeline:
 
         return fig
     
+    @cached_figure
+    def regression_fits(self, daily_data, x_column, y_column):
+        """
+        Fits y_column against x_column for every city at once.
+        Cached per dataset version, so the analysis figures only look up their city.
+
+        Args:
+            daily_data (pd.DataFrame or WeatherStore): Daily weather data.
+            x_column (str): Name of the x column.
+            y_column (str): Name of the y column.
+
+        Returns:
+            pd.DataFrame: 'slope', 'intercept', 'r2', 'n', 'x_min' and 'x_max' indexed by city.
+        """
+        return linear_fits(self.as_frame(daily_data), x_column, y_column)
+
+    @cached_figure
+    def seasonal_statistics(self, daily_data, columns=('temp', 'precip', 'humidity')):
+        """
+        Seasonal mean, standard deviation, minimum and maximum of the given columns for every city,
+        cached per dataset version.
+
+        Args:
+            daily_data (pd.DataFrame or WeatherStore): Daily weather data.
+            columns (tuple): Names of the numeric columns.
+
+        Returns:
+            pd.DataFrame: One row per city and season; see weatherstats.seasonal_stats.
+        """
+        data = self.as_frame(daily_data)
+        return seasonal_stats(data, columns, self.season_names(data['date']))
+
+    def regression_trace(self, fits, selected_city):
+        """
+        Builds the regression line of one city from precomputed fits.
+
+        Args:
+            fits (pd.DataFrame): Result of regression_fits.
+            selected_city (str): Name of the city.
+
+        Returns:
+            go.Scatter: The line across the city's x range, or None if there is no fit for the city.
+        """
+        if selected_city not in fits.index or np.isnan(fits.at[selected_city, 'slope']):
+            return None
+        fit = fits.loc[selected_city]
+        x = np.array([fit['x_min'], fit['x_max']])
+        return go.Scatter(
+            x=x,
+            y=fit['slope'] * x + fit['intercept'],
+            mode='lines',
+            name=f"Regression Line (R² = {fit['r2']:.2f})",
+            line=dict(color='red', dash='dash')
+        )
+
+    def warm_up_analysis(self, daily_data, constants, cities=None, max_workers=2):
+        """
+        Precomputes the Overall Analysis figures of every city into the figure cache on background threads.
+        Requests for a figure that is still being computed wait for it instead of computing it again.
+
+        Args:
+            daily_data (pd.DataFrame or WeatherStore): Daily weather data.
+            constants (pd.DataFrame): City constants.
+            cities (list): City names. Defaults to the cities in self.target_coords.
+            max_workers (int): Number of threads computing figures.
+
+        Returns:
+            list: Futures of the figures, in submission order.
+        """
+        if cities is None:
+            cities = [coord['name'] for coord in self.target_coords]
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-warm-up')
+
+        # The slowest figure first; it is the same for every city
+        futures = [executor.submit(self.geographical_insights, constants, daily_data)]
+        for city in cities:
+            for method in [self.impact_of_humidity_on_temperature, self.cloud_cover_vs_solar_radiation,
+                           self.seasonal_analysis, self.extreme_weather_analysis]:
+                futures.append(executor.submit(method, daily_data, city))
+        executor.shutdown(wait=False)
+        return futures
+
+    @cached_figure
     def impact_of_humidity_on_temperature(self, daily_data, selected_city):
         """
         Explore the relationship between humidity and temperature for the selected city.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             selected_city (str): Name of the city.
 
         Returns:
             go.Figure: Scatter plot of humidity vs. temperature with regression line.
         """
-        city_data = daily_data[daily_data['name'] == selected_city]
+        city_data = self.select_city_data(daily_data, selected_city)
 
         fig = go.Figure()
 
@@ -562,17 +2389,10 @@ class DataPipeline:
             marker=dict(color='blue', size=8, opacity=0.6)
         ))
 
-        # Fit regression line
-        if not city_data.empty:
-            slope, intercept = np.polyfit(city_data['humidity'], city_data['temp'], 1)
-            regression_line = slope * city_data['humidity'] + intercept
-            fig.add_trace(go.Scatter(
-                x=city_data['humidity'],
-                y=regression_line,
-                mode='lines',
-                name='Regression Line',
-                line=dict(color='red', dash='dash')
-            ))
+        # Regression line from the fits of all cities
+        regression_line = self.regression_trace(self.regression_fits(daily_data, 'humidity', 'temp'), selected_city)
+        if regression_line is not None:
+            fig.add_trace(regression_line)
 
         fig.update_layout(
             title=f"Impact of Humidity on Temperature in {selected_city}",
@@ -584,19 +2404,20 @@ class DataPipeline:
 
         return fig
 
+    @cached_figure
     def cloud_cover_vs_solar_radiation(self, daily_data, selected_city):
         """
         Scatter plot of cloud cover vs. solar radiation for the selected city with a regression line.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             selected_city (str): Name of the selected city.
 
         Returns:
             go.Figure: Scatter plot for cloud cover vs solar radiation with regression line.
         """
         # Filter data for the selected city
-        city_data = daily_data[daily_data['name'] == selected_city]
+        city_data = self.select_city_data(daily_data, selected_city)
 
         fig = go.Figure()
 
@@ -609,17 +2430,10 @@ class DataPipeline:
             marker=dict(size=8, opacity=0.6)
         ))
 
-        # Add regression line
-        if not city_data.empty:
-            slope, intercept = np.polyfit(city_data['cloudcover'], city_data['solarradiation'], 1)
-            regression_line = slope * city_data['cloudcover'] + intercept
-            fig.add_trace(go.Scatter(
-                x=city_data['cloudcover'],
-                y=regression_line,
-                mode='lines',
-                name='Regression Line',
-                line=dict(color='red', dash='dash')
-            ))
+        # Add regression line from the fits of all cities
+        regression_line = self.regression_trace(self.regression_fits(daily_data, 'cloudcover', 'solarradiation'), selected_city)
+        if regression_line is not None:
+            fig.add_trace(regression_line)
 
         # Update layout
         fig.update_layout(
@@ -632,29 +2446,26 @@ class DataPipeline:
 
         return fig
 
+    @cached_figure
     def seasonal_analysis(self, daily_data, selected_city):
         """
         Bar chart showing seasonal averages for temperature, precipitation, and humidity for the selected city.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             selected_city (str): Name of the selected city.
 
         Returns:
             go.Figure: Bar chart for seasonal analysis.
         """
-        # Define a mapping for season numbers to names
-        season_mapping = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'}
-
-        # Filter data for the selected city
-        city_data = daily_data[daily_data['name'] == selected_city]
-        city_data['season'] = pd.to_datetime(city_data['date']).dt.month % 12 // 3 + 1
-
-        # Replace season numbers with season names
-        city_data['season'] = city_data['season'].map(season_mapping)
-
-        # Calculate seasonal averages
-        seasonal_averages = city_data.groupby('season')[['temp', 'precip', 'humidity']].mean().reset_index()
+        rollup = self.rollup('seasonalrollup', daily_data)
+        if rollup is not None:
+            # Read the precomputed seasonal averages
+            seasonal_averages = rollup[rollup['name'] == selected_city]
+        else:
+            # Look up the city in the seasonal statistics of all cities
+            statistics = self.seasonal_statistics(daily_data)
+            seasonal_averages = statistics[statistics['name'] == selected_city]
 
         # Create bar chart
         fig = go.Figure()
@@ -678,22 +2489,27 @@ class DataPipeline:
 
         return fig
 
+    @cached_figure
     def extreme_weather_analysis(self, daily_data, selected_city):
         """
         Heatmap showing the frequency of extreme weather events for the selected city.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             selected_city (str): Name of the selected city.
 
         Returns:
             go.Figure: Heatmap for extreme weather events.
         """
-        city_data = daily_data[daily_data['name'] == selected_city]
-        city_data['extreme_temp'] = (city_data['tempmax'] > 35) | (city_data['tempmin'] < -10)
-        city_data['extreme_precip'] = city_data['precip'] > 50
+        rollup = self.rollup('extremerollup', daily_data)
+        if rollup is not None:
+            # Read the precomputed daily extreme-event flags
+            extreme_events = self.select_city_data(rollup, selected_city)
+        else:
+            city_data = self.select_city_data(daily_data, selected_city)
+            city_data = pd.concat([city_data[['date']], self.extreme_flags(city_data)], axis=1)
 
-        extreme_events = city_data.groupby('date')[['extreme_temp', 'extreme_precip']].sum().reset_index()
+            extreme_events = city_data.groupby('date')[['extreme_temp', 'extreme_precip']].sum().reset_index()
 
         fig = go.Figure(data=go.Heatmap(
             x=extreme_events['date'],
@@ -712,20 +2528,24 @@ class DataPipeline:
 
         return fig
 
+    @cached_figure
     def geographical_insights(self, constants, daily_data):
         """
         Scatter plot matrix showing relationships between geographical and weather variables across all cities.
 
         Args:
             constants (pd.DataFrame): DataFrame containing geographical data.
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
 
         Returns:
             go.Figure: Scatter plot matrix for geographical insights.
         """
         # Select only numeric columns for mean calculation
         numeric_columns = ['temp', 'precip', 'windspeedmean']
-        aggregated_data = daily_data.groupby('name')[numeric_columns].mean().reset_index()
+        aggregated_data = self.rollup('cityrollup', daily_data)
+        if aggregated_data is None:
+            daily_data = self.as_frame(daily_data)
+            aggregated_data = daily_data.groupby('name', observed=True)[numeric_columns].mean().reset_index()
 
         # Merge geographical and weather data for all cities
         combined_data = constants.merge(aggregated_data, on='name', how='inner')
@@ -766,7 +2586,7 @@ class DataPipeline:
         Build a detailed table comparing weather data for two cities over a specific date range.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             city1 (str): Name of the first city.
             city2 (str): Name of the second city.
             start_date (str): Start date (YYYY-MM-DD).
@@ -776,11 +2596,7 @@ class DataPipeline:
             pd.DataFrame: Detailed comparison table.
         """
         # Filter data for the selected cities and date range
-        filtered_data = daily_data[
-            (daily_data['name'].isin([city1, city2])) &
-            (daily_data['date'] >= start_date) &
-            (daily_data['date'] <= end_date)
-        ]
+        filtered_data = self.select_city_data(daily_data, [city1, city2], start_date, end_date)
 
         # Initialize an empty list to store city-specific data
         rows = []
@@ -806,12 +2622,13 @@ class DataPipeline:
 
         return comparison_data
 
+    @cached_figure
     def build_comparison_graph(self, daily_data, city1, city2, start_date, end_date):
         """
         Build a graph comparing weather trends for two cities over a specific date range.
 
         Args:
-            daily_data (pd.DataFrame): DataFrame containing daily weather data.
+            daily_data (pd.DataFrame or WeatherStore): DataFrame containing daily weather data.
             city1 (str): Name of the first city.
             city2 (str): Name of the second city.
             start_date (str): Start date (YYYY-MM-DD).
@@ -821,20 +2638,15 @@ class DataPipeline:
             go.Figure: A Plotly figure comparing weather trends.
         """
         # Filter data for the selected cities and date range
-        filtered_data = daily_data[
-            (daily_data['name'].isin([city1, city2])) &
-            (daily_data['date'] >= start_date) &
-            (daily_data['date'] <= end_date)
-        ]
+        filtered_data = self.select_city_data(daily_data, [city1, city2], start_date, end_date)
 
         # Create line plot for temperature trends
         fig = go.Figure()
 
         for city in [city1, city2]:
             city_data = filtered_data[filtered_data['name'] == city]
-            fig.add_trace(go.Scatter(
-                x=city_data['date'],
-                y=city_data['temp'],
+            fig.add_trace(self.line_trace(
+                city_data, 'date', 'temp',
                 mode='lines+markers',
                 name=f"{city} - Temperature",
                 line=dict(width=2)
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+
+def as_numeric(x):
+    """
+    Returns x as a float array; datetimes become nanoseconds since the epoch.
+
+    Args:
+        x (array-like): Numeric or datetime values.
+
+    Returns:
+        np.ndarray: Float values in the same order.
+    """
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets selection of the points that best keep the shape of a line.
+
+    The first and last points are always kept; each bucket in between contributes the point
+    forming the largest triangle with the previously kept point and the next bucket's mean.
+
+    Args:
+        x (array-like): Sorted x values (numeric or datetime).
+        y (array-like): y values, without NaNs.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points; all of them when n <= n_out.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        # Too few points for a bucket between the first and last
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    x = as_numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    # Mean of each bucket; bucket i is scored against the mean of bucket i + 1,
+    # and the last bucket against the last point
+    sizes = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])[1:]
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])[1:]
+
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[previous] - mean_x[i]) * (y[lo:hi] - y[previous]) -
+            (x[previous] - x[lo:hi]) * (mean_y[i] - y[previous])
+        )
+        previous = lo + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max bucketing: keeps the first and last point, and the lowest and highest point of each of
+    (n_out - 2) // 2 buckets in between, so peaks and troughs survive decimation.
+
+    Args:
+        y (array-like): y values, without NaNs.
+        n_out (int): Maximum number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points; all of them when n <= n_out.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = (n_out - 2) // 2
+    if n_buckets < 1:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # Buckets of the points between the first and last, whose positions start at 1
+    buckets = np.arange(n - 2) * n_buckets // (n - 2)
+    series = pd.Series(np.asarray(y, dtype=np.float64)[1:n - 1], index=np.arange(1, n - 1))
+    grouped = series.groupby(buckets)
+    kept = np.concatenate([[0], grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy(), [n - 1]])
+    return np.unique(kept)
+
+
+def downsample(data, x_column, y_column, max_points, method='lttb'):
+    """
+    Reduces one series to at most max_points rows for plotting.
+    Rows with a missing y are dropped first; data at or under the budget is returned unchanged.
+
+    Args:
+        data (pd.DataFrame): Rows sorted by x_column.
+        x_column (str): Name of the x column.
+        y_column (str): Name of the y column.
+        max_points (int): Point budget, or None for no limit.
+        method (str): 'lttb' or 'minmax'.
+
+    Returns:
+        pd.DataFrame: The x and y columns of the kept rows.
+    """
+    series = data[[x_column, y_column]]
+    if max_points is None or len(series) <= max_points:
+        return series
+
+    series = series.dropna(subset=[y_column])
+    if method == 'minmax':
+        kept = minmax_indices(series[y_column].to_numpy(), max_points)
+    elif method == 'lttb':
+        kept = lttb_indices(series[x_column].to_numpy(), series[y_column].to_numpy(), max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return series.iloc[kept]
+
+
+def bucket_dates(dates, n_rows):
+    """
+    Floors dates to equal-width buckets of whole days so that at most about n_rows buckets remain.
+
+    Args:
+        dates (pd.Series): Datetime values.
+        n_rows (int): Maximum number of distinct buckets wanted, or None for no limit.
+
+    Returns:
+        pd.Series: The bucket start of each date (the dates unchanged when already within n_rows).
+    """
+    if n_rows is None or dates.empty:
+        return dates
+    first, last = dates.min(), dates.max()
+    n_days = (last - first).days + 1
+    if n_days <= n_rows:
+        return dates
+    days_per_bucket = -(-n_days // n_rows)
+    offsets = (dates - first).dt.days // days_per_bucket * days_per_bucket
+    return first + pd.to_timedelta(offsets, unit='D')
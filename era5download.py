@@ -0,0 +1,203 @@
+import calendar
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from lazyimport import LazyModule
+from pipelinegraph import atomic_write, file_digest
+from retries import retry_with_backoff
+
+cdsapi = LazyModule('cdsapi')
+
+ERA5_DATASET = "reanalysis-era5-land"
+ERA5_VARIABLES = [
+    "2m_temperature",
+    "skin_temperature",
+    "10m_u_component_of_wind",
+    "10m_v_component_of_wind",
+    "surface_pressure",
+    "total_precipitation",
+    # Constant fields of each grid cell, read by make_constants_tabel
+    "geopotential",
+    "land_sea_mask"
+]
+
+
+def city_regions(target_coords, padding=0.5):
+    """
+    One small download box around each city, so a multi-city request does not fetch the grid between them.
+
+    Args:
+        target_coords (list): Dicts with 'name', 'latitude' and 'longitude', e.g. DataPipeline.target_coords.
+        padding (float): Degrees added on every side of the city.
+
+    Returns:
+        dict: Region name to CDS area [north, west, south, east].
+    """
+    return {
+        city["name"]: [round(city["latitude"] + padding, 2), round(city["longitude"] - padding, 2),
+                       round(city["latitude"] - padding, 2), round(city["longitude"] + padding, 2)]
+        for city in target_coords
+    }
+
+
+def month_jobs(start, end, regions, variables=None, times=("00:00", "12:00"), dataset=ERA5_DATASET):
+    """
+    Splits a multi-month, multi-region request into one CDS request per month and region.
+
+    Args:
+        start (str): First month, e.g. '2023-01'.
+        end (str): Last month, inclusive.
+        regions (dict): Region name to CDS area [north, west, south, east].
+        variables (list): CDS variable names. Defaults to ERA5_VARIABLES.
+        times (tuple): Hours of each day, e.g. ('00:00', '12:00').
+        dataset (str): CDS dataset name.
+
+    Returns:
+        list: Jobs with 'dataset', 'request' and 'target' (file name), ordered by month and then region.
+    """
+    variables = list(variables or ERA5_VARIABLES)
+    jobs = []
+    for month in pd.period_range(start, end, freq="M"):
+        days = calendar.monthrange(month.year, month.month)[1]
+        for region, area in regions.items():
+            request = {
+                "variable": variables,
+                "year": f"{month.year}",
+                "month": f"{month.month:02d}",
+                "day": [f"{day:02d}" for day in range(1, days + 1)],
+                "time": list(times),
+                "data_format": "grib",
+                "download_format": "unarchived",
+                "area": list(area)
+            }
+            jobs.append({"dataset": dataset, "request": request,
+                         "target": f"{dataset}_{region}_{month.year}{month.month:02d}.grib"})
+    return jobs
+
+
+def request_digest(dataset, request):
+    """
+    Hash of a request, so a file is downloaded again when what was asked for changes.
+    """
+    return hashlib.sha256(json.dumps([dataset, request], sort_keys=True).encode()).hexdigest()
+
+
+class DownloadManager:
+    """
+    Runs CDS download jobs on a bounded thread pool and records finished files in a manifest.
+
+    The manifest keeps each file's request hash and SHA-256, and is rewritten after every finished
+    download. An interrupted run therefore resumes where it stopped, and a file is only skipped
+    if it is still on disk with the recorded checksum.
+    """
+
+    def __init__(self, directory="data", manifest_name="era5_manifest.json", max_workers=4,
+                 client_factory=None, retries=2, backoff=30.0):
+        """
+        Args:
+            directory (str): Directory the GRIB files and the manifest are written to.
+            manifest_name (str): File name of the manifest inside directory.
+            max_workers (int): Maximum number of requests running at once. The CDS queues requests per user,
+                so a few are enough.
+            client_factory (callable): Returns a client with retrieve(dataset, request, target).
+                Defaults to cdsapi.Client; pass a stand-in to run without the CDS.
+            retries (int): Number of attempts per job before giving up.
+            backoff (float): Base delay in seconds, doubled after each failed attempt.
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, manifest_name)
+        self.max_workers = max_workers
+        self.client_factory = client_factory or (lambda: cdsapi.Client())
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def save_manifest(self):
+        with atomic_write(self.manifest_path) as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+    def client(self):
+        # One client per worker thread
+        if not hasattr(self._local, "client"):
+            self._local.client = self.client_factory()
+        return self._local.client
+
+    def is_complete(self, job):
+        """
+        Whether a job's file is on disk, was downloaded for the same request and still has its recorded checksum.
+        """
+        entry = self.manifest.get(job["target"])
+        path = os.path.join(self.directory, job["target"])
+        if entry is None or not os.path.exists(path):
+            return False
+        if entry["request"] != request_digest(job["dataset"], job["request"]):
+            return False
+        return file_digest(path) == entry["sha256"]
+
+    def download(self, job):
+        """
+        Downloads one job to a temporary file and moves it into place once complete.
+
+        Returns:
+            str: Path of the downloaded file, or None if every attempt failed.
+        """
+        path = os.path.join(self.directory, job["target"])
+        part_path = path + ".part"
+
+        def retrieve():
+            self.client().retrieve(job["dataset"], job["request"], part_path)
+            os.replace(part_path, path)
+            return path
+
+        if retry_with_backoff(retrieve, self.retries, self.backoff, f"downloading {job['target']}") is None:
+            return None
+
+        with self._lock:
+            self.manifest[job["target"]] = {
+                "request": request_digest(job["dataset"], job["request"]),
+                "sha256": file_digest(path),
+                "size": os.path.getsize(path),
+                "downloaded": pd.Timestamp.now().isoformat(timespec="seconds")
+            }
+            self.save_manifest()
+        return path
+
+    def run(self, jobs):
+        """
+        Downloads the jobs that are not complete yet.
+
+        Args:
+            jobs (list): Jobs from month_jobs.
+
+        Returns:
+            list: Paths of the files of all complete jobs, in job order. Failed jobs are left out
+                and are retried on the next run.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        pending = [job for job in jobs if not self.is_complete(job)]
+        print(f"{len(jobs) - len(pending)} of {len(jobs)} GRIB files already downloaded")
+
+        failed = set()
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="era5-download") as executor:
+                futures = {executor.submit(self.download, job): job for job in pending}
+                for future in as_completed(futures):
+                    if future.result() is None:
+                        failed.add(futures[future]["target"])
+        if failed:
+            print(f"{len(failed)} downloads failed: {sorted(failed)}")
+
+        return [os.path.join(self.directory, job["target"]) for job in jobs if job["target"] not in failed]
@@ -0,0 +1,177 @@
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from weatherstore import WeatherStore
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of figures keyed by (method, arguments, dataset version).
+
+    WeatherStore arguments are keyed by their version and DataFrame arguments by
+    object identity, so entries built from data that has since been reloaded or
+    garbage-collected are never returned.
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        Args:
+            maxsize (int): Maximum number of figures kept before the least recently used is evicted.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tracked_frames = set()
+        self._pending = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def make_key(self, name, args, kwargs):
+        """
+        Builds a hashable cache key, replacing datasets with version tokens.
+
+        Args:
+            name (str): Name of the cached method.
+            args (tuple): Positional arguments of the call.
+            kwargs (dict): Keyword arguments of the call.
+
+        Returns:
+            tuple: The cache key.
+        """
+        tokens = tuple(self.token(arg) for arg in args)
+        kw_tokens = tuple(sorted((key, self.token(value)) for key, value in kwargs.items()))
+        return (name, tokens, kw_tokens)
+
+    def token(self, value):
+        """
+        Returns a hashable stand-in for one argument.
+
+        Args:
+            value: Argument passed to the cached method.
+
+        Returns:
+            Hashable token identifying the argument.
+        """
+        if isinstance(value, WeatherStore):
+            return ('store', value.version)
+        if isinstance(value, pd.DataFrame):
+            token = ('frame', id(value))
+            if token not in self._tracked_frames:
+                # Drop the frame's entries once it is garbage-collected so its id can be reused safely
+                self._tracked_frames.add(token)
+                weakref.finalize(value, self.forget, token)
+            return token
+        if isinstance(value, list):
+            return ('list', tuple(self.token(item) for item in value))
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached figure for key, computing and storing it on a miss.
+        A caller asking for a key that another thread is already computing (e.g. the
+        warm-up) waits for that result instead of computing it again.
+
+        Args:
+            key (tuple): Cache key from make_key.
+            compute (callable): Builds the figure when it is not cached.
+
+        Returns:
+            The cached or freshly computed figure.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    done = self._pending[key] = threading.Event()
+                    break
+            # Look again once the other computation finishes; compute here if it failed
+            pending.wait()
+
+        try:
+            figure = compute()
+            with self._lock:
+                self._entries[key] = figure
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return figure
+        finally:
+            with self._lock:
+                del self._pending[key]
+            done.set()
+
+    def forget(self, token):
+        """
+        Removes every entry computed from the dataset identified by token.
+
+        Args:
+            token (tuple): Token returned by token() for a dataset.
+        """
+        with self._lock:
+            self._tracked_frames.discard(token)
+            stale = [key for key in self._entries if token in key[1] or token in dict(key[2]).values()]
+            for key in stale:
+                del self._entries[key]
+
+    def forget_data(self, data):
+        """
+        Removes every entry computed from a dataset, e.g. when it is reloaded.
+
+        Args:
+            data (WeatherStore or pd.DataFrame): The dataset being replaced.
+        """
+        if isinstance(data, WeatherStore):
+            self.forget(('store', data.version))
+        elif isinstance(data, pd.DataFrame):
+            self.forget(('frame', id(data)))
+
+    def clear(self):
+        """
+        Removes all entries, e.g. after the pipeline reloads its data.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Returns:
+            dict: Hit and miss counters and the current and maximum size.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+def cached_figure(method):
+    """
+    Decorator that memoizes a DataPipeline figure method in self.figure_cache.
+
+    Args:
+        method (callable): Method returning a figure.
+
+    Returns:
+        callable: The wrapped method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'figure_cache', None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        try:
+            key = cache.make_key(method.__name__, args, kwargs)
+            hash(key)
+        except TypeError:
+            # Unhashable arguments are computed without caching
+            return method(self, *args, **kwargs)
+        return cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,130 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from lazyimport import LazyModule
+
+pa = LazyModule('pyarrow')
+
+# Pipeline instance of a worker process, created once by init_worker
+_pipeline = None
+
+
+def frame_to_buffer(data):
+    """
+    Serializes a DataFrame as an Arrow IPC stream.
+    Sending one contiguous buffer between processes avoids pickling the columns object by object.
+
+    Args:
+        data (pd.DataFrame): Table to serialize.
+
+    Returns:
+        bytes: Arrow IPC stream.
+    """
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def buffer_to_frame(buffer):
+    """
+    Reads a DataFrame back from an Arrow IPC stream written by frame_to_buffer.
+    """
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+def init_worker(pipeline_class, state):
+    """
+    Process pool initializer: sets up the pipeline instance the worker decodes with.
+    The instance is given the parent's decoding state instead of being constructed again,
+    so subclasses whose constructor takes arguments work too.
+
+    Args:
+        pipeline_class (type): DataPipeline or a subclass of it.
+        state (dict): Attributes the decoding methods use, from DataPipeline.grib_decoder_state.
+    """
+    global _pipeline
+    _pipeline = pipeline_class.__new__(pipeline_class)
+    _pipeline.__dict__.update(state)
+
+
+def decode_task(task):
+    """
+    Decodes one GRIB slice in a worker process.
+
+    Args:
+        task (dict): Keyword arguments of DataPipeline.decode_grib_slice.
+
+    Returns:
+        bytes: The decoded slice as an Arrow IPC stream.
+    """
+    return frame_to_buffer(_pipeline.decode_grib_slice(**task))
+
+
+def slice_size_for(time_steps, processes, slices_per_process=2):
+    """
+    Number of time steps per task so that the work splits into about slices_per_process tasks per process.
+
+    Args:
+        time_steps (int): Total number of time steps over all files.
+        processes (int): Number of worker processes.
+        slices_per_process (int): Tasks per process; more than one evens out uneven files.
+
+    Returns:
+        int: Time steps per task, at least 1.
+    """
+    return max(1, math.ceil(time_steps / (processes * slices_per_process)))
+
+
+def merge_parts(frames):
+    """
+    Joins the variable groups of one slice side by side.
+    Every group was decoded from the same time steps and grid, so the rows line up and
+    only the data variables missing from the first group are added.
+
+    Args:
+        frames (list): DataFrames of one slice, one per variable group, in dataset order.
+
+    Returns:
+        pd.DataFrame: All variables of the slice.
+    """
+    merged = frames[0]
+    for frame in frames[1:]:
+        if len(frame) != len(merged):
+            raise ValueError("Variable groups of a GRIB slice decoded to different numbers of rows.")
+        new_columns = [column for column in frame.columns if column not in merged.columns]
+        merged = pd.concat([merged, frame[new_columns]], axis=1)
+    return merged
+
+
+def decode_parallel(pipeline, tasks, processes, start_method='spawn'):
+    """
+    Decodes GRIB slices on a process pool and returns them in task order.
+
+    Args:
+        pipeline (DataPipeline): Pipeline whose class and decoding state the workers use.
+        tasks (list): Tasks from DataPipeline.plan_grib_slices; each has a 'slice' id and the
+            decode_grib_slice arguments.
+        processes (int): Number of worker processes.
+        start_method (str): multiprocessing start method. 'spawn' is the default because the pool is often
+            created while other threads run (stage graph, downloads), and forking a threaded process is unsafe.
+
+    Returns:
+        list: One DataFrame per slice, in file and time order.
+    """
+    arguments = [{key: value for key, value in task.items() if key != 'slice'} for task in tasks]
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(start_method),
+                             initializer=init_worker,
+                             initargs=(type(pipeline), pipeline.grib_decoder_state())) as executor:
+        # map returns results in submission order, whichever worker finishes first
+        buffers = list(executor.map(decode_task, arguments))
+
+    # Group the variable parts of each slice, keeping the slices in order
+    parts = {}
+    for task, buffer in zip(tasks, buffers):
+        parts.setdefault(task['slice'], []).append(buffer_to_frame(buffer))
+    return [merge_parts(frames) for frames in parts.values()]
@@ -0,0 +1,135 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from lazyimport import LazyModule
+from pipelinegraph import atomic_write, file_digest
+
+xr = LazyModule('xarray')
+
+
+class GribIndexCache:
+    """
+    Keeps cfgrib's message indexes and a catalogue of each GRIB file in one cache directory.
+
+    Entries are keyed by the SHA-256 of the file contents, so an unchanged file is never
+    scanned again and a changed file gets a fresh entry. For each file the cache holds:
+
+    - cfgrib's index of message offsets, which cfgrib otherwise writes next to the GRIB file.
+      cfgrib ties an index to the path it was built from, so the index name also carries a
+      hash of the absolute path.
+    - catalogue.json, with the variables, time steps and grid of the file. Planning reads it
+      instead of opening the file.
+    """
+
+    def __init__(self, cache_dir='.grib_index'):
+        """
+        Args:
+            cache_dir (str): Directory of the indexes, catalogues and the file digest memo.
+        """
+        self.cache_dir = cache_dir
+        # (path, size, modification time) -> digest, so a process hashes each file once
+        self._digests = {}
+
+    def digest(self, path):
+        """
+        Returns:
+            str: SHA-256 of the file's contents, remembered by path, size and modification time.
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._digests:
+            self._digests[memo_key] = file_digest(path, os.path.join(self.cache_dir, 'filedigests.json'))
+        return self._digests[memo_key]
+
+    def entry_dir(self, path):
+        return os.path.join(self.cache_dir, self.digest(path)[:32])
+
+    def index_path(self, path):
+        """
+        Path template of the cfgrib index of a file inside the cache.
+        cfgrib fills in {short_hash}, a hash of the index keys it uses.
+
+        Args:
+            path (str): GRIB file.
+
+        Returns:
+            str: indexpath for cfgrib's backend_kwargs.
+        """
+        entry_dir = self.entry_dir(path)
+        os.makedirs(entry_dir, exist_ok=True)
+        path_key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+
+        # cfgrib ignores an index older than the file. With equal contents (e.g. the file was
+        # downloaded again) the index is still valid, so bring it forward instead of rescanning.
+        file_mtime = os.path.getmtime(path)
+        for index_file in glob.glob(os.path.join(entry_dir, f"{path_key}.*.idx")):
+            if os.path.getmtime(index_file) < file_mtime:
+                os.utime(index_file)
+        return os.path.join(entry_dir, f"{path_key}.{{short_hash}}.idx")
+
+    def open_dataset(self, path, variables=None):
+        """
+        Opens a GRIB file lazily through its cached index.
+
+        Args:
+            path (str): GRIB file.
+            variables (list): Data variables to open. cfgrib then builds only these variables
+                from the index and never touches the messages of the others. Defaults to all variables.
+
+        Returns:
+            xr.Dataset: The lazily loaded dataset.
+        """
+        path = os.path.abspath(path)
+        backend_kwargs = {'indexpath': self.index_path(path)}
+        if variables is not None:
+            catalogue = self.catalogue(path)
+            # paramId is one of cfgrib's index keys, so filtering on it reuses the same index
+            backend_kwargs['filter_by_keys'] = {
+                'paramId': [catalogue['variables'][name]['paramId'] for name in variables]
+            }
+        return xr.open_dataset(path, engine="cfgrib", backend_kwargs=backend_kwargs)
+
+    def catalogue(self, path):
+        """
+        Variables, time steps and grid of a GRIB file, read from the cache or built on first use.
+
+        Args:
+            path (str): GRIB file.
+
+        Returns:
+            dict: 'variables' (name to dims, GRIB paramId and shortName, and number of messages), 'sizes',
+                'time' (ISO timestamps, or None without a time dimension), 'latitude' and 'longitude'.
+        """
+        catalogue_path = os.path.join(self.entry_dir(path), 'catalogue.json')
+        if os.path.exists(catalogue_path):
+            with open(catalogue_path) as f:
+                return json.load(f)
+
+        path = os.path.abspath(path)
+        with xr.open_dataset(path, engine="cfgrib", backend_kwargs={'indexpath': self.index_path(path)}) as ds:
+            grid_dims = {'latitude', 'longitude'}
+            catalogue = {
+                'variables': {
+                    name: {
+                        'dims': list(ds[name].dims),
+                        'paramId': int(ds[name].attrs['GRIB_paramId']),
+                        'shortName': ds[name].attrs.get('GRIB_shortName', name),
+                        'messages': int(np.prod([ds.sizes[dim] for dim in ds[name].dims if dim not in grid_dims]))
+                    }
+                    for name in ds.data_vars
+                },
+                'sizes': {dim: int(size) for dim, size in ds.sizes.items()},
+                'time': ([pd.Timestamp(value).isoformat() for value in ds['time'].values]
+                         if 'time' in ds.dims else None),
+                'latitude': ds['latitude'].values.tolist() if 'latitude' in ds.coords else None,
+                'longitude': ds['longitude'].values.tolist() if 'longitude' in ds.coords else None,
+            }
+
+        with atomic_write(catalogue_path) as f:
+            json.dump(catalogue, f)
+        return catalogue
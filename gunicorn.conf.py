@@ -0,0 +1,41 @@
+# Gunicorn settings for serving the dashboard with several worker processes:
+#     gunicorn -c gunicorn.conf.py app:server
+#
+# The master loads the tables once and publishes them as Arrow files in a shared
+# directory before forking; each worker memory-maps those files when it imports app.py,
+# so adding workers adds little memory.
+#
+# The current weather refresher is off by default. Set DATAPIPELINE_WEATHER_REFRESH to an
+# interval in seconds (e.g. 3600) to enable it; the workers then elect one of themselves through
+# a lock file in the shared directory, so only one process calls Weatherstack.
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('DASH_BIND', '0.0.0.0:8050')
+workers = int(os.getenv('DASH_WORKERS', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.getenv('DASH_THREADS', 2))
+timeout = 120
+
+# Prefer tmpfs so the mapped pages never touch disk
+shared_root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def on_starting(server):
+    from datapipeline import DataPipeline
+
+    shared_dir = os.getenv('DATAPIPELINE_SHARED_DIR')
+    server.created_shared_dir = None
+    if not shared_dir:
+        shared_dir = server.created_shared_dir = tempfile.mkdtemp(prefix='datapipeline-', dir=shared_root)
+    DataPipeline().publish_shared_tables(shared_dir, directory=server.cfg.chdir)
+
+    # Workers are forked from the master and inherit its environment
+    os.environ['DATAPIPELINE_SHARED_DIR'] = shared_dir
+
+
+def on_exit(server):
+    # Only remove the directory created in on_starting
+    if getattr(server, 'created_shared_dir', None):
+        shutil.rmtree(server.created_shared_dir, ignore_errors=True)
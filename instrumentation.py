@@ -0,0 +1,207 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger('datapipeline')
+
+
+def ensure_log_handler():
+    """
+    Makes the stage records visible: unless logging is already configured for the
+    'datapipeline' logger or the root logger, they are printed to stderr one JSON line each.
+    """
+    if logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+
+
+class PipelineProfiler:
+    """
+    Records wall time, CPU time, rows in/out and peak traced memory per pipeline stage.
+
+    Each finished stage is logged as one JSON line on the 'datapipeline' logger and kept
+    in self.records, which write_report() dumps as a JSON report for the run.
+
+    Stages may nest and may run on several threads at once. Nesting is tracked per thread.
+    tracemalloc only has a process-wide peak, so when stages overlap on different threads each
+    one reports the peak of the whole process while it ran. Only one cProfile profiler can be
+    active in a process, so a selected stage is profiled only when no other stage is being
+    profiled; nested stages show up inside their outer stage's profile.
+    """
+
+    def __init__(self, enabled=True, track_memory=True, profile_stages=(), profile_dir='profiles'):
+        """
+        Args:
+            enabled (bool): Whether stages are measured at all.
+            track_memory (bool): Whether to measure peak memory with tracemalloc.
+            profile_stages (list): Stage names to run under cProfile, or ['*'] for every stage.
+            profile_dir (str): Directory for the cProfile .prof files.
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.records = []
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self._local = threading.local()  # per-thread stack of open stages
+        self._lock = threading.Lock()
+        self._active = []  # open stages of all threads
+        self._profiling = threading.Lock()  # held while a cProfile profiler is enabled
+        self._profile_count = 0
+        self._started_tracing = False
+        if enabled:
+            ensure_log_handler()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def profile_path(self, name):
+        # Unique per run and stage call, so repeated runs and calls do not overwrite each other
+        with self._lock:
+            self._profile_count += 1
+            count = self._profile_count
+        run = self.started.replace(':', '').replace('-', '')
+        return os.path.join(self.profile_dir, f"{name}_{run}_{count}.prof")
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measures the enclosed block as one stage.
+
+        Args:
+            name (str): Stage name.
+            rows_in (int): Number of input rows, if known.
+
+        Yields:
+            dict: The stage record; set record['rows_out'] inside the block to report output rows.
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {'stage': name, 'thread': threading.current_thread().name, 'rows_in': rows_in, 'rows_out': None}
+        if self.track_memory:
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracing = True
+                current, peak = tracemalloc.get_traced_memory()
+                # Keep the open stages' peaks before resetting the peak for this one
+                for open_record in self._active:
+                    open_record['_peak'] = max(open_record['_peak'], peak)
+                tracemalloc.reset_peak()
+                record['_base'], record['_peak'] = current, current
+                self._active.append(record)
+
+        # Profile only if selected and no other profiler is active in the process
+        profiler = None
+        if (name in self.profile_stages or '*' in self.profile_stages) and self._profiling.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        self._stack.append(record)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling.release()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record['profile'] = self.profile_path(name)
+                profiler.dump_stats(record['profile'])
+
+            record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+            self._stack.pop()
+
+            if self.track_memory:
+                with self._lock:
+                    self._active.remove(record)
+                    peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+                    record['peak_mb'] = round((peak - record.pop('_base')) / 1e6, 3)
+                    for open_record in self._active:
+                        open_record['_peak'] = max(open_record['_peak'], peak)
+                    # Stop tracing once no stage is open, if this profiler started it
+                    if not self._active and self._started_tracing:
+                        tracemalloc.stop()
+                        self._started_tracing = False
+
+            with self._lock:
+                self.records.append(record)
+            logger.info(json.dumps(record))
+
+    def report(self):
+        """
+        Returns:
+            dict: Run start time and the records of all finished stages.
+        """
+        return {'started': self.started, 'stages': list(self.records)}
+
+    def write_report(self, path):
+        """
+        Writes the run report as JSON.
+
+        Args:
+            path (str): Output file path.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        """
+        Returns:
+            pd.DataFrame: One row per finished stage.
+        """
+        return pd.DataFrame(self.records)
+
+
+def count_rows(value):
+    """
+    Returns the number of rows of a DataFrame-like value, or None.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+def profiled_stage(method):
+    """
+    Decorator that measures a DataPipeline method as a stage of self.profiler.
+    The first DataFrame argument gives rows_in and a DataFrame result gives rows_out.
+
+    Args:
+        method (callable): Pipeline method.
+
+    Returns:
+        callable: The wrapped method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, 'profiler', None)
+        if profiler is None or not profiler.enabled:
+            return method(self, *args, **kwargs)
+
+        rows_in = next((count_rows(arg) for arg in list(args) + list(kwargs.values())
+                        if count_rows(arg) is not None), None)
+        with profiler.stage(method.__name__, rows_in=rows_in) as record:
+            result = method(self, *args, **kwargs)
+            record['rows_out'] = count_rows(result)
+        return result
+    return wrapper
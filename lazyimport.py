@@ -0,0 +1,36 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Lets heavy optional dependencies (xarray/cfgrib, the SQL stack, plotly express) stay
+    out of the import of datapipeline until a method actually needs them.
+    """
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Dotted module name, e.g. 'plotly.express'.
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def load(self):
+        """
+        Imports the module if it has not been imported yet.
+
+        Returns:
+            module: The imported module.
+        """
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
@@ -0,0 +1,326 @@
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+_digest_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Writes a file in one step: the block writes a temporary file next to path, which replaces
+    path only when the block finishes without error. Other threads and processes therefore
+    see either the old file or the complete new one, never a partial file.
+
+    Args:
+        path (str): File to write.
+        mode (str): 'w' or 'wb' to receive an open file, or None to receive the temporary path
+            for writers that open the file themselves (e.g. DataFrame.to_parquet).
+
+    Yields:
+        The open temporary file, or its path when mode is None.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        if mode is None:
+            os.close(fd)
+            yield tmp_path
+        else:
+            with os.fdopen(fd, mode) as f:
+                yield f
+        # mkstemp creates the file readable by the owner only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def file_digest(path, memo_path=None):
+    """
+    SHA-256 of a file's contents.
+    With memo_path, digests are remembered by (path, size, modification time) so unchanged
+    files are not read again on later runs.
+
+    Args:
+        path (str): File to hash.
+        memo_path (str): JSON file remembering earlier digests, or None.
+
+    Returns:
+        str: Hex digest.
+    """
+    stat = os.stat(path)
+    memo_key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    memo = {}
+    if memo_path is not None and os.path.exists(memo_path):
+        with _digest_lock, open(memo_path) as f:
+            memo = json.load(f)
+        if memo_key in memo:
+            return memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest = digest.hexdigest()
+
+    if memo_path is not None:
+        with _digest_lock:
+            if os.path.exists(memo_path):
+                with open(memo_path) as f:
+                    memo = json.load(f)
+            memo[memo_key] = digest
+            with atomic_write(memo_path) as f:
+                json.dump(memo, f, indent=1)
+    return digest
+
+
+def frame_digest(data):
+    """
+    SHA-256 of a DataFrame's columns, dtypes and values.
+
+    Args:
+        data (pd.DataFrame): Table to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in data.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def path_state(paths):
+    """
+    Modification time of each path, or None for a missing one.
+    Used as the outputs check of stages that write files, so a deleted or rewritten output is noticed.
+
+    Args:
+        paths (list): Files or directories written by a stage.
+
+    Returns:
+        dict: Path to modification time in nanoseconds, or None.
+    """
+    return {path: os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths}
+
+
+def code_digest(func):
+    """
+    Hash of a function's source, so editing a stage invalidates its cached output.
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class Stage:
+    """
+    One step of a PipelineGraph.
+    """
+
+    def __init__(self, name, func, inputs=(), fingerprint=None, params=None, code=(), outputs=None):
+        """
+        Args:
+            name (str): Stage name.
+            func (callable): Called with the outputs of inputs, in order. Returns a DataFrame, or None for a sink.
+            inputs (tuple): Names of the stages whose outputs func takes.
+            fingerprint (callable): For stages reading external data: returns a JSON-serializable description
+                of that data (e.g. file digests). Without one, a stage with no inputs runs on every run.
+            params (dict): JSON-serializable settings that change the output.
+            code (tuple): Further functions whose source is part of the stage's key, e.g. the pipeline
+                methods func calls.
+            outputs (callable): For stages writing outside the cache (files, SQL tables): returns a
+                JSON-serializable description of what they wrote. A cached result is only reused while
+                it still returns what it returned right after the stage ran.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.fingerprint = fingerprint
+        self.params = params or {}
+        self.code = (func,) + tuple(code)
+        self.outputs = outputs
+
+
+class PipelineGraph:
+    """
+    Declarative stage graph whose DataFrame outputs are cached on disk as Parquet.
+
+    A stage's cache key hashes its code, parameters, fingerprint and the content hashes of
+    its inputs' outputs. A stage whose key is already in the cache is not run, and its output
+    is only read from disk when a stage that does run needs it. Stages whose inputs are
+    ready run concurrently on a thread pool, so independent branches overlap.
+    """
+
+    def __init__(self, cache_dir='.pipeline_cache', max_workers=2):
+        """
+        Args:
+            cache_dir (str): Directory of the cached stage outputs.
+            max_workers (int): Maximum number of stages running at once.
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.stages = {}
+        # Per-stage key, whether it was cached and how long it took in the last run
+        self.last_run = {}
+
+    def add(self, name, func, inputs=(), fingerprint=None, params=None, code=(), outputs=None):
+        """
+        Adds a stage; see Stage for the arguments. Inputs must be added first.
+
+        Returns:
+            Stage: The new stage.
+        """
+        missing = [input_name for input_name in inputs if input_name not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        stage = Stage(name, func, inputs, fingerprint, params, code, outputs)
+        self.stages[name] = stage
+        return stage
+
+    def stage_key(self, stage, input_digests):
+        """
+        Returns:
+            str: Cache key of a stage given the output digests of its inputs.
+        """
+        description = {
+            'stage': stage.name,
+            'code': [code_digest(func) for func in stage.code],
+            'params': stage.params,
+            'fingerprint': stage.fingerprint() if stage.fingerprint is not None else None,
+            'inputs': input_digests,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+    def paths(self, stage, key):
+        directory = os.path.join(self.cache_dir, stage.name)
+        return os.path.join(directory, f"{key}.json"), os.path.join(directory, f"{key}.parquet")
+
+    def required(self, targets):
+        """
+        Returns:
+            list: The targets and everything they depend on, in the order the stages were added.
+        """
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].inputs)
+        return [name for name in self.stages if name in needed]
+
+    def run(self, targets=None, force=()):
+        """
+        Runs the stages needed for targets, reusing cached outputs where the key is unchanged.
+
+        Args:
+            targets (list): Stages whose outputs are wanted. Defaults to every stage.
+            force (list): Stages to run even if their output is cached; stages downstream of them
+                only run again if the output actually changed.
+
+        A stage that raises is not cached, and the run stops with the error once the stages
+        already running have finished. Source stages should raise rather than return partial
+        data, or the partial data is cached until the stage is forced.
+
+        Returns:
+            dict: Stage name to output for the targets (None for sinks).
+        """
+        targets = list(self.stages) if targets is None else list(targets)
+        order = self.required(targets)
+        force = set(force)
+
+        digests, outputs, status = {}, {}, {}
+        lock = threading.Lock()
+
+        def load(name):
+            # Outputs of cached stages are read only when a running stage or the caller needs them
+            with lock:
+                if name in outputs:
+                    return outputs[name]
+            stage = self.stages[name]
+            _, data_path = self.paths(stage, status[name]['key'])
+            data = pd.read_parquet(data_path) if os.path.exists(data_path) else None
+            with lock:
+                outputs.setdefault(name, data)
+                return outputs[name]
+
+        def execute(name):
+            stage = self.stages[name]
+            start = time.perf_counter()
+            key = self.stage_key(stage, [digests[input_name] for input_name in stage.inputs])
+            meta_path, data_path = self.paths(stage, key)
+            cacheable = stage.inputs or stage.fingerprint is not None
+
+            if cacheable and name not in force and os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                # Stages writing outside the cache are only skipped while their outputs are unchanged
+                if stage.outputs is None or json.loads(json.dumps(stage.outputs(), default=str)) == meta.get('outputs'):
+                    status[name] = {'key': key, 'cached': True, 'seconds': round(time.perf_counter() - start, 3)}
+                    return name, meta['digest']
+
+            result = stage.func(*[load(input_name) for input_name in stage.inputs])
+            if isinstance(result, pd.DataFrame):
+                digest = frame_digest(result)
+            elif result is None:
+                digest = key
+            else:
+                raise TypeError(f"Stage {name} returned {type(result).__name__}; stages return a DataFrame or None")
+
+            # Write the output before its metadata so an interrupted run never leaves a key without data
+            if result is not None:
+                with atomic_write(data_path, mode=None) as tmp_path:
+                    result.to_parquet(tmp_path, index=False)
+            meta = {'stage': name, 'digest': digest, 'inputs': list(stage.inputs),
+                    'created': pd.Timestamp.now().isoformat(timespec='seconds')}
+            if stage.outputs is not None:
+                meta['outputs'] = json.loads(json.dumps(stage.outputs(), default=str))
+            with atomic_write(meta_path) as f:
+                json.dump(meta, f, indent=2)
+
+            with lock:
+                outputs[name] = result
+            status[name] = {'key': key, 'cached': False, 'seconds': round(time.perf_counter() - start, 3)}
+            return name, digest
+
+        remaining = list(order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline-stage') as executor:
+            while remaining or running:
+                # Start every stage whose inputs are resolved
+                for name in [name for name in remaining if all(input_name in digests for input_name in self.stages[name].inputs)]:
+                    remaining.remove(name)
+                    running[executor.submit(execute, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        _, digests[name] = future.result()
+                    except Exception as e:
+                        print(f"Stage {name}: failed ({e})")
+                        # Nothing is cached for the failed stage; let the running stages finish and stop
+                        remaining.clear()
+                        wait(running)
+                        self.last_run = status
+                        raise
+                    state = 'cached' if status[name]['cached'] else 'ran'
+                    print(f"Stage {name}: {state} ({status[name]['seconds']:.2f} s)")
+
+        self.last_run = status
+        return {name: load(name) for name in targets}
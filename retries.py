@@ -0,0 +1,25 @@
+import time
+
+
+def retry_with_backoff(attempt, retries=3, backoff=1.0, description="request"):
+    """
+    Calls attempt until it succeeds, waiting backoff * 2 ** (n - 1) seconds after the n-th failure.
+
+    Args:
+        attempt (callable): Does the work; takes no arguments and raises on failure.
+        retries (int): Number of attempts before giving up.
+        backoff (float): Base delay in seconds, doubled after each failed attempt.
+        description (str): What is attempted, for the progress messages, e.g. 'reading data from <url>'.
+
+    Returns:
+        The value returned by the first successful attempt, or None if every attempt failed.
+    """
+    for number in range(1, retries + 1):
+        try:
+            print(f"{description[:1].upper()}{description[1:]} (attempt {number})...")
+            return attempt()
+        except Exception as e:
+            print(f"Error {description}: {e}")
+            if number < retries:
+                time.sleep(backoff * 2 ** (number - 1))
+    return None
@@ -0,0 +1,134 @@
+import re
+
+import pandas as pd
+
+# Operators of the DataTable's native filter syntax, by their symbol or word form
+filter_operators = {
+    '>=': 'ge', 'ge': 'ge',
+    '<=': 'le', 'le': 'le',
+    '<': 'lt', 'lt': 'lt',
+    '>': 'gt', 'gt': 'gt',
+    '!=': 'ne', 'ne': 'ne',
+    '=': 'eq', 'eq': 'eq',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+
+# '{column} operator value', where the operator is the first word after the column
+filter_clause = re.compile(r'^\s*\{(?P<name>[^}]*)\}\s*(?P<operator>[<>!=]=?|[a-z]+)\s*(?P<value>.*?)\s*$')
+
+
+def split_filter_part(filter_part):
+    """
+    Parses one clause of a DataTable filter_query, e.g. '{temp} > 20' or '{conditions} contains "Rain"'.
+    A quoted value is taken literally, with its escaped quotes unescaped; other values that look like
+    numbers are returned as floats.
+
+    Returns:
+        tuple: (column, operator, value), or (None, None, None) if the clause is not understood.
+    """
+    match = filter_clause.match(filter_part)
+    if match is None or match.group('operator') not in filter_operators:
+        return None, None, None
+
+    value_part = match.group('value') or ''
+    v0 = value_part[0] if value_part else ''
+    if len(value_part) > 1 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+        value = value_part[1: -1].replace('\\' + v0, v0)
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+    return match.group('name'), filter_operators[match.group('operator')], value
+
+
+def filter_mask(column, operator, filter_value):
+    """
+    Evaluates one filter clause against a column, converting the typed value to the column's type.
+
+    Returns:
+        pd.Series: Boolean mask of the matching rows, or None if the value cannot be compared with the column.
+    """
+    is_dates = pd.api.types.is_datetime64_any_dtype(column)
+    if is_dates:
+        # Dates are shown as YYYY-MM-DD, so text operators match against that form
+        text = column.dt.strftime('%Y-%m-%d')
+    else:
+        text = column.astype(str)
+    # The value was parsed as a number when it looks like one; keep '2020' rather than '2020.0'
+    if isinstance(filter_value, float) and filter_value.is_integer():
+        value_text = str(int(filter_value))
+    else:
+        value_text = str(filter_value)
+
+    if operator == 'contains':
+        return text.str.contains(value_text, regex=False)
+    if operator == 'datestartswith':
+        return text.str.startswith(value_text)
+    if operator not in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+        return None
+
+    if is_dates:
+        value = pd.to_datetime(value_text, errors='coerce')
+    elif pd.api.types.is_numeric_dtype(column):
+        value = pd.to_numeric(value_text, errors='coerce')
+    else:
+        # Text columns compare as text
+        column, value = text, value_text
+    if pd.isna(value):
+        return None
+    return getattr(column, operator)(value)
+
+
+def requested_page(triggered_prop_ids, table_id, page_current):
+    """
+    Page to show after a callback of a paged DataTable.
+    Any change other than paging (new rows, sort or filter) goes back to the first page.
+
+    Args:
+        triggered_prop_ids (dict): dash.ctx.triggered_prop_ids of the callback.
+        table_id (str): Id of the DataTable.
+        page_current (int): The table's page_current.
+
+    Returns:
+        int: Index of the page to show.
+    """
+    if page_current is None or set(triggered_prop_ids) != {f"{table_id}.page_current"}:
+        return 0
+    return page_current
+
+
+def page_of_records(data, page_current, page_size, sort_by, filter_query):
+    """
+    Applies the DataTable's filter and sort to data and returns only the requested page.
+    Filter clauses whose value does not fit the column's type are ignored.
+
+    Returns:
+        tuple: (records for the page, number of pages, index of the page returned)
+    """
+    for filter_part in (filter_query or '').split(' && '):
+        col_name, operator, filter_value = split_filter_part(filter_part)
+        if col_name not in data.columns:
+            continue
+        mask = filter_mask(data[col_name], operator, filter_value)
+        if mask is not None:
+            data = data.loc[mask]
+
+    sort_by = [col for col in (sort_by or []) if col['column_id'] in data.columns]
+    if sort_by:
+        data = data.sort_values(
+            [col['column_id'] for col in sort_by],
+            ascending=[col['direction'] == 'asc' for col in sort_by],
+            inplace=False
+        )
+
+    page_count = max(1, -(-len(data) // page_size))
+    # Stay on the last page if filtering left fewer pages than before
+    page_current = min(max(page_current, 0), page_count - 1)
+    page = data.iloc[page_current * page_size:(page_current + 1) * page_size].copy()
+
+    # Format the 'date' column to remove time
+    if 'date' in page.columns:
+        page['date'] = pd.to_datetime(page['date']).dt.date
+    return page.to_dict('records'), page_count, page_current
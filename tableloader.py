@@ -0,0 +1,73 @@
+import threading
+
+
+class TableLoader:
+    """
+    Loads named tables on first use and keeps them for later callers.
+
+    Each table has its own lock, so callback threads asking for the same table wait for
+    one load instead of each reading it, while different tables load independently.
+    """
+
+    def __init__(self, loaders, on_reload=None):
+        """
+        Args:
+            loaders (dict): Table name to a zero-argument callable returning the table.
+            on_reload (callable): Called with each table that reload() drops, e.g. to drop
+                what was cached from it.
+        """
+        self.loaders = dict(loaders)
+        self.on_reload = on_reload
+        self._tables = {}
+        self._locks = {name: threading.Lock() for name in self.loaders}
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        """
+        Returns a table, loading it on the first call.
+
+        Args:
+            name (str): Table name.
+
+        Returns:
+            The loaded table.
+        """
+        if name in self._tables:
+            return self._tables[name]
+        with self._locks[name]:
+            if name not in self._tables:
+                self._tables[name] = self.loaders[name]()
+        return self._tables[name]
+
+    def is_loaded(self, name):
+        return name in self._tables
+
+    def preload(self, names=None):
+        """
+        Loads tables on a background thread so they are ready before the first request needs them.
+
+        Args:
+            names (list): Tables to load, in order. Defaults to all tables.
+
+        Returns:
+            threading.Thread: The started loading thread.
+        """
+        names = list(self.loaders) if names is None else list(names)
+        thread = threading.Thread(target=lambda: [self.get(name) for name in names],
+                                  name='table-preload', daemon=True)
+        thread.start()
+        return thread
+
+    def reload(self, name):
+        """
+        Drops a loaded table so the next get() loads it again.
+
+        Args:
+            name (str): Table name.
+        """
+        with self._locks[name]:
+            table = self._tables.pop(name, None)
+        if table is not None and self.on_reload is not None:
+            self.on_reload(table)
@@ -0,0 +1,77 @@
+import http.server
+import threading
+
+import pytest
+
+from datapipeline import DataPipeline
+
+
+class FakeServer:
+    """
+    Local HTTP stand-in for the remote APIs.
+
+    Each path answers with a queue of (status, body) responses: every request takes the next one,
+    and the last one is repeated once the queue is used up. Requests are recorded in order.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+
+    def handler_class(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                status, body = server.respond(path, query)
+                body = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def route(self, path, *responses):
+        """
+        Args:
+            path (str): Request path, e.g. '/a.csv'.
+            responses (tuple): (status, body) pairs answered in order.
+        """
+        self.routes[path] = list(responses)
+
+    def respond(self, path, query):
+        with self._lock:
+            self.requests.append((path, query))
+            responses = self.routes.get(path)
+            if not responses:
+                return 404, ''
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    def hits(self, path):
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+    def url(self, path):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+
+@pytest.fixture
+def server():
+    fake = FakeServer()
+    thread = threading.Thread(target=fake.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield fake
+    fake.httpd.shutdown()
+    fake.httpd.server_close()
+
+
+@pytest.fixture
+def pipeline():
+    return DataPipeline()
@@ -0,0 +1,69 @@
+import pytest
+
+import retries
+
+CITY_CSV = {
+    '/a.csv': "name,datetime,temp\nchicago,2024-01-01,1.5\nchicago,2024-01-02,2.5\n",
+    '/b.csv': "name,datetime,temp\nlasvegas,2024-01-01,10.0\nnewyork,2024-01-01,3.0\n",
+}
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # Record the backoff delays instead of sleeping
+    recorded = []
+    monkeypatch.setattr(retries.time, 'sleep', recorded.append)
+    return recorded
+
+
+def test_fetch_csv_retries_with_backoff(pipeline, server, delays):
+    server.route('/a.csv', (500, ''), (503, ''), (200, CITY_CSV['/a.csv']))
+
+    data = pipeline.fetch_csv(server.url('/a.csv'), retries=3, backoff=0.5)
+
+    assert list(data['temp']) == [1.5, 2.5]
+    assert server.hits('/a.csv') == 3
+    assert delays == [0.5, 1.0]
+
+
+def test_fetch_csv_gives_up_after_retries(pipeline, server, delays):
+    server.route('/a.csv', (500, ''))
+
+    assert pipeline.fetch_csv(server.url('/a.csv'), retries=2, backoff=0.5) is None
+    assert server.hits('/a.csv') == 2
+    assert delays == [0.5]
+
+
+@pytest.mark.parametrize('concurrent', [True, False])
+def test_get_city_data_combines_urls_in_order(pipeline, server, delays, concurrent):
+    for path, body in CITY_CSV.items():
+        server.route(path, (200, body))
+
+    data = pipeline.get_city_data([server.url('/a.csv'), server.url('/b.csv')], concurrent=concurrent)
+
+    # New York is left out
+    assert list(data['name']) == ['chicago', 'chicago', 'lasvegas']
+
+
+def test_get_city_data_leaves_out_failed_urls(pipeline, server, delays):
+    server.route('/a.csv', (200, CITY_CSV['/a.csv']))
+    server.route('/b.csv', (500, ''))
+
+    data = pipeline.get_city_data([server.url('/a.csv'), server.url('/b.csv')], retries=2, backoff=0)
+
+    assert list(data['name']) == ['chicago', 'chicago']
+    assert server.hits('/b.csv') == 2
+
+
+def test_get_city_data_strict_raises_on_failed_urls(pipeline, server, delays):
+    server.route('/a.csv', (200, CITY_CSV['/a.csv']))
+
+    with pytest.raises(RuntimeError, match='/missing.csv'):
+        pipeline.get_city_data([server.url('/a.csv'), server.url('/missing.csv')], retries=1, strict=True)
+
+
+def test_get_city_data_all_failed(pipeline, server, delays):
+    data = pipeline.get_city_data([server.url('/missing.csv')], retries=1)
+
+    assert data.empty
+    assert list(data.columns) == ['name']
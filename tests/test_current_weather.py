@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+WEATHER = json.dumps({
+    'location': {'localtime': '2024-10-01 12:00'},
+    'current': {'temperature': 21, 'weather_icons': ['icon.png'], 'humidity': 40},
+})
+
+
+@pytest.fixture
+def weather(pipeline, server):
+    server.route('/current', (200, WEATHER))
+    server.route('/user-agent', (200, json.dumps({'user-agent': 'test-agent'})))
+    pipeline.weatherstackkey = 'key'
+    pipeline.weatherstack_url = server.url('/current')
+    pipeline.useragent_url = server.url('/user-agent')
+    return pipeline
+
+
+def test_repeated_requests_are_served_from_the_cache(weather, server):
+    first = weather.get_current_weather('chicago')
+    second = weather.get_current_weather('chicago')
+
+    assert first.equals(second)
+    assert first['temperature'][0] == 21
+    assert server.hits('/current') == 1
+
+
+def test_cached_result_is_a_copy(weather, server):
+    weather.get_current_weather('chicago')['temperature'] = 0
+
+    assert weather.get_current_weather('chicago')['temperature'][0] == 21
+
+
+def test_expired_result_is_fetched_again(weather, server):
+    weather.current_weather_ttl = 60
+    weather.get_current_weather('chicago')
+
+    # Age the cached entry past the TTL
+    fetched, data = weather.current_weather_cache['chicago']
+    weather.current_weather_cache['chicago'] = (fetched - 61, data)
+    weather.get_current_weather('chicago')
+
+    assert server.hits('/current') == 2
+
+
+def test_max_age_zero_always_fetches(weather, server):
+    weather.get_current_weather('chicago')
+    weather.get_current_weather('chicago', max_age=0)
+
+    assert server.hits('/current') == 2
+
+
+def test_cities_are_cached_separately(weather, server):
+    weather.get_current_weather('chicago')
+    weather.get_current_weather('lasvegas')
+
+    queries = [query for path, query in server.requests if path == '/current']
+    assert len(queries) == 2
+    assert 'query=las+vegas' in queries[1]
+
+
+def test_user_agent_is_looked_up_once(weather, server):
+    for city in ['chicago', 'lasvegas', 'seattle']:
+        weather.get_current_weather(city)
+
+    assert server.hits('/user-agent') == 1
+    assert weather.useragent == 'test-agent'
+
+
+def test_api_errors_are_not_cached(weather, server):
+    server.route('/current', (200, json.dumps({'error': {'info': 'quota'}})), (200, WEATHER))
+
+    assert weather.get_current_weather('chicago') is None
+    assert weather.get_current_weather('chicago')['temperature'][0] == 21
+
+
+def test_batch_lists_failed_cities(weather, server):
+    server.route('/current', (500, ''), (200, WEATHER))
+
+    batch = weather.get_current_weather_batch(['chicago', 'seattle'], max_workers=1)
+
+    assert list(batch['name']) == ['seattle']
+    assert batch.attrs['failed'] == ['chicago']
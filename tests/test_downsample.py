@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import bucket_dates, downsample, lttb_indices, minmax_indices
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = pd.date_range('2020-01-01', periods=1002, freq='h').to_numpy()
+    y = np.cumsum(rng.normal(size=1002))
+    y[500] = 100.0  # a spike both methods must keep
+    return x, y
+
+
+@pytest.mark.parametrize('n_out', [0, 1, 2, 3, 4, 5, 10, 51, 1001])
+def test_lttb_keeps_at_most_n_out_points(series, n_out):
+    x, y = series
+    kept = lttb_indices(x, y, n_out)
+
+    assert len(kept) == n_out
+    assert np.all(np.diff(kept) > 0)
+    if n_out >= 2:
+        assert (kept[0], kept[-1]) == (0, len(y) - 1)
+
+
+@pytest.mark.parametrize('n_out', [0, 1, 2, 3, 4, 5, 10, 51, 1001])
+def test_minmax_keeps_at_most_n_out_points(series, n_out):
+    _, y = series
+    kept = minmax_indices(y, n_out)
+
+    assert len(kept) <= n_out
+    assert np.all(np.diff(kept) > 0)
+    if n_out >= 2:
+        assert (kept[0], kept[-1]) == (0, len(y) - 1)
+
+
+def test_lttb_keeps_one_point_per_bucket_and_the_spike(series):
+    x, y = series
+    kept = lttb_indices(x, y, 12)
+
+    # 1000 points between the first and last, in 10 buckets of 100
+    assert ((kept[1:-1] - 1) // 100).tolist() == list(range(10))
+    assert 500 in kept
+
+
+def test_minmax_keeps_the_extremes_of_each_bucket(series):
+    _, y = series
+    kept = minmax_indices(y, 12)
+
+    # 1000 points between the first and last, in 5 buckets of 200
+    buckets = y[1:-1].reshape(5, 200)
+    expected = set((np.arange(5) * 200 + 1 + buckets.argmin(axis=1)).tolist())
+    expected |= set((np.arange(5) * 200 + 1 + buckets.argmax(axis=1)).tolist())
+    assert set(kept.tolist()) == expected | {0, len(y) - 1}
+    assert 500 in kept
+
+
+@pytest.mark.parametrize('n_out', [5, 6, 100])
+def test_short_input_passes_through(n_out):
+    x, y = np.arange(5.0), np.array([1.0, 3.0, 2.0, 5.0, 4.0])
+
+    assert lttb_indices(x, y, n_out).tolist() == [0, 1, 2, 3, 4]
+    assert minmax_indices(y, n_out).tolist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_stays_within_the_budget(series, method):
+    x, y = series
+    data = pd.DataFrame({'datetime': x, 't2m': y, 'other': 0})
+    data.loc[10:19, 't2m'] = np.nan
+
+    result = downsample(data, 'datetime', 't2m', 100, method=method)
+
+    assert list(result.columns) == ['datetime', 't2m']
+    assert len(result) <= 100
+    assert not result['t2m'].isna().any()
+    assert result['datetime'].is_monotonic_increasing
+    assert result['t2m'].max() == 100.0
+
+
+def test_downsample_returns_small_data_unchanged(series):
+    x, y = series
+    data = pd.DataFrame({'datetime': x[:50], 't2m': y[:50]})
+
+    pd.testing.assert_frame_equal(downsample(data, 'datetime', 't2m', 100), data)
+    pd.testing.assert_frame_equal(downsample(data, 'datetime', 't2m', None), data)
+    with pytest.raises(ValueError, match='Unknown downsampling method'):
+        downsample(data, 'datetime', 't2m', 10, method='average')
+
+
+def test_bucket_dates():
+    dates = pd.Series(pd.date_range('2020-01-01', periods=10, freq='D'))
+
+    assert bucket_dates(dates, 20).equals(dates)
+    buckets = bucket_dates(dates, 4)
+    assert buckets.nunique() <= 4
+    assert buckets.tolist()[:4] == [pd.Timestamp('2020-01-01')] * 3 + [pd.Timestamp('2020-01-04')]
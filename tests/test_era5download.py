@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+
+import pytest
+
+import retries
+from era5download import ERA5_VARIABLES, DownloadManager, city_regions, month_jobs
+
+
+class FakeClient:
+    """
+    Stand-in for cdsapi.Client that writes the request as the file contents.
+    Targets in fail_targets write part of the file and then raise, like an interrupted download.
+    """
+
+    def __init__(self, fail_targets=()):
+        self.fail_targets = set(fail_targets)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def retrieve(self, dataset, request, target):
+        name = os.path.basename(target)[:-len('.part')]
+        with self._lock:
+            self.calls.append(name)
+        contents = json.dumps([dataset, request], sort_keys=True).encode()
+        with open(target, 'wb') as f:
+            if name in self.fail_targets:
+                f.write(contents[:10])
+                raise ConnectionError(f"connection lost while downloading {name}")
+            f.write(contents)
+
+
+@pytest.fixture
+def jobs():
+    return month_jobs('2024-01', '2024-03', {'chicago': [42.5, -88.25, 41.5, -87.25]})
+
+
+def manager(directory, client, **kwargs):
+    return DownloadManager(str(directory), client_factory=lambda: client, backoff=0, **kwargs)
+
+
+def test_month_jobs_split_by_month_and_region():
+    regions = city_regions([{'name': 'a', 'latitude': 10.0, 'longitude': 20.0},
+                            {'name': 'b', 'latitude': -5.0, 'longitude': 0.0}])
+    jobs = month_jobs('2023-12', '2024-02', regions)
+
+    assert [job['target'] for job in jobs][:2] == ['reanalysis-era5-land_a_202312.grib',
+                                                   'reanalysis-era5-land_b_202312.grib']
+    assert len(jobs) == 6
+    assert regions['a'] == [10.5, 19.5, 9.5, 20.5]
+    assert len(jobs[-1]['request']['day']) == 29  # February 2024
+
+
+def test_requests_include_the_constant_fields(jobs):
+    # make_constants_tabel reads 'z' and 'lsm' from the downloaded files
+    assert {'geopotential', 'land_sea_mask'} <= set(ERA5_VARIABLES)
+    assert {'geopotential', 'land_sea_mask'} <= set(jobs[0]['request']['variable'])
+
+
+def test_failed_attempts_back_off(tmp_path, jobs, monkeypatch):
+    delays = []
+    monkeypatch.setattr(retries.time, 'sleep', delays.append)
+    client = FakeClient(fail_targets=[jobs[0]['target']])
+
+    DownloadManager(str(tmp_path), client_factory=lambda: client, retries=3, backoff=2.0).run(jobs[:1])
+
+    assert client.calls == [jobs[0]['target']] * 3
+    assert delays == [2.0, 4.0]
+
+
+def test_downloads_every_job(tmp_path, jobs):
+    client = FakeClient()
+    paths = manager(tmp_path, client).run(jobs)
+
+    assert paths == [str(tmp_path / job['target']) for job in jobs]
+    assert sorted(client.calls) == sorted(job['target'] for job in jobs)
+    assert set(json.loads((tmp_path / 'era5_manifest.json').read_text())) == {job['target'] for job in jobs}
+
+
+def test_resumes_after_interrupted_run(tmp_path, jobs):
+    interrupted = jobs[1]['target']
+    first = FakeClient(fail_targets=[interrupted])
+    paths = manager(tmp_path, first, retries=2).run(jobs)
+
+    # The interrupted job was retried, then left out; only complete files are recorded
+    assert first.calls.count(interrupted) == 2
+    assert str(tmp_path / interrupted) not in paths
+    assert not (tmp_path / interrupted).exists()
+    assert interrupted not in json.loads((tmp_path / 'era5_manifest.json').read_text())
+
+    second = FakeClient()
+    paths = manager(tmp_path, second).run(jobs)
+
+    assert second.calls == [interrupted]
+    assert paths == [str(tmp_path / job['target']) for job in jobs]
+    assert not (tmp_path / f"{interrupted}.part").exists()
+
+
+def test_redownloads_file_with_checksum_mismatch(tmp_path, jobs):
+    manager(tmp_path, FakeClient()).run(jobs)
+    corrupted = tmp_path / jobs[2]['target']
+    original = corrupted.read_bytes()
+    corrupted.write_bytes(original[:-1] + b'!')
+
+    client = FakeClient()
+    manager(tmp_path, client).run(jobs)
+
+    assert client.calls == [jobs[2]['target']]
+    assert corrupted.read_bytes() == original
+
+
+def test_redownloads_deleted_file(tmp_path, jobs):
+    manager(tmp_path, FakeClient()).run(jobs)
+    (tmp_path / jobs[0]['target']).unlink()
+
+    client = FakeClient()
+    manager(tmp_path, client).run(jobs)
+
+    assert client.calls == [jobs[0]['target']]
+
+
+def test_redownloads_when_request_changes(tmp_path, jobs):
+    manager(tmp_path, FakeClient()).run(jobs)
+    changed = month_jobs('2024-01', '2024-03', {'chicago': [42.5, -88.25, 41.5, -87.25]}, times=('06:00',))
+
+    client = FakeClient()
+    manager(tmp_path, client).run(changed)
+
+    assert sorted(client.calls) == sorted(job['target'] for job in changed)
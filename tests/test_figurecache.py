@@ -0,0 +1,154 @@
+import gc
+import threading
+
+import pandas as pd
+
+from figurecache import FigureCache, cached_figure
+from tableloader import TableLoader
+from weatherstore import WeatherStore
+
+
+def store():
+    return WeatherStore(pd.DataFrame({'name': ['a', 'a'], 'date': ['2020-01-01', '2020-01-02'], 'temp': [1.0, 2.0]}))
+
+
+class Plotter:
+    def __init__(self, maxsize=8):
+        self.figure_cache = FigureCache(maxsize=maxsize)
+        self.calls = 0
+
+    @cached_figure
+    def plot(self, data, city, options=None):
+        self.calls += 1
+        return ('figure', self.calls)
+
+
+def test_hits_and_misses():
+    plotter, data = Plotter(), store()
+
+    first = plotter.plot(data, 'a')
+    assert plotter.plot(data, 'a') is first
+    plotter.plot(data, 'b')
+
+    assert plotter.calls == 2
+    assert plotter.figure_cache.info() == {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 8}
+
+
+def test_keyword_arguments_are_part_of_the_key():
+    plotter, data = Plotter(), store()
+
+    plotter.plot(data, 'a', options='x')
+    plotter.plot(data, 'a', options='y')
+    plotter.plot(data, city='a', options='y')
+
+    assert plotter.calls == 3
+
+
+def test_least_recently_used_entry_is_evicted():
+    plotter, data = Plotter(maxsize=2), store()
+
+    plotter.plot(data, 'a')
+    plotter.plot(data, 'b')
+    plotter.plot(data, 'a')
+    plotter.plot(data, 'c')  # evicts 'b'
+    plotter.plot(data, 'a')
+    plotter.plot(data, 'b')
+
+    assert plotter.calls == 4
+
+
+def test_new_store_version_misses():
+    plotter = Plotter()
+
+    plotter.plot(store(), 'a')
+    plotter.plot(store(), 'a')
+
+    assert plotter.calls == 2
+
+
+def test_entries_of_collected_frames_are_dropped():
+    plotter = Plotter()
+    frame = pd.DataFrame({'x': [1]})
+    plotter.plot(frame, 'a')
+    assert len(plotter.figure_cache) == 1
+
+    del frame
+    gc.collect()
+
+    assert len(plotter.figure_cache) == 0
+
+
+def test_forget_data_drops_only_that_dataset():
+    plotter, old, other = Plotter(), store(), store()
+    plotter.plot(old, 'a')
+    plotter.plot([old, other], 'a')
+    plotter.plot(other, 'a')
+
+    plotter.figure_cache.forget_data(old)
+
+    assert len(plotter.figure_cache) == 2
+    plotter.plot(other, 'a')
+    plotter.plot(old, 'a')
+    assert plotter.calls == 4
+
+
+def test_unhashable_arguments_are_not_cached():
+    plotter, data = Plotter(), store()
+
+    plotter.plot(data, {'city': 'a'})
+    plotter.plot(data, {'city': 'a'})
+
+    assert plotter.calls == 2
+    assert len(plotter.figure_cache) == 0
+
+
+def test_concurrent_callers_compute_once():
+    cache = FigureCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'figure'
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == ['figure', 'figure']
+    assert len(calls) == 1
+
+
+def test_failed_computation_is_not_cached():
+    cache = FigureCache()
+
+    def fail():
+        raise ValueError('no data')
+
+    try:
+        cache.get_or_compute('key', fail)
+    except ValueError:
+        pass
+
+    assert cache.get_or_compute('key', lambda: 'figure') == 'figure'
+    assert cache.info()['misses'] == 2
+
+
+def test_table_reload_forgets_cached_figures():
+    plotter = Plotter()
+    tables = TableLoader({'dailydata': store}, on_reload=plotter.figure_cache.forget_data)
+    plotter.plot(tables['dailydata'], 'a')
+
+    tables.reload('dailydata')
+
+    assert len(plotter.figure_cache) == 0
+    plotter.plot(tables['dailydata'], 'a')
+    assert plotter.calls == 2
@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import pytest
+
+import gribindex
+from gribindex import GribIndexCache
+
+cfgrib_messages = pytest.importorskip('cfgrib.messages')
+
+GRIB_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', '202410.grib')
+
+
+@pytest.fixture
+def grib(tmp_path):
+    path = tmp_path / '202410.grib'
+    shutil.copyfile(GRIB_FILE, path)
+    return path
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    # Records every time cfgrib scans a GRIB file to build an index
+    scanned = []
+    build = cfgrib_messages.FileIndex.from_fieldset.__func__
+
+    def from_fieldset(cls, filestream, *args, **kwargs):
+        scanned.append(os.path.basename(filestream.path))
+        return build(cls, filestream, *args, **kwargs)
+
+    monkeypatch.setattr(cfgrib_messages.FileIndex, 'from_fieldset', classmethod(from_fieldset))
+    return scanned
+
+
+def open_and_load(cache, path):
+    with cache.open_dataset(str(path)) as ds:
+        return {name: ds[name].values.copy() for name in ds.data_vars}
+
+
+def test_reopen_uses_the_cached_index(tmp_path, grib, scans):
+    cache_dir = str(tmp_path / 'index')
+    first = open_and_load(GribIndexCache(cache_dir), grib)
+    assert scans == ['202410.grib']
+
+    # A new cache object, as in another process, finds the index on disk
+    second = open_and_load(GribIndexCache(cache_dir), grib)
+
+    assert scans == ['202410.grib']
+    assert first.keys() == second.keys()
+    assert not any(name.endswith('.idx') for name in os.listdir(tmp_path))
+
+
+def test_index_is_reused_for_a_file_rewritten_with_the_same_contents(tmp_path, grib, scans):
+    cache = GribIndexCache(str(tmp_path / 'index'))
+    open_and_load(cache, grib)
+    # The index was built a while ago; then the file is downloaded again
+    for index_file in (tmp_path / 'index').glob('*/*.idx'):
+        os.utime(index_file, (index_file.stat().st_atime - 60, index_file.stat().st_mtime - 60))
+    shutil.copyfile(GRIB_FILE, grib)
+    assert os.path.getmtime(grib) > max(path.stat().st_mtime for path in (tmp_path / 'index').glob('*/*.idx'))
+
+    open_and_load(cache, grib)
+
+    assert scans == ['202410.grib']
+
+
+def test_modified_file_invalidates_its_entry(tmp_path, grib, scans):
+    cache = GribIndexCache(str(tmp_path / 'index'))
+    original = cache.catalogue(str(grib))
+    old_entry = cache.entry_dir(str(grib))
+
+    # Keep only the first half of the messages
+    data = grib.read_bytes()
+    grib.write_bytes(data[:data.index(b'GRIB', len(data) // 2)])
+    truncated = cache.catalogue(str(grib))
+
+    assert cache.entry_dir(str(grib)) != old_entry
+    assert scans == ['202410.grib', '202410.grib']
+    assert truncated['sizes'] != original['sizes']
+
+
+def test_catalogue_is_read_without_opening_the_file(tmp_path, grib, monkeypatch):
+    cache_dir = str(tmp_path / 'index')
+    catalogue = GribIndexCache(cache_dir).catalogue(str(grib))
+    assert catalogue['variables']
+
+    monkeypatch.setattr(gribindex, 'xr', None)
+    assert GribIndexCache(cache_dir).catalogue(str(grib)) == catalogue
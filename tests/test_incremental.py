@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from benchmarks.synthetic import make_city_data, make_target_coords, make_zip_data
+from datapipeline import DataPipeline
+
+
+class SourcePipeline(DataPipeline):
+    """DataPipeline whose bulk download and GRIB files are replaced by synthetic frames that can grow."""
+
+    def __init__(self, days):
+        super().__init__()
+        self.target_coords = make_target_coords(2)
+        self.set_days(days)
+
+    def set_days(self, days):
+        city_data = make_city_data(2)
+        self.city_data = city_data[pd.to_datetime(city_data['datetime']) < pd.Timestamp('2020-01-01') +
+                                   pd.Timedelta(days=days)].reset_index(drop=True)
+        zip_data = make_zip_data(2, freq='12h')
+        self.zip_data = zip_data[zip_data['time'] < pd.Timestamp('2020-01-01') +
+                                 pd.Timedelta(days=days)].reset_index(drop=True)
+
+    def get_city_data(self, *args, **kwargs):
+        return self.city_data.copy()
+
+    def get_grib_city_data(self, grib_file_paths=None, since=None, **kwargs):
+        # Like the GRIB reader: only time steps after since, and an empty frame when there are none
+        data = self.zip_data if since is None else self.zip_data[self.zip_data['time'] > since]
+        return data.reset_index(drop=True) if not data.empty else pd.DataFrame(columns=['name'])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'datapipeline.db'}")
+
+
+def row_count(engine, table_name):
+    with engine.connect() as conn:
+        return conn.execute(sqlalchemy.text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+
+
+def test_first_refresh_creates_the_tables(engine):
+    written = SourcePipeline(days=10).refresh_incremental(engine)
+
+    assert written == {'dailydata': 20, 'hourlydata': 40}
+    assert row_count(engine, 'dailydata') == 20
+    assert row_count(engine, 'hourlydata') == 40
+
+
+def test_second_refresh_without_new_data_writes_nothing(engine):
+    dp = SourcePipeline(days=10)
+    dp.refresh_incremental(engine)
+
+    assert dp.refresh_incremental(engine) == {'dailydata': 0, 'hourlydata': 0}
+    assert row_count(engine, 'dailydata') == 20
+    assert row_count(engine, 'hourlydata') == 40
+
+
+def test_refresh_adds_only_records_after_the_marks(engine):
+    dp = SourcePipeline(days=10)
+    dp.refresh_incremental(engine)
+    dp.set_days(15)
+
+    assert dp.refresh_incremental(engine) == {'dailydata': 10, 'hourlydata': 20}
+    assert row_count(engine, 'dailydata') == 30
+    assert row_count(engine, 'hourlydata') == 60
+    assert dp.high_water_marks(engine, 'hourlydata', 'datetime') == {
+        'city000': pd.Timestamp('2020-01-15 12:00'), 'city001': pd.Timestamp('2020-01-15 12:00')
+    }
+
+
+def test_high_water_marks_of_missing_table(engine):
+    assert DataPipeline().high_water_marks(engine, 'dailydata', 'date') == {}
+
+
+def test_filter_new_records():
+    data = pd.DataFrame({'name': ['a', 'a', 'b', 'c'],
+                         'date': pd.to_datetime(['2020-01-01', '2020-01-03', '2020-01-01', '2020-01-01'])})
+    marks = {'a': pd.Timestamp('2020-01-02'), 'b': pd.Timestamp('2020-01-01')}
+
+    new = DataPipeline().filter_new_records(data, marks, 'date')
+
+    # 'c' has no mark, so all its rows are new
+    assert list(zip(new['name'], new['date'].dt.day)) == [('a', 3), ('c', 1)]
+
+
+def test_upsert_updates_existing_keys(engine):
+    dp = DataPipeline()
+    data = pd.DataFrame({'name': ['a', 'b'], 'date': pd.to_datetime(['2020-01-01', '2020-01-01']),
+                         'temp': [1.0, 2.0]})
+    dp.upsert(data, 'dailydata', engine, primary_key=['name', 'date'])
+
+    changed = pd.DataFrame({'name': ['b', 'c'], 'date': pd.to_datetime(['2020-01-01', '2020-01-01']),
+                            'temp': [5.0, 3.0]})
+    assert dp.upsert(changed, 'dailydata', engine, primary_key=['name', 'date']) == 2
+
+    stored = pd.read_sql_query("SELECT name, temp FROM dailydata ORDER BY name", engine)
+    assert list(zip(stored['name'], stored['temp'])) == [('a', 1.0), ('b', 5.0), ('c', 3.0)]
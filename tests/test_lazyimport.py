@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from lazyimport import LazyModule
+
+
+def test_module_is_imported_on_first_attribute_access():
+    module = LazyModule('json')
+    assert 'not loaded' in repr(module)
+
+    assert module.dumps([1]) == '[1]'
+    assert 'loaded' in repr(module) and 'not loaded' not in repr(module)
+
+
+def test_importing_the_pipeline_leaves_heavy_dependencies_unloaded():
+    # pyarrow is left out: pandas imports it itself
+    heavy = ['plotly', 'xarray', 'cfgrib', 'sqlalchemy', 'requests', 'cdsapi']
+    script = (
+        "import sys, datapipeline\n"
+        f"print(sorted(name for name in {heavy!r} if name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert result.stdout.strip() == '[]'
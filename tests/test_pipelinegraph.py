@@ -0,0 +1,184 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from pipelinegraph import PipelineGraph, atomic_write, file_digest, path_state
+
+calls = []
+
+
+def read_source(path):
+    calls.append('source')
+    return pd.read_csv(path)
+
+
+def double(data):
+    calls.append('transform')
+    return data.assign(value=data['value'] * 2)
+
+
+def triple(data):
+    calls.append('transform')
+    return data.assign(value=data['value'] * 3)
+
+
+def double_again(data):
+    # Same output as double, different source
+    calls.append('transform')
+    return data.assign(value=data['value'] + data['value'])
+
+
+def total(data):
+    calls.append('total')
+    return pd.DataFrame({'total': [data['value'].sum()]})
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.csv'
+    path.write_text("value\n1\n2\n3\n")
+    return path
+
+
+def graph(tmp_path, source, transform=double, params=None):
+    graph = PipelineGraph(cache_dir=str(tmp_path / 'cache'))
+    graph.add('source', lambda: read_source(source), fingerprint=lambda: file_digest(str(source)))
+    graph.add('transform', transform, inputs=['source'], params=params)
+    graph.add('total', total, inputs=['transform'])
+    return graph
+
+
+def test_unchanged_run_reads_from_the_cache(tmp_path, source):
+    first = graph(tmp_path, source).run()
+    cached = graph(tmp_path, source)
+    second = cached.run()
+
+    assert calls == ['source', 'transform', 'total']
+    assert all(status['cached'] for status in cached.last_run.values())
+    assert second['total']['total'].tolist() == first['total']['total'].tolist() == [12]
+
+
+def test_cached_outputs_are_only_read_when_needed(tmp_path, source):
+    graph(tmp_path, source).run()
+    cached = graph(tmp_path, source)
+    # Only the target is read from disk; its inputs are never loaded
+    assert list(cached.run(['total'])) == ['total']
+    assert calls == ['source', 'transform', 'total']
+
+
+def test_input_change_reruns_downstream_stages(tmp_path, source):
+    graph(tmp_path, source).run()
+    source.write_text("value\n1\n2\n3\n4\n")
+
+    result = graph(tmp_path, source).run()
+
+    assert calls == ['source', 'transform', 'total'] * 2
+    assert result['total']['total'].tolist() == [20]
+
+
+def test_code_change_reruns_downstream_stages(tmp_path, source):
+    graph(tmp_path, source).run()
+
+    result = graph(tmp_path, source, transform=triple).run()
+
+    assert calls == ['source', 'transform', 'total', 'transform', 'total']
+    assert result['total']['total'].tolist() == [18]
+
+
+def test_params_change_reruns_the_stage(tmp_path, source):
+    graph(tmp_path, source, params={'scale': 2}).run()
+    graph(tmp_path, source, params={'scale': 3}).run()
+
+    assert calls == ['source', 'transform', 'total', 'transform']
+
+
+def test_code_change_with_the_same_output_keeps_downstream_cached(tmp_path, source):
+    graph(tmp_path, source).run()
+
+    changed = graph(tmp_path, source, transform=double_again)
+    changed.run()
+
+    # The downstream key depends on the content of the output, not on the code that made it
+    assert calls == ['source', 'transform', 'total', 'transform']
+    assert changed.last_run['total']['cached']
+
+
+def test_forced_stage_reruns(tmp_path, source):
+    graph(tmp_path, source).run()
+    graph(tmp_path, source).run(force=['source'])
+
+    assert calls == ['source', 'transform', 'total', 'source']
+
+
+def test_failed_stage_is_not_cached(tmp_path, source):
+    def fail(data):
+        raise ValueError('bad data')
+
+    failing = graph(tmp_path, source, transform=fail)
+    with pytest.raises(ValueError, match='bad data'):
+        failing.run()
+    assert 'transform' not in failing.last_run
+    assert not (tmp_path / 'cache' / 'transform').exists()
+
+    graph(tmp_path, source).run()
+    assert calls == ['source', 'transform', 'total']
+
+
+def test_sink_reruns_when_its_output_is_removed(tmp_path, source):
+    output = tmp_path / 'total.csv'
+
+    def write_total(data):
+        calls.append('write')
+        data.to_csv(output, index=False)
+
+    def sink_graph():
+        sink = graph(tmp_path, source)
+        sink.add('write', write_total, inputs=['total'], outputs=lambda: path_state([str(output)]))
+        return sink
+
+    sink_graph().run()
+    sink_graph().run()
+    output.unlink()
+    sink_graph().run()
+
+    assert calls.count('write') == 2
+    assert output.exists()
+
+
+def test_file_digest_memo(tmp_path, source):
+    memo = tmp_path / 'memo' / 'digests.json'
+
+    digest = file_digest(str(source), str(memo))
+
+    assert json.loads(memo.read_text()) == {f"{source}:{source.stat().st_size}:{source.stat().st_mtime_ns}": digest}
+    assert file_digest(str(source), str(memo)) == digest == file_digest(str(source))
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / 'new' / 'data.json'
+    with atomic_write(str(path)) as f:
+        f.write('{}')
+        assert not path.exists()
+
+    assert path.read_text() == '{}'
+    assert os.listdir(path.parent) == ['data.json']
+
+
+def test_atomic_write_keeps_the_old_file_on_error(tmp_path):
+    path = tmp_path / 'data.parquet'
+    path.write_bytes(b'old')
+
+    with pytest.raises(ValueError):
+        with atomic_write(str(path), mode=None) as tmp:
+            pd.DataFrame({'a': [1]}).to_parquet(tmp)
+            raise ValueError('interrupted')
+
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['data.parquet']
@@ -0,0 +1,117 @@
+import gc
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_city_data, make_zip_data
+from weatherstore import WeatherStore
+
+
+@pytest.fixture
+def tables(pipeline):
+    daily = pipeline.daily_data(make_city_data(2))
+    hourly = pipeline.hourly_data(make_zip_data(2, freq='12h'))
+    return daily, hourly
+
+
+@pytest.fixture
+def signatures(pipeline, monkeypatch):
+    # Records every table the pipeline hashes
+    hashed = []
+    table_signature = pipeline.table_signature
+
+    def recording(data, columns):
+        hashed.append(len(data))
+        return table_signature(data, columns)
+
+    monkeypatch.setattr(pipeline, 'table_signature', recording)
+    return hashed
+
+
+def test_frame_is_hashed_once(pipeline, tables, signatures):
+    daily, hourly = tables
+    pipeline.make_rollups(daily, hourly)
+    signatures.clear()
+
+    assert pipeline.rollup('seasonalrollup', daily) is pipeline.rollups['seasonalrollup']
+    assert pipeline.rollup('cityrollup', daily) is pipeline.rollups['cityrollup']
+    assert pipeline.rollup('hourlyrollup', hourly) is pipeline.rollups['hourlyrollup']
+
+    assert signatures == [len(daily), len(hourly)]
+
+
+def test_store_is_hashed_once_per_version(pipeline, tables, signatures):
+    daily, hourly = tables
+    pipeline.make_rollups(daily, hourly)
+    signatures.clear()
+
+    store = WeatherStore(daily)
+    pipeline.rollup('seasonalrollup', store)
+    pipeline.rollup('seasonalrollup', store)
+    pipeline.rollup('seasonalrollup', WeatherStore(daily))
+
+    assert signatures == [len(daily), len(daily)]
+
+
+def test_checks_of_collected_frames_are_dropped(pipeline, tables):
+    daily, hourly = tables
+    pipeline.make_rollups(daily, hourly)
+    copy = daily.copy()
+    pipeline.rollup('seasonalrollup', copy)
+    assert len(pipeline.rollup_source_checks) == 1
+
+    del copy
+    gc.collect()
+
+    assert pipeline.rollup_source_checks == {}
+
+
+def test_rollups_of_other_data_are_not_used(pipeline, tables):
+    daily, hourly = tables
+    pipeline.make_rollups(daily, hourly)
+
+    changed = daily.assign(temp=daily['temp'] + 1)
+
+    assert pipeline.rollup('seasonalrollup', changed) is None
+    assert pipeline.rollup('seasonalrollup', daily.iloc[1:]) is None
+    assert pipeline.rollup('seasonalrollup', daily.sample(frac=1, random_state=0)) is not None
+
+
+def test_rollups_round_trip_through_parquet(pipeline, tables, tmp_path):
+    daily, hourly = tables
+    rollups = pipeline.make_rollups(daily, hourly)
+    pipeline.save_rollups(rollups, str(tmp_path))
+    pipeline.save_tables(daily, hourly, pd.DataFrame({'name': ['a']}), str(tmp_path))
+
+    assert sorted(path.name for path in tmp_path.glob('*rollup.*')) == [
+        'cityrollup.parquet', 'extremerollup.parquet', 'hourlyrollup.parquet', 'seasonalrollup.parquet'
+    ]
+
+    loaded = pipeline.load_rollups(str(tmp_path))
+
+    for name, table in rollups.items():
+        pd.testing.assert_frame_equal(loaded[name], table, check_categorical=False)
+    assert pipeline.rollup('extremerollup', pipeline.load_table('dailydata', str(tmp_path))) is not None
+
+
+def test_legacy_csv_rollups_are_loaded(pipeline, tables, tmp_path):
+    daily, hourly = tables
+    rollups = pipeline.make_rollups(daily, hourly)
+    pipeline.save_rollups(rollups, str(tmp_path))
+    for name, table in rollups.items():
+        (tmp_path / f"{name}.parquet").unlink()
+        table.to_csv(tmp_path / f"{name}.csv", index=False)
+
+    loaded = pipeline.load_rollups(str(tmp_path))
+
+    assert loaded['hourlyrollup']['month'].dtype == rollups['hourlyrollup']['month'].dtype
+    assert pipeline.rollup('hourlyrollup', hourly) is loaded['hourlyrollup']
+
+
+def test_rollups_without_sources_are_ignored(pipeline, tables, tmp_path):
+    daily, hourly = tables
+    pipeline.save_rollups(pipeline.make_rollups(daily, hourly), str(tmp_path))
+    (tmp_path / 'rollupsources.json').unlink()
+
+    assert pipeline.load_rollups(str(tmp_path)) == {}
+    assert pipeline.rollup('seasonalrollup', daily) is None
@@ -0,0 +1,111 @@
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from benchmarks.synthetic import make_zip_data
+
+LOAD_DATA = re.compile(r"LOAD DATA LOCAL INFILE '(?P<path>[^']*)' INTO TABLE `(?P<table>\w+)` .*\((?P<columns>[^)]*)\)$", re.S)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'datapipeline.db'}")
+
+    # SQLite has no LOAD DATA LOCAL INFILE; read the file the way MySQL does instead
+    @sqlalchemy.event.listens_for(engine, 'before_cursor_execute', retval=True)
+    def load_data(conn, cursor, statement, parameters, context, executemany):
+        match = LOAD_DATA.match(statement)
+        if match is None:
+            return statement, parameters
+        columns = [column.strip(' `') for column in match.group('columns').split(',')]
+        with open(match.group('path'), newline='') as f:
+            rows = [[None if value == '\\N' else value for value in row] for row in csv.reader(f)]
+        cursor.executemany(
+            f"INSERT INTO {match.group('table')} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+        )
+        return "SELECT 1", ()
+
+    return engine
+
+
+@pytest.fixture
+def hourly(pipeline):
+    return pipeline.hourly_data(make_zip_data(2, freq='12h'))
+
+
+@pytest.fixture
+def mixed():
+    return pd.DataFrame({
+        'name': ['a', 'b', 'c'],
+        'date': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-03']),
+        'conditions': ['Rain, Overcast', 'Say "hi"', None],
+        'temp': [1.5, np.nan, -3.25],
+        'uvindex': [1, 2, 3],
+        'extreme': [True, False, True],
+    })
+
+
+def read_table(engine, table_name, data):
+    loaded = pd.read_sql_table(table_name, engine)
+    return loaded.sort_values(list(data.columns[:2])).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('method', ['executemany', 'infile'])
+def test_bulk_load_round_trip(pipeline, engine, hourly, method):
+    pipeline.bulk_load(hourly, 'hourlydata', engine, primary_key=['name', 'datetime'],
+                       indexes=[['date'], ['name', 'date']], method=method, batch_size=7)
+
+    loaded = read_table(engine, 'hourlydata', hourly)
+    expected = hourly.sort_values(['name', 'datetime']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False)
+
+    inspector = sqlalchemy.inspect(engine)
+    assert {tuple(index['column_names']) for index in inspector.get_indexes('hourlydata')} == {('date',), ('name', 'date')}
+    assert inspector.get_pk_constraint('hourlydata')['constrained_columns'] == ['name', 'datetime']
+    types = {column['name']: column['type'] for column in inspector.get_columns('hourlydata')}
+    assert isinstance(types['datetime'], sqlalchemy.types.DateTime)
+    assert isinstance(types['date'], sqlalchemy.types.Date)
+
+
+@pytest.mark.parametrize('method', ['executemany', 'infile'])
+def test_bulk_load_text_missing_values_and_booleans(pipeline, engine, mixed, method):
+    pipeline.bulk_load(mixed, 'dailydata', engine, primary_key=['name', 'date'], method=method)
+
+    loaded = read_table(engine, 'dailydata', mixed)
+
+    assert loaded['conditions'].tolist() == ['Rain, Overcast', 'Say "hi"', None]
+    assert loaded['temp'].isna().tolist() == [False, True, False]
+    assert loaded['extreme'].astype(bool).tolist() == [True, False, True]
+    assert loaded['date'].tolist() == mixed['date'].tolist()
+
+
+def test_bulk_load_replaces_the_table(pipeline, engine, hourly):
+    pipeline.bulk_load(hourly, 'hourlydata', engine, primary_key=['name', 'datetime'])
+    fewer = hourly.iloc[:10]
+
+    pipeline.bulk_load(fewer, 'hourlydata', engine, primary_key=['name', 'datetime'])
+
+    assert len(pd.read_sql_table('hourlydata', engine)) == 10
+
+
+def test_duplicate_keys_are_rejected_before_the_table_is_replaced(pipeline, engine, mixed):
+    pipeline.bulk_load(mixed, 'dailydata', engine, primary_key=['name', 'date'])
+    duplicated = pd.concat([mixed, mixed.iloc[:1]])
+
+    with pytest.raises(ValueError, match='2 rows of dailydata share a primary key'):
+        pipeline.bulk_load(duplicated, 'dailydata', engine, primary_key=['name', 'date'])
+
+    assert len(pd.read_sql_table('dailydata', engine)) == 3
+
+
+def test_dbml_types_match_the_sql_schema(pipeline, mixed, hourly):
+    lines = dict(line.split() for line in pipeline.dbml_helper(mixed).splitlines())
+    assert lines == {'name': 'varchar', 'date': 'date', 'conditions': 'varchar', 'temp': 'float',
+                     'uvindex': 'int', 'extreme': 'boolean'}
+
+    lines = dict(line.split() for line in pipeline.dbml_helper(hourly).splitlines())
+    assert (lines['datetime'], lines['date'], lines['hour']) == ('timestamp', 'date', 'int')
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from tablefilter import filter_mask, page_of_records, requested_page, split_filter_part
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-02-01', '2021-01-01']),
+        'temp': [-5.0, 0.0, 12.5, 20.0],
+        'conditions': ['Snow', 'Rain, Overcast', "It's clear", 'Clear'],
+    })
+
+
+@pytest.mark.parametrize('clause, expected', [
+    ('{temp} > 20', ('temp', 'gt', 20.0)),
+    ('{temp} >= -1.5', ('temp', 'ge', -1.5)),
+    ('{temp} < 3', ('temp', 'lt', 3.0)),
+    ('{temp} <= 3', ('temp', 'le', 3.0)),
+    ('{temp} != 3', ('temp', 'ne', 3.0)),
+    ('{temp} = 3', ('temp', 'eq', 3.0)),
+    ('{temp} eq 3', ('temp', 'eq', 3.0)),
+    ('{temp} gt 3', ('temp', 'gt', 3.0)),
+    ('{conditions} contains Rain', ('conditions', 'contains', 'Rain')),
+    ('{date} datestartswith 2020-01', ('date', 'datestartswith', '2020-01')),
+])
+def test_split_filter_part_operators(clause, expected):
+    assert split_filter_part(clause) == expected
+
+
+@pytest.mark.parametrize('clause, value', [
+    ('{conditions} contains "Rain, Overcast"', 'Rain, Overcast'),
+    ("{conditions} eq 'It\\'s clear'", "It's clear"),
+    ('{conditions} contains `20`', '20'),
+    # An operator inside a quoted value is part of the value
+    ('{conditions} contains "a = b"', 'a = b'),
+])
+def test_split_filter_part_quoted_values(clause, value):
+    column, _, parsed = split_filter_part(clause)
+    assert (column, parsed) == ('conditions', value)
+
+
+@pytest.mark.parametrize('clause', ['', 'temp > 3', '{temp} between 3'])
+def test_split_filter_part_rejects_unknown_clauses(clause):
+    assert split_filter_part(clause) == (None, None, None)
+
+
+@pytest.mark.parametrize('column, operator, value, expected', [
+    ('temp', 'gt', 0.0, [12.5, 20.0]),
+    ('temp', 'ge', 0.0, [0.0, 12.5, 20.0]),
+    ('temp', 'lt', 0.0, [-5.0]),
+    ('temp', 'le', 0.0, [-5.0, 0.0]),
+    ('temp', 'eq', 12.5, [12.5]),
+    ('temp', 'ne', 12.5, [-5.0, 0.0, 20.0]),
+    ('temp', 'eq', '12.5', [12.5]),
+    ('conditions', 'contains', 'Clear', [20.0]),
+    ('conditions', 'eq', "It's clear", [12.5]),
+    ('conditions', 'gt', 'Rain', [-5.0, 0.0]),
+    ('date', 'datestartswith', 2020.0, [-5.0, 0.0, 12.5]),
+    ('date', 'datestartswith', '2020-01', [-5.0, 0.0]),
+    ('date', 'ge', '2020-02-01', [12.5, 20.0]),
+    ('date', 'contains', '-01-01', [-5.0, 20.0]),
+])
+def test_filter_mask(data, column, operator, value, expected):
+    mask = filter_mask(data[column], operator, value)
+    assert data.loc[mask, 'temp'].tolist() == expected
+
+
+@pytest.mark.parametrize('column, operator, value', [
+    ('temp', 'gt', 'abc'),
+    ('date', 'eq', 'not a date'),
+    ('temp', 'between', 3.0),
+])
+def test_filter_mask_ignores_values_of_the_wrong_type(data, column, operator, value):
+    assert filter_mask(data[column], operator, value) is None
+
+
+def test_page_of_records_filters_sorts_and_pages(data):
+    records, page_count, page = page_of_records(
+        data, 0, 2, [{'column_id': 'temp', 'direction': 'desc'}], '{temp} >= 0 && {date} datestartswith 2020'
+    )
+
+    assert [record['temp'] for record in records] == [12.5, 0.0]
+    assert (page_count, page) == (1, 0)
+    assert str(records[0]['date']) == '2020-02-01'
+
+
+def test_page_of_records_ignores_unusable_clauses(data):
+    records, _, _ = page_of_records(data, 0, 10, None, '{temp} > abc && {missing} = 3')
+    assert len(records) == 4
+
+
+def test_page_of_records_clamps_the_page(data):
+    _, page_count, page = page_of_records(data, 5, 3, None, '')
+    assert (page_count, page) == (2, 1)
+
+    records, page_count, page = page_of_records(data, 1, 3, None, '{temp} > 100')
+    assert (records, page_count, page) == ([], 1, 0)
+
+
+@pytest.mark.parametrize('triggered, page_current, expected', [
+    ({'table.page_current': 'table'}, 3, 3),
+    ({'table.sort_by': 'table'}, 3, 0),
+    ({'table.filter_query': 'table'}, 3, 0),
+    ({'table.page_current': 'table', 'table.filter_query': 'table'}, 3, 0),
+    ({'city-dropdown.value': 'city-dropdown'}, 3, 0),
+    ({'table.page_current': 'table'}, None, 0),
+])
+def test_requested_page(triggered, page_current, expected):
+    assert requested_page(triggered, 'table', page_current) == expected
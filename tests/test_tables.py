@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic import make_zip_data
+from weatherstore import WeatherStore
+
+
+def hourly_table(pipeline, n_cities=2, days=40):
+    zip_data = make_zip_data(n_cities, freq='12h')
+    return pipeline.hourly_data(zip_data[zip_data['time'] < pd.Timestamp('2020-01-01') + pd.Timedelta(days=days)])
+
+
+def test_rewrite_removes_partitions_no_longer_in_the_data(pipeline, tmp_path):
+    path = str(tmp_path / 'hourlydata')
+    pipeline.write_parquet_dataset(hourly_table(pipeline, n_cities=3, days=40), path)
+
+    fewer = hourly_table(pipeline, n_cities=2, days=10)
+    pipeline.write_parquet_dataset(fewer, path)
+
+    loaded = pipeline.load_table('hourlydata', str(tmp_path))
+    assert sorted(loaded['name'].astype(str).unique()) == ['city000', 'city001']
+    assert loaded['date'].max() == pd.Timestamp('2020-01-10')
+    assert len(loaded) == len(fewer)
+    assert os.listdir(tmp_path) == ['hourlydata']
+
+
+def test_parquet_round_trip_keeps_types(pipeline, tmp_path):
+    hourly = hourly_table(pipeline)
+    pipeline.write_parquet_dataset(hourly, str(tmp_path / 'hourlydata'))
+
+    loaded = WeatherStore(pipeline.load_table('hourlydata', str(tmp_path))).data
+    expected = WeatherStore(hourly).data
+
+    assert sorted(loaded.columns) == sorted(expected.columns)
+    pd.testing.assert_series_equal(loaded['datetime'], expected['datetime'], check_dtype=False)
+    assert loaded['hour'].tolist() == expected['hour'].tolist()
+
+
+def write_legacy_hourly_csv(pipeline, tmp_path):
+    # Layout written before the datetime and hour columns: 'date' and 'time' strings,
+    # with an empty time at midnight
+    hourly = hourly_table(pipeline, days=3)
+    legacy = hourly.drop(columns=['datetime', 'hour']).assign(
+        date=hourly['datetime'].dt.strftime('%Y-%m-%d'),
+        time=hourly['datetime'].dt.strftime('%H:%M:%S').where(hourly['hour'] != 0)
+    )
+    legacy = legacy[['name', 'date', 'time'] + [col for col in legacy.columns if col not in ('name', 'date', 'time')]]
+    legacy.to_csv(tmp_path / 'hourlydata.csv', index=False)
+    return hourly
+
+
+def test_legacy_hourly_csv_gets_datetime_and_hour(pipeline, tmp_path):
+    hourly = write_legacy_hourly_csv(pipeline, tmp_path)
+
+    loaded = pipeline.load_table('hourlydata', str(tmp_path))
+
+    assert list(loaded.columns[:4]) == ['name', 'datetime', 'date', 'hour']
+    assert 'time' not in loaded.columns
+    assert loaded['datetime'].tolist() == hourly['datetime'].tolist()
+    assert loaded['hour'].tolist() == hourly['hour'].tolist()
+    assert pipeline.table_schema('hourlydata', str(tmp_path)).names == list(loaded.columns)
+
+
+def test_legacy_hourly_csv_with_selected_columns(pipeline, tmp_path):
+    write_legacy_hourly_csv(pipeline, tmp_path)
+
+    loaded = pipeline.load_table('hourlydata', str(tmp_path), columns=['name', 'hour', 't2m'])
+
+    assert list(loaded.columns) == ['name', 'hour', 't2m']
+
+
+def test_hourly_profile_on_legacy_hourly_csv(pipeline, tmp_path):
+    write_legacy_hourly_csv(pipeline, tmp_path)
+    store = WeatherStore(pipeline.load_table('hourlydata', str(tmp_path)))
+
+    profile = pipeline.hourly_profile(store, 'city000', '2020-01-01', '2020-01-03')
+
+    assert profile.index.tolist() == [0, 12]
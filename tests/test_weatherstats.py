@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from weatherstats import linear_fits, seasonal_stats
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    frames = []
+    for city, (slope, offset, n) in {'a': (0.5, 10.0, 200), 'b': (-2.0, 0.0, 50), 'c': (0.0, 1e5, 30)}.items():
+        x = rng.uniform(0, 100, n) + offset
+        frames.append(pd.DataFrame({'name': city, 'x': x, 'y': slope * x + rng.normal(0, 3, n)}))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+
+def test_matches_polyfit_per_city(data):
+    fits = linear_fits(data, 'x', 'y')
+
+    for city, group in data.groupby('name'):
+        slope, intercept = np.polyfit(group['x'], group['y'], 1)
+        r = np.corrcoef(group['x'], group['y'])[0, 1]
+        assert fits.loc[city, 'slope'] == pytest.approx(slope, rel=1e-9, abs=1e-9)
+        assert fits.loc[city, 'intercept'] == pytest.approx(intercept, rel=1e-9, abs=1e-6)
+        assert fits.loc[city, 'r2'] == pytest.approx(r ** 2, rel=1e-9, abs=1e-12)
+        assert fits.loc[city, 'n'] == len(group)
+        assert (fits.loc[city, 'x_min'], fits.loc[city, 'x_max']) == (group['x'].min(), group['x'].max())
+    assert list(fits.index) == ['a', 'b', 'c']
+
+
+def test_missing_values_are_left_out(data):
+    with_gaps = data.copy()
+    with_gaps.iloc[::7, with_gaps.columns.get_loc('x')] = np.nan
+    with_gaps.iloc[::5, with_gaps.columns.get_loc('y')] = np.nan
+
+    fits = linear_fits(with_gaps, 'x', 'y')
+    expected = linear_fits(with_gaps.dropna(), 'x', 'y')
+
+    pd.testing.assert_frame_equal(fits, expected)
+
+
+@pytest.mark.parametrize('x', [
+    [3.0],  # a single point
+    [0.1, 0.1, 0.1],
+    [1234.5678] * 7,  # sum(x²) - sum(x)²/n is not exactly zero here
+    [2.0, np.nan, 2.0],
+])
+def test_fewer_than_two_distinct_x_values_are_undefined(x):
+    data = pd.DataFrame({'name': 'a', 'x': x, 'y': np.arange(len(x), dtype=float)})
+
+    fits = linear_fits(data, 'x', 'y')
+
+    assert fits.loc['a', ['slope', 'intercept', 'r2']].isna().all()
+    assert fits.loc['a', 'x_min'] == fits.loc['a', 'x_max'] == x[0]
+
+
+def test_constant_y_has_zero_slope_and_no_r2():
+    data = pd.DataFrame({'name': 'a', 'x': [1.0, 2.0, 3.0], 'y': [0.3] * 3})
+
+    fits = linear_fits(data, 'x', 'y')
+
+    assert fits.loc['a', 'slope'] == pytest.approx(0.0, abs=1e-12)
+    assert fits.loc['a', 'intercept'] == pytest.approx(0.3)
+    assert np.isnan(fits.loc['a', 'r2'])
+
+
+def test_group_without_valid_rows(data):
+    data = pd.concat([data, pd.DataFrame({'name': ['d'], 'x': [np.nan], 'y': [1.0]})])
+
+    fits = linear_fits(data, 'x', 'y')
+
+    assert fits.loc['d', 'n'] == 0
+    assert fits.loc['d'].drop('n').isna().all()
+
+
+def test_seasonal_stats():
+    data = pd.DataFrame({'name': ['a', 'a', 'a', 'b'], 'temp': [1.0, 3.0, 10.0, 5.0]})
+    seasons = pd.Series(['Winter', 'Winter', 'Summer', 'Winter'])
+
+    stats = seasonal_stats(data, ['temp'], seasons).set_index(['name', 'season'])
+
+    assert stats.loc[('a', 'Winter'), ['temp', 'temp_min', 'temp_max', 'n']].tolist() == [2.0, 1.0, 3.0, 2]
+    assert stats.loc[('a', 'Winter'), 'temp_std'] == pytest.approx(np.std([1.0, 3.0], ddof=1))
+    assert np.isnan(stats.loc[('b', 'Winter'), 'temp_std'])
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from weatherstore import WeatherStore
+
+
+@pytest.fixture
+def daily():
+    # Unsorted, with a gap in b's dates and c's dates outside a's
+    return pd.DataFrame({
+        'name': ['b', 'a', 'a', 'b', 'a', 'c', 'b'],
+        'date': ['2020-01-03', '2020-01-02', '2020-01-01', '2020-01-01', '2020-01-03', '2021-06-01', '2020-01-05'],
+        'temp': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+    })
+
+
+@pytest.fixture
+def hourly():
+    times = pd.date_range('2020-01-01', periods=72, freq='h')
+    data = pd.DataFrame({
+        'name': ['a'] * 72 + ['b'] * 72,
+        'datetime': list(times) * 2,
+        't2m': range(144),
+    })
+    data['date'] = data['datetime'].dt.normalize()
+    return data.sample(frac=1, random_state=0)
+
+
+def masked(data, cities, start_date=None, end_date=None):
+    # The boolean-mask selection the store replaces
+    data = data.assign(date=pd.to_datetime(data['date']))
+    mask = data['name'].isin(cities)
+    if start_date is not None:
+        mask &= data['date'] >= start_date
+    if end_date is not None:
+        mask &= data['date'] <= end_date
+    sort_columns = [column for column in ('name', 'date', 'datetime') if column in data.columns]
+    return data[mask].sort_values(sort_columns).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('city, start_date, end_date', [
+    ('a', None, None),
+    ('a', '2020-01-02', None),
+    ('a', None, '2020-01-02'),
+    ('a', '2020-01-02', '2020-01-02'),  # both ends inclusive
+    ('b', '2020-01-02', '2020-01-04'),  # bounds between dates
+    ('b', '2020-01-05', '2020-01-05'),  # last date of the city
+    ('b', '2019-01-01', '2030-01-01'),  # bounds outside the city's dates
+    ('a', '2020-01-04', '2020-01-10'),  # after the city's dates
+    ('a', '2020-01-03', '2020-01-01'),  # empty range
+    ('c', '2020-01-01', '2020-12-31'),
+    ('unknown', None, None),
+])
+def test_select_matches_boolean_mask(daily, city, start_date, end_date):
+    store = WeatherStore(daily)
+
+    selected = store.select(city, start_date, end_date)
+
+    pd.testing.assert_frame_equal(selected.reset_index(drop=True), masked(daily, [city], start_date, end_date))
+
+
+@pytest.mark.parametrize('start_date, end_date', [(None, None), ('2020-01-02', '2020-01-02'), ('2020-01-03', '2020-01-02')])
+def test_hourly_end_date_includes_the_whole_day(hourly, start_date, end_date):
+    store = WeatherStore(hourly)
+
+    selected = store.select('b', start_date, end_date)
+
+    pd.testing.assert_frame_equal(selected.reset_index(drop=True), masked(hourly, ['b'], start_date, end_date))
+    if end_date is not None and start_date <= end_date:
+        assert len(selected) == 24
+        assert selected['datetime'].is_monotonic_increasing
+
+
+def test_unknown_city_is_empty(daily):
+    store = WeatherStore(daily)
+
+    assert store.locate('unknown') == (0, 0)
+    assert store.select('unknown').empty
+    assert list(store.select('unknown').columns) == ['name', 'date', 'temp']
+
+
+def test_select_cities_groups_by_city_in_request_order(daily):
+    store = WeatherStore(daily)
+
+    selected = store.select_cities(['b', 'unknown', 'a', 'b'], '2020-01-01', '2020-01-03')
+
+    assert selected['name'].tolist() == ['b', 'b', 'a', 'a', 'a']
+    assert store.select_cities([]).empty
+
+
+def test_pipeline_selection_is_the_same_for_stores_and_frames(pipeline, daily):
+    daily = daily.assign(date=pd.to_datetime(daily['date']))
+    store = WeatherStore(daily)
+
+    for cities in ('a', ['a', 'b'], ['unknown']):
+        from_store = pipeline.select_city_data(store, cities, '2020-01-02', '2020-01-03')
+        from_frame = pipeline.select_city_data(daily, cities, '2020-01-02', '2020-01-03')
+        key = ['name', 'date']
+        pd.testing.assert_frame_equal(from_store.sort_values(key).reset_index(drop=True),
+                                      from_frame.sort_values(key).reset_index(drop=True))
+
+
+def test_empty_store(daily):
+    store = WeatherStore(daily.iloc[0:0])
+
+    assert len(store) == 0
+    assert store.cities() == []
+    assert store.select('a').empty
+
+
+def test_cities_are_sorted(daily):
+    assert WeatherStore(daily).cities() == ['a', 'b', 'c']
+
+
+def test_every_store_has_a_new_version(daily):
+    first, second = WeatherStore(daily), WeatherStore(daily)
+    presorted = WeatherStore(first.data, presorted=True)
+
+    assert len({first.version, second.version, presorted.version}) == 3
+    assert second.version > first.version
+    assert presorted.data is first.data
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+def group_codes(data, by):
+    """
+    Integer code of each row's group.
+
+    Args:
+        data (pd.DataFrame): Rows to group.
+        by (str): Name of the grouping column.
+
+    Returns:
+        tuple: (codes as np.ndarray, pd.Index of the group labels in sorted order)
+    """
+    codes, labels = pd.factorize(data[by], sort=True)
+    return codes, pd.Index(labels, name=by)
+
+
+def group_range(codes, values, size):
+    """
+    Minimum and maximum of values within every group; NaN for empty groups.
+
+    Args:
+        codes (np.ndarray): Group code of each value.
+        values (np.ndarray): Values without NaNs.
+        size (int): Number of groups.
+
+    Returns:
+        tuple: (minimums, maximums) as np.ndarray.
+    """
+    minimum = np.full(size, np.nan)
+    maximum = np.full(size, np.nan)
+    np.fmin.at(minimum, codes, values)
+    np.fmax.at(maximum, codes, values)
+    return minimum, maximum
+
+
+def linear_fits(data, x_column, y_column, by='name'):
+    """
+    Least-squares line y = slope * x + intercept for every group at once.
+    Per-group means, then the centered sums of squares and products, are accumulated with
+    np.bincount, so the cost is linear in the number of rows regardless of the number of
+    groups. Rows where x or y is missing are left out.
+
+    Args:
+        data (pd.DataFrame): Rows with the grouping, x and y columns.
+        x_column (str): Name of the x column.
+        y_column (str): Name of the y column.
+        by (str): Name of the grouping column.
+
+    Returns:
+        pd.DataFrame: 'slope', 'intercept', 'r2', 'n', 'x_min' and 'x_max' indexed by group;
+            slope, intercept and r2 are NaN for groups with fewer than two distinct x values.
+    """
+    codes, labels = group_codes(data, by)
+    x = data[x_column].to_numpy(dtype=np.float64)
+    y = data[y_column].to_numpy(dtype=np.float64)
+    valid = (codes >= 0) & ~np.isnan(x) & ~np.isnan(y)
+    codes, x, y = codes[valid], x[valid], y[valid]
+
+    size = len(labels)
+    n = np.bincount(codes, minlength=size).astype(np.float64)
+    x_min, x_max = group_range(codes, x, size)
+    y_min, y_max = group_range(codes, y, size)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.bincount(codes, weights=x, minlength=size) / n
+        mean_y = np.bincount(codes, weights=y, minlength=size) / n
+        # Centering before squaring avoids the cancellation of sum(x²) - sum(x)²/n, which
+        # leaves a rounding error instead of zero for a constant x
+        dx = x - mean_x[codes]
+        dy = y - mean_y[codes]
+        var_x = np.bincount(codes, weights=dx * dx, minlength=size)
+        var_y = np.bincount(codes, weights=dy * dy, minlength=size)
+        cov_xy = np.bincount(codes, weights=dx * dy, minlength=size)
+        defined = x_max > x_min
+        slope = np.where(defined, cov_xy / var_x, np.nan)
+        intercept = np.where(defined, mean_y - slope * mean_x, np.nan)
+        r2 = np.where(defined & (y_max > y_min), cov_xy ** 2 / (var_x * var_y), np.nan)
+
+    return pd.DataFrame({
+        'slope': slope,
+        'intercept': intercept,
+        'r2': r2,
+        'n': n.astype(np.int64),
+        'x_min': x_min,
+        'x_max': x_max,
+    }, index=labels)
+
+
+def seasonal_stats(data, columns, seasons, by='name'):
+    """
+    Mean, standard deviation, minimum and maximum of columns per group and season.
+
+    Args:
+        data (pd.DataFrame): Rows with the grouping column and the numeric columns.
+        columns (list): Names of the numeric columns.
+        seasons (pd.Series): Season label of each row.
+        by (str): Name of the grouping column.
+
+    Returns:
+        pd.DataFrame: One row per group and season with the mean under each column's own
+            name, '<column>_std', '<column>_min', '<column>_max' and the row count 'n'.
+    """
+    grouped = data.assign(season=seasons).groupby([by, 'season'], observed=True)
+    stats = grouped[list(columns)].agg(['mean', 'std', 'min', 'max'])
+    stats.columns = [column if stat == 'mean' else f"{column}_{stat}" for column, stat in stats.columns]
+    stats['n'] = grouped.size()
+    return stats.reset_index()
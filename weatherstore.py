@@ -0,0 +1,114 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+_versions = itertools.count(1)
+
+
+class WeatherStore:
+    """
+    In-memory weather table sorted by (name, date) with a per-city offset table.
+
+    A city + date range lookup is a dictionary lookup followed by two binary searches
+    on that city's dates, and returns a positional slice of the sorted table instead
+    of scanning every row with boolean masks.
+    """
+
+    def __init__(self, data, city_column='name', date_column='date', presorted=False):
+        """
+        Sorts the data once and builds the per-city offset table.
+
+        Args:
+            data (pd.DataFrame): Daily or hourly weather data with city and date columns.
+            city_column (str): Name of the city column.
+            date_column (str): Name of the date column.
+            presorted (bool): Whether data is already the .data of a store, i.e. sorted with a datetime64
+                date column and a default index. It is then used as is, without a copy.
+        """
+        self.city_column = city_column
+        self.date_column = date_column
+
+        if presorted:
+            self.data = data
+        else:
+            data = data.assign(**{date_column: pd.to_datetime(data[date_column])})
+            sort_columns = [city_column, date_column]
+            if 'datetime' in data.columns:
+                sort_columns.append('datetime')
+            self.data = data.sort_values(by=sort_columns, kind='stable').reset_index(drop=True)
+
+        # Offsets of each city's contiguous block of rows
+        names = self.data[city_column].astype(str).to_numpy()
+        boundaries = np.flatnonzero(names[1:] != names[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        stops = np.concatenate([boundaries, [len(names)]])
+        self.offsets = {} if len(names) == 0 else {
+            names[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)
+        }
+        self.dates = self.data[date_column].to_numpy()
+
+        # Unique per store, so caches keyed on it are invalidated by a reload
+        self.version = next(_versions)
+
+    def __len__(self):
+        return len(self.data)
+
+    def cities(self):
+        """
+        Returns:
+            list: Cities in the store, in sorted order.
+        """
+        return list(self.offsets)
+
+    def locate(self, city, start_date=None, end_date=None):
+        """
+        Finds the row positions of a city's records within an inclusive date range.
+
+        Args:
+            city (str): Name of the city.
+            start_date (str): Start date (YYYY-MM-DD), or None for the first record.
+            end_date (str): End date (YYYY-MM-DD), or None for the last record.
+
+        Returns:
+            tuple: (start, stop) positions into self.data.
+        """
+        if city not in self.offsets:
+            return 0, 0
+        lo, hi = self.offsets[city]
+        city_dates = self.dates[lo:hi]
+        if start_date is not None:
+            lo += int(np.searchsorted(city_dates, np.datetime64(pd.Timestamp(start_date)), side='left'))
+        if end_date is not None:
+            hi = self.offsets[city][0] + int(np.searchsorted(city_dates, np.datetime64(pd.Timestamp(end_date)), side='right'))
+        return lo, max(lo, hi)
+
+    def select(self, city, start_date=None, end_date=None):
+        """
+        Returns a city's records within an inclusive date range as a slice of the sorted table.
+
+        Args:
+            city (str): Name of the city.
+            start_date (str): Start date (YYYY-MM-DD), or None for the first record.
+            end_date (str): End date (YYYY-MM-DD), or None for the last record.
+
+        Returns:
+            pd.DataFrame: Rows for the city and date range.
+        """
+        lo, hi = self.locate(city, start_date, end_date)
+        return self.data.iloc[lo:hi]
+
+    def select_cities(self, cities, start_date=None, end_date=None):
+        """
+        Returns the records of several cities within an inclusive date range.
+
+        Args:
+            cities (list): Names of the cities.
+            start_date (str): Start date (YYYY-MM-DD), or None for the first record.
+            end_date (str): End date (YYYY-MM-DD), or None for the last record.
+
+        Returns:
+            pd.DataFrame: Rows for the cities and date range, grouped by city.
+        """
+        frames = [self.select(city, start_date, end_date) for city in dict.fromkeys(cities)]
+        return pd.concat(frames) if frames else self.data.iloc[0:0]